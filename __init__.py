@@ -7,6 +7,7 @@ module_names = (
     'rig_manager',
     'rig_json_maker',
     'renderer',
+    'exif_writer',
     'ui',
     )
 
@@ -15,7 +16,7 @@ module_names = (
 # Add-On Handling
 ##############################################################################
 def register_properties():
-    from bpy.props import StringProperty, EnumProperty, IntProperty
+    from bpy.props import StringProperty, EnumProperty, IntProperty, BoolProperty
 
     # register properties only if they don't already exist
 
@@ -30,10 +31,116 @@ def register_properties():
         default='JPEG',
     )
 
+    if not hasattr(bpy.types.Scene, 'colmap_rig_lut_cache_size'):
+        bpy.types.Scene.colmap_rig_lut_cache_size = IntProperty(
+        name='Reprojection Cache (MB)',
+        description='Disk budget for cached reprojection sampling grids; least recently used grids are evicted first (0 keeps them in memory only)',
+        default=2048,
+        min=0,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_frame_cache_size'):
+        bpy.types.Scene.colmap_rig_frame_cache_size = IntProperty(
+        name='Frame Cache (MB)',
+        description='Disk budget for decoded movie frames reused by later renders; runs needing more frames than fit are not cached (0 disables the cache)',
+        default=0,
+        min=0,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_resume'):
+        bpy.types.Scene.colmap_rig_resume = BoolProperty(
+        name='Resume',
+        description='Skip frames whose output file already exists and is complete (not empty or truncated)',
+        default=False,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_incremental'):
+        bpy.types.Scene.colmap_rig_incremental = BoolProperty(
+        name='Incremental',
+        description='Only re-render camera/frame combinations whose inputs changed since the last run (tracked in render_manifest.json)',
+        default=False,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_write_behind'):
+        bpy.types.Scene.colmap_rig_write_behind = BoolProperty(
+        name='Write Behind',
+        description='Encode and save PNG/JPEG frames on worker threads while the next camera renders (Standard view transform only)',
+        default=False,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_pyramid_levels'):
+        bpy.types.Scene.colmap_rig_pyramid_levels = IntProperty(
+        name='Downscaled Levels',
+        description='Also write 1/2, 1/4, ... resolution copies of every frame to {output}/downscale_N, each with its own rig_config.json (0 = full resolution only)',
+        default=0,
+        min=0,
+        max=4,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_pack_shards'):
+        bpy.types.Scene.colmap_rig_pack_shards = BoolProperty(
+        name='Pack into Shards',
+        description='Append frames to per-camera tar shards in {output}/_shards instead of writing one file per frame; unpack them when COLMAP needs the folders',
+        default=False,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_profile'):
+        bpy.types.Scene.colmap_rig_profile = BoolProperty(
+        name='Profile',
+        description='Time each render phase per rig and camera and write render_timings.json/.csv to the output folder',
+        default=False,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_parallel_workers'):
+        bpy.types.Scene.colmap_rig_parallel_workers = IntProperty(
+        name='Render Workers',
+        description='Number of headless Blender processes rendering in parallel (1 renders in this session)',
+        default=1,
+        min=1,
+        max=256,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_worker_threads'):
+        bpy.types.Scene.colmap_rig_worker_threads = IntProperty(
+        name='Threads per Worker',
+        description='Render threads for each worker process (0 splits the CPU cores evenly between workers)',
+        default=0,
+        min=0,
+        max=1024,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_use_proxy'):
+        bpy.types.Scene.colmap_rig_use_proxy = BoolProperty(
+        name='Viewport Proxies',
+        description='Show downscaled copies of the rig media in the viewport (built in the background and cached); renders always use the original',
+        default=True,
+    )
+
+    if not hasattr(bpy.types.Scene, 'colmap_rig_proxy_width'):
+        bpy.types.Scene.colmap_rig_proxy_width = IntProperty(
+        name='Proxy Width',
+        description='Width in pixels of viewport proxies; media no wider than this is shown as is',
+        default=2048,
+        min=256,
+        max=16384,
+    )
+
 
 def unregister_properties():
     for name in (
         'colmap_rig_image_format',
+        'colmap_rig_lut_cache_size',
+        'colmap_rig_frame_cache_size',
+        'colmap_rig_resume',
+        'colmap_rig_incremental',
+        'colmap_rig_write_behind',
+        'colmap_rig_pyramid_levels',
+        'colmap_rig_pack_shards',
+        'colmap_rig_profile',
+        'colmap_rig_parallel_workers',
+        'colmap_rig_worker_threads',
+        'colmap_rig_use_proxy',
+        'colmap_rig_proxy_width',
     ):
         if hasattr(bpy.types.Scene, name):
             delattr(bpy.types.Scene, name)
@@ -0,0 +1,65 @@
+#cache_utils.py
+"""Shared helpers for the add-on's on-disk caches."""
+import os
+import tempfile
+
+
+def cache_dir(name):
+    '''Return (and create) the directory for cache `name`.
+
+    Uses the extension's user directory when running as a Blender extension and
+    falls back to the system temp directory otherwise.
+    '''
+    path = None
+    try:
+        import bpy
+        if __package__:
+            path = bpy.utils.extension_path_user(__package__, path=name, create=True)
+    except Exception:
+        path = None
+    if not path:
+        path = os.path.join(tempfile.gettempdir(), 'colmap_rig_cache', name)
+        os.makedirs(path, exist_ok=True)
+    return path
+
+
+def touch(path):
+    '''Mark a cache entry as recently used.'''
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def evict_lru(directory, max_bytes, suffix=''):
+    '''Delete the least recently used files in `directory` until it fits into max_bytes.
+
+    Recency is the file modification time, which cache hits refresh with touch().
+    Returns the number of bytes removed.
+    '''
+    entries = []
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if suffix and not name.endswith(suffix):
+                continue
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    removed = 0
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += size
+    return removed
@@ -0,0 +1,211 @@
+#cli.py
+"""Headless command line entry point for colmap_rig.export and colmap_rig.render.
+
+    blender -b scene.blend --python cli.py -- --output /renders --frames 1:240:2 --shard 0/4
+
+With the add-on installed the same arguments work through
+`--python-expr "import importlib; importlib.import_module('bl_ext.user_default.colmap_rig_addon.cli').main()"`.
+The process exits with 0 on success, 1 if the export or any frame failed and 2
+for invalid arguments, and prints one `COLMAP_RIG_SUMMARY {json}` line.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import bpy
+
+try:
+    from . import parallel_render
+except ImportError:
+    # Run as a loose script: make the sibling modules importable
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import parallel_render
+
+SUMMARY_PREFIX = 'COLMAP_RIG_SUMMARY '
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def parse_frames(text):
+    '''Parse "start:end[:step]" (end inclusive) or a single frame into (start, end, step).'''
+    parts = text.split(':')
+    if not 1 <= len(parts) <= 3:
+        raise argparse.ArgumentTypeError(f'invalid frame range {text!r}, expected start:end[:step]')
+    try:
+        values = [int(p) for p in parts]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid frame range {text!r}, expected integers')
+    start = values[0]
+    end = values[1] if len(values) > 1 else start
+    step = values[2] if len(values) > 2 else 1
+    if start < 1 or end < start or step < 1:
+        raise argparse.ArgumentTypeError(f'invalid frame range {text!r}, need 1 <= start <= end and step >= 1')
+    return start, end, step
+
+
+def parse_shard(text):
+    '''Parse "i/n" into (i, n) with 0 <= i < n.'''
+    try:
+        index, count = (int(p) for p in text.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid shard {text!r}, expected i/n')
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f'invalid shard {text!r}, need 0 <= i < n')
+    return index, count
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='colmap_rig',
+        description='Export COLMAP rig JSON and render rig cameras without a GUI session.',
+    )
+    parser.add_argument('--scene', default='', help='scene to use (default: the active scene)')
+    parser.add_argument('--output', default='', help='output folder (default: the scene render output path)')
+    parser.add_argument('--rigs', default='', help='comma separated rig names (default: all rigs)')
+    parser.add_argument('--frames', type=parse_frames, default=None,
+                        help='start:end[:step] overriding every selected rig\'s frame range')
+    parser.add_argument('--shard', type=parse_shard, default=None,
+                        help='i/n: render only the i-th of n contiguous shards of the frame list')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--export-only', action='store_true', help='write rig_config.json and skip rendering')
+    mode.add_argument('--no-export', action='store_true', help='render without writing rig_config.json')
+    parser.add_argument('--resume', action='store_true', help='skip frames that already exist and are complete')
+    parser.add_argument('--workers', type=int, default=0, help='render with this many local worker processes')
+    parser.add_argument('--summary-file', default='', help='also write the JSON summary to this file')
+    return parser
+
+
+def _ensure_registered():
+    '''Register the add-on classes when running from a loose source folder.'''
+    if not hasattr(bpy.types.Scene, 'rig_collection'):
+        parallel_render._addon_module('rig_manager').register()
+    for module_name, cls_name in (
+        ('rig_json_maker', 'COLMAP_RIG_OT_export'),
+        ('renderer', 'COLMAP_RIG_OT_render'),
+        ('exif_writer', 'COLMAP_RIG_OT_apply_exif'),
+    ):
+        if not hasattr(bpy.types, cls_name):
+            parallel_render._addon_module(module_name).register()
+
+
+def _select_rigs(scene, names, frames):
+    '''Limit export/render to the named rigs and apply the frame override (in memory only).'''
+    known = {item.name for item in scene.rig_collection}
+    missing = [name for name in names if name not in known]
+    if missing:
+        raise ValueError(f"unknown rig(s): {', '.join(missing)}")
+    for rig_item in scene.rig_collection:
+        if names and rig_item.name not in names:
+            rig_item.do_render = False
+            rig_item.include_in_json = False
+        if frames is not None:
+            rig_item.start_frame, rig_item.end_frame, rig_item.frame_step = frames
+
+
+def _write_summary(summary, path):
+    print(SUMMARY_PREFIX + json.dumps(summary, sort_keys=True))
+    if path:
+        with open(path, 'w') as f:
+            json.dump(summary, f, indent=4, sort_keys=True)
+
+
+def run(args):
+    '''Run export and/or render for parsed arguments; return (exit code, summary dict).'''
+    # A shard is rendered in this process; its work list can't be split over local workers too
+    if args.shard is not None and args.workers > 0:
+        raise ValueError('--workers cannot be combined with --shard; start one job per shard instead')
+    start_time = time.time()
+    summary = {
+        'export': None,
+        'rendered': 0,
+        'failed': [],
+        'skipped': 0,
+        'shard': list(args.shard) if args.shard else None,
+        'frames_in_shard': None,
+    }
+
+    scene = bpy.data.scenes.get(args.scene) if args.scene else bpy.context.scene
+    if scene is None:
+        raise ValueError(f'unknown scene {args.scene!r}')
+    _ensure_registered()
+    if args.output:
+        scene.render.filepath = args.output
+    out_base = bpy.path.abspath(scene.render.filepath)
+    if not out_base:
+        raise ValueError('no output folder: pass --output or set the render output path')
+    summary['output'] = out_base
+
+    names = [n.strip() for n in args.rigs.split(',') if n.strip()]
+    _select_rigs(scene, names, args.frames)
+    if args.resume and hasattr(scene, 'colmap_rig_resume'):
+        scene.colmap_rig_resume = True
+    if args.workers > 0 and hasattr(scene, 'colmap_rig_parallel_workers'):
+        scene.colmap_rig_parallel_workers = args.workers
+
+    renderer = parallel_render._addon_module('renderer')
+    code = EXIT_OK
+    with bpy.context.temp_override(scene=scene):
+        # Sharded jobs share one output folder; only the first shard writes the rig JSON
+        if not args.no_export and (args.shard is None or args.shard[0] == 0):
+            json_path = os.path.join(out_base, 'rig_config.json')
+            if 'FINISHED' in bpy.ops.colmap_rig.export(filepath=json_path):
+                summary['export'] = json_path
+            else:
+                code = EXIT_FAILED
+
+        if not args.export_only:
+            work_path = ''
+            if args.shard is not None:
+                index, count = args.shard
+                shards = parallel_render.shard_work(parallel_render.build_work_list(scene), count)
+                shard = shards[index] if index < len(shards) else []
+                summary['frames_in_shard'] = len(shard)
+                if shard:
+                    fd, work_path = tempfile.mkstemp(prefix='colmap_rig_shard_', suffix='.json')
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump({'items': shard}, f)
+
+            if args.shard is None or work_path:
+                renderer.last_render_summary.clear()
+                try:
+                    result = bpy.ops.colmap_rig.render(work_file=work_path)
+                finally:
+                    if work_path:
+                        os.remove(work_path)
+                render_summary = renderer.last_render_summary
+                summary['rendered'] = render_summary.get('rendered', 0)
+                summary['failed'] = render_summary.get('failed', [])
+                summary['skipped'] = render_summary.get('skipped', 0)
+                if 'FINISHED' not in result or summary['failed']:
+                    code = EXIT_FAILED
+
+    summary['seconds'] = round(time.time() - start_time, 3)
+    return code, summary
+
+
+def main(argv=None):
+    '''Parse the arguments after "--", run, print the summary and exit Blender with the exit code.'''
+    if argv is None:
+        argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    args = build_parser().parse_args(argv)
+
+    try:
+        code, summary = run(args)
+    except ValueError as e:
+        print(f'Error: {e}')
+        code, summary = EXIT_USAGE, {'error': str(e)}
+    except Exception as e:
+        print(f'Error: colmap_rig command failed: {e}')
+        code, summary = EXIT_FAILED, {'error': str(e)}
+    summary['exit_code'] = code
+    _write_summary(summary, args.summary_file)
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
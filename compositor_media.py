@@ -0,0 +1,118 @@
+#compositor_media.py
+"""Compositor graph that feeds a Perspective rig's media straight into the Composite output.
+
+The graph is built once when a rig starts rendering; per frame only the input
+changes. Image sequences are stepped through the Image node's frame offset
+instead of loading a new image for every frame, and movie clips follow the
+scene frame on their own.
+"""
+import bpy
+
+try:
+    from . import frame_source
+except ImportError:
+    import frame_source
+
+CLIP_NODE_NAME = 'RIG_MEDIA_CLIP'
+IMAGE_NODE_NAME = 'RIG_MEDIA_IMAGE'
+
+
+def _media_node(nt, name, node_type, bl_idname, location):
+    '''Return the named media node of the tree, creating it if needed.'''
+    node = nt.nodes.get(name)
+    if node is None or node.type != node_type:
+        node = nt.nodes.new(bl_idname)
+        node.name = name
+        node.label = name
+        node.location = location
+    return node
+
+
+class CompositorMediaPipeline:
+    '''Compositor setup for one Perspective rig.
+
+    mode is 'SHARED' (image node showing the decoded shared frame), 'CLIP'
+    (movie clip node), 'SEQUENCE' (image node stepped by frame offset) or
+    'FILE' (still image), or None if the graph could not be built.
+    '''
+
+    def __init__(self, scene, rig_item):
+        self.scene = scene
+        self.rig_item = rig_item
+        self.mode = None
+        self.node = None
+
+    def build(self, shared=False):
+        '''Create or reuse the nodes and link the media input to the Composite node.'''
+        scene = self.scene
+        src_path = self.rig_item.source_filepath
+        src_type = getattr(self.rig_item, 'source_type', '')
+        scene.use_nodes = True
+        if not scene.node_tree:
+            scene.node_tree = bpy.data.node_groups.new('Compositing', 'CompositorNodeTree')
+        nt = scene.node_tree
+        # Ensure composite node exists
+        comp = next((n for n in nt.nodes if n.type == 'COMPOSITE'), None)
+        if not comp:
+            comp = nt.nodes.new('CompositorNodeComposite')
+            comp.location = (400, 0)
+
+        self.mode = None
+        try:
+            if shared:
+                node = _media_node(nt, IMAGE_NODE_NAME, 'IMAGE', 'CompositorNodeImage', (0, 0))
+                mode = 'SHARED'
+            elif src_type == 'Movie Clip':
+                node = _media_node(nt, CLIP_NODE_NAME, 'MOVIECLIP', 'CompositorNodeMovieClip', (0, -120))
+                node.clip = bpy.data.movieclips.load(src_path, check_existing=True)
+                mode = 'CLIP'
+            else:
+                node = _media_node(nt, IMAGE_NODE_NAME, 'IMAGE', 'CompositorNodeImage', (0, 0))
+                img = bpy.data.images.load(src_path, check_existing=True)
+                if src_type == 'Image Sequence':
+                    img.source = 'SEQUENCE'
+                    # A one-frame window pins the shown file to frame_offset + 1, independent of the scene frame
+                    node.image = img
+                    node.frame_start = 1
+                    node.frame_duration = 1
+                    node.use_cyclic = False
+                    node.use_auto_refresh = True
+                    mode = 'SEQUENCE'
+                else:
+                    img.source = 'FILE'
+                    node.image = img
+                    mode = 'FILE'
+        except Exception as e:
+            print(f'Warning: compositor media setup failed: {e}')
+            return False
+
+        # Relink only if the Composite input isn't already fed by this node
+        output = node.outputs.get('Image')
+        linked = comp.inputs[0].links[0].from_socket if comp.inputs[0].is_linked else None
+        if linked != output:
+            while comp.inputs and comp.inputs[0].is_linked:
+                nt.links.remove(comp.inputs[0].links[0])
+            nt.links.new(output, comp.inputs[0])
+        self.node = node
+        self.mode = mode
+        return True
+
+    def set_frame(self, frame, frame_image=None):
+        '''Point the graph at scene frame `frame`; frame_image is the decoded shared frame, if any.'''
+        if self.mode == 'SHARED':
+            if frame_image is None:
+                # Decoding failed: let the compositor read the media itself from here on
+                self.release()
+                self.build(shared=False)
+            elif self.node.image != frame_image:
+                self.node.image = frame_image
+        if self.mode == 'SEQUENCE':
+            number = frame_source.sequence_frame_number(bpy.path.abspath(self.rig_item.source_filepath), frame)
+            offset = (number if number is not None else frame) - 1
+            if self.node.frame_offset != offset:
+                self.node.frame_offset = offset
+
+    def release(self):
+        '''Detach the shared frame image so it can be freed.'''
+        if self.mode == 'SHARED' and self.node is not None:
+            self.node.image = None
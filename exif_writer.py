@@ -0,0 +1,175 @@
+#exif_writer.py
+"""Background EXIF injection for rendered JPEG frames.
+
+EXIF bytes only depend on the camera and the output resolution, so they are
+built once per camera and handed to a small thread pool together with the
+file to patch. Workers insert the EXIF block into a temp file and rename it
+into place, overlapping with the next render on the main thread. The same pool
+backs COLMAP_RIG_OT_apply_exif, which bulk-applies EXIF to an existing output tree.
+"""
+import os
+
+import bpy
+from bpy.types import Operator
+
+try:
+    from . import job_pool, output_io
+except ImportError:
+    import job_pool
+    import output_io
+
+try:
+    import piexif
+    PIEXIF_AVAILABLE = True
+except ImportError:
+    PIEXIF_AVAILABLE = False
+    print("Warning: piexif not available, EXIF data will not be written to images")
+
+
+def build_exif_bytes(focal_mm, sensor_width_mm, width_px, height_px):
+    '''Return the dumped EXIF block COLMAP uses to detect camera intrinsics.'''
+    # Calculate 35mm equivalent focal length
+    focal_35mm = int((focal_mm / sensor_width_mm) * 36.0)
+
+    exif_dict = {
+        "0th": {
+            piexif.ImageIFD.Make: "Blender",
+            piexif.ImageIFD.Model: "Virtual Camera",
+            piexif.ImageIFD.Software: f"Blender {bpy.app.version_string}",
+        },
+        "Exif": {
+            piexif.ExifIFD.FocalLength: (int(focal_mm * 100), 100),  # Store as rational (numerator, denominator)
+            piexif.ExifIFD.FocalLengthIn35mmFilm: focal_35mm,
+            piexif.ExifIFD.PixelXDimension: width_px,
+            piexif.ExifIFD.PixelYDimension: height_px,
+        },
+    }
+    return piexif.dump(exif_dict)
+
+
+def camera_exif_bytes(camera_obj, scene, width_px=None, height_px=None):
+    '''Build the EXIF block for a camera; the size defaults to the scene's output size.'''
+    camera_data = camera_obj.data
+    if width_px is None or height_px is None:
+        width_px, height_px = output_io.output_size(scene, (scene.render.resolution_x, scene.render.resolution_y))
+    return build_exif_bytes(camera_data.lens, camera_data.sensor_width, width_px, height_px)
+
+
+def insert_exif(exif_bytes, src_path, dst_path=None):
+    '''Insert exif_bytes into the JPEG at src_path and atomically move the result to dst_path.
+
+    With dst_path None (or equal to src_path) the file is patched in place via a temp file.
+    '''
+    if dst_path is None or dst_path == src_path:
+        tmp_path = output_io.partial_path(src_path)
+        try:
+            piexif.insert(exif_bytes, src_path, tmp_path)
+            output_io.commit(tmp_path, src_path)
+        except Exception:
+            output_io.discard(tmp_path)
+            raise
+    else:
+        piexif.insert(exif_bytes, src_path)
+        output_io.commit(src_path, dst_path)
+
+
+class ExifWriterPool(job_pool.JobPool):
+    '''Threads that insert EXIF blocks.
+
+    submit() blocks once max_pending jobs are pending, which keeps the render
+    loop from running arbitrarily far ahead. Results are collected as
+    (key, error, seconds) tuples and fetched on the main thread with pop_finished().
+    '''
+
+    error_prefix = 'EXIF write failed'
+    thread_name = 'colmap_rig_exif'
+
+    def __init__(self, num_workers=2, max_pending=32):
+        super().__init__(num_workers, max_pending=max_pending)
+
+    def run_job(self, exif_bytes, src_path, dst_path):
+        insert_exif(exif_bytes, src_path, dst_path)
+
+    def submit(self, exif_bytes, src_path, dst_path=None, key=None):
+        '''Queue an EXIF insertion; key is handed back by pop_finished().'''
+        super().submit(exif_bytes, src_path, dst_path, key=key)
+
+
+class COLMAP_RIG_OT_apply_exif(Operator):
+    bl_idname = 'colmap_rig.apply_exif'
+    bl_label = 'Apply EXIF to rendered frames'
+    bl_description = 'Write camera EXIF metadata into existing JPEG frames of all Equirect rigs in the output folder'
+
+    def execute(self, context):
+        scene = context.scene
+        if not PIEXIF_AVAILABLE:
+            self.report({'WARNING'}, 'piexif not available, cannot write EXIF')
+            return {'CANCELLED'}
+
+        out_base = bpy.path.abspath(scene.render.filepath)
+        if not out_base or not hasattr(scene, 'rig_collection'):
+            self.report({'WARNING'}, 'No render output path or rig collection set')
+            return {'CANCELLED'}
+
+        # One EXIF block per camera, one job per existing JPEG
+        jobs = []
+        for rig_item in scene.rig_collection:
+            if not rig_item.collection or getattr(rig_item, 'rig_type', 'EQUIRECT_360') == 'PERSPECTIVE':
+                continue
+            if not getattr(rig_item, 'write_exif', True):
+                continue
+            # Frames were written at the rig resolution scaled by the resolution percentage
+            width, height = output_io.output_size(scene, rig_item.render_resolution)
+            for cam in rig_item.collection.objects:
+                if cam.type != 'CAMERA':
+                    continue
+                cam_folder = os.path.join(out_base, rig_item.name, cam.name)
+                if not os.path.isdir(cam_folder):
+                    continue
+                exif_bytes = camera_exif_bytes(cam, scene, width, height)
+                for name in sorted(os.listdir(cam_folder)):
+                    if name.startswith('.') or not name.lower().endswith(('.jpg', '.jpeg')):
+                        continue
+                    jobs.append((exif_bytes, os.path.join(cam_folder, name)))
+
+        if not jobs:
+            self.report({'WARNING'}, f'No JPEG frames found in {out_base}')
+            return {'CANCELLED'}
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        errors = []
+        done = 0
+        with ExifWriterPool(num_workers=min(8, os.cpu_count() or 1)) as pool:
+            for exif_bytes, path in jobs:
+                pool.submit(exif_bytes, path, key=path)
+                for key, error, _ in pool.pop_finished():
+                    done += 1
+                    if error:
+                        errors.append((key, error))
+                wm.progress_update(done / len(jobs) * 100)
+        for key, error, _ in pool.pop_finished():
+            if error:
+                errors.append((key, error))
+        wm.progress_end()
+
+        for path, error in errors:
+            print(f"Warning: {path}: {error}")
+        if errors:
+            self.report({'WARNING'}, f'Applied EXIF to {len(jobs) - len(errors)} of {len(jobs)} frames (see console)')
+        else:
+            self.report({'INFO'}, f'Applied EXIF to {len(jobs)} frames in {out_base}')
+        return {'FINISHED'}
+
+
+classes = (
+    COLMAP_RIG_OT_apply_exif,
+)
+
+def register():
+    for cls in classes:
+        bpy.utils.register_class(cls)
+
+def unregister():
+    for cls in reversed(classes):
+        bpy.utils.unregister_class(cls)
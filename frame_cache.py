@@ -0,0 +1,116 @@
+#frame_cache.py
+"""Persistent cache of decoded movie frames.
+
+Re-rendering a rig after moving its cameras needs exactly the same source
+frames as the run before. Frames decoded by movie_decoder are stored as raw
+8-bit RGBA .npy files (memory-mapped on load, no decoding) in one folder per
+source file, keyed by the file's path, size and mtime, so an edited or
+replaced movie never serves stale frames. The folder is kept under a disk
+budget by evicting the least recently used frames.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+try:
+    from . import cache_utils
+except ImportError:
+    import cache_utils
+
+# Bump when the stored frame layout changes to invalidate old entries
+FRAME_CACHE_VERSION = 1
+
+
+def source_key(path):
+    '''Return a stable hex key for the current state of a source file, or None if it is missing.'''
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    text = f'{FRAME_CACHE_VERSION}|{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}'
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class FrameCache:
+    '''Decoded frames on disk as memory-mapped .npy files with an LRU size cap.
+
+    max_bytes <= 0 disables the cache (nothing is read or written).
+    '''
+
+    def __init__(self, directory=None, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.directory = directory or (cache_utils.cache_dir('frame_cache') if max_bytes > 0 else None)
+        self._total = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return bool(self.directory) and self.max_bytes > 0
+
+    def _path(self, key, frame):
+        return os.path.join(self.directory, key, f'{frame:06d}.npy')
+
+    def has(self, key, frame):
+        return self.enabled and key is not None and os.path.exists(self._path(key, frame))
+
+    def get(self, key, frame, width, height):
+        '''Return the cached (height, width, 4) uint8 frame or None.'''
+        if not self.enabled or key is None:
+            return None
+        path = self._path(key, frame)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            pixels = np.load(path, mmap_mode='r')
+            if pixels.shape != (height, width, 4) or pixels.dtype != np.uint8:
+                raise ValueError(f'unexpected frame shape {pixels.shape}')
+        except Exception as e:
+            print(f"Warning: dropping unreadable frame cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.misses += 1
+            return None
+        cache_utils.touch(path)
+        self.hits += 1
+        return pixels
+
+    def put(self, key, frame, raw, width, height):
+        '''Store one raw top-down RGBA frame.'''
+        if not self.enabled or key is None:
+            return
+        path = self._path(key, frame)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            pixels = np.frombuffer(raw, dtype=np.uint8, count=width * height * 4).reshape(height, width, 4)
+            with open(tmp_path, 'wb') as f:
+                np.save(f, pixels)
+            os.replace(tmp_path, path)
+            self._evict(os.path.getsize(path))
+        except Exception as e:
+            print(f"Warning: could not write frame cache entry {path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _evict(self, added):
+        '''Keep a running total of the cache size and only walk the folder when it is over budget.'''
+        if self._total is None:
+            self._total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith('.npy'):
+                        try:
+                            self._total += os.path.getsize(os.path.join(root, name))
+                        except OSError:
+                            pass
+        else:
+            self._total += added
+        if self._total > self.max_bytes:
+            self._total -= cache_utils.evict_lru(self.directory, self.max_bytes, suffix='.npy')
@@ -0,0 +1,219 @@
+#frame_source.py
+"""Read rig source frames (single image, image sequence or movie) into NumPy buffers.
+
+Buffers follow Blender's Image.pixels layout: float32 RGBA with bottom-up rows.
+Still images and sequence frames are decoded through bpy.data.images; movie
+frames are decoded with ffmpeg when it is available on PATH.
+"""
+import json
+import shutil
+import subprocess
+
+import bpy
+import numpy as np
+
+try:
+    from . import sequence_index
+except ImportError:
+    import sequence_index
+
+FFMPEG_PATH = shutil.which('ffmpeg')
+FFPROBE_PATH = shutil.which('ffprobe')
+if not FFMPEG_PATH:
+    print("Warning: ffmpeg not found on PATH, movie sources cannot be decoded outside of Blender renders")
+
+SEQUENCE_STEM_RE = sequence_index.SEQUENCE_STEM_RE
+
+
+class SourceFrame:
+    '''A decoded source frame plus the colour information needed to write it back out.'''
+
+    def __init__(self, pixels, is_float=False, colorspace='sRGB'):
+        self.pixels = pixels
+        self.is_float = is_float
+        self.colorspace = colorspace
+
+    @property
+    def width(self):
+        return self.pixels.shape[1]
+
+    @property
+    def height(self):
+        return self.pixels.shape[0]
+
+
+def sequence_frame_path(src_path, frame):
+    '''Return the file of the image sequence src_path belongs to that is shown at rig frame `frame`.
+
+    Rig frame 1 is the first file of the sequence (see sequence_index). Falls
+    back to src_path when the name has no frame number or cannot be indexed.
+    '''
+    index = sequence_index.get_index(src_path)
+    return index.frame_path(frame) if index is not None else src_path
+
+
+def sequence_frame_number(src_path, frame):
+    '''Return the file number sequence_frame_path() resolves `frame` to, or None for unnumbered files.'''
+    index = sequence_index.get_index(src_path)
+    return index.number_for_frame(frame) if index is not None else None
+
+
+def _to_rgba(pixels, channels):
+    '''Expand a (h, w, channels) buffer to RGBA.'''
+    if channels == 4:
+        return pixels
+    h, w = pixels.shape[:2]
+    rgba = np.ones((h, w, 4), dtype=np.float32)
+    if channels >= 3:
+        rgba[..., :3] = pixels[..., :3]
+    else:
+        rgba[..., :3] = pixels[..., :1]
+    return rgba
+
+
+def read_image_file(path):
+    '''Decode a still image through Blender and return it as a SourceFrame.'''
+    img = bpy.data.images.load(path, check_existing=False)
+    try:
+        width, height = img.size
+        channels = img.channels
+        buf = np.empty(width * height * channels, dtype=np.float32)
+        img.pixels.foreach_get(buf)
+        pixels = _to_rgba(buf.reshape(height, width, channels), channels)
+        return SourceFrame(pixels, img.is_float, img.colorspace_settings.name)
+    finally:
+        bpy.data.images.remove(img)
+
+
+_movie_info_cache = {}
+
+def movie_info(path):
+    '''Return (width, height, fps) of the first video stream using ffprobe, or None.'''
+    if path in _movie_info_cache:
+        return _movie_info_cache[path]
+    info = None
+    if FFPROBE_PATH:
+        try:
+            out = subprocess.run(
+                [FFPROBE_PATH, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'stream=width,height,avg_frame_rate',
+                 '-of', 'json', path],
+                capture_output=True, check=True, text=True,
+            ).stdout
+            stream = json.loads(out)['streams'][0]
+            num, _, den = stream['avg_frame_rate'].partition('/')
+            fps = float(num) / float(den or 1)
+            info = (int(stream['width']), int(stream['height']), fps)
+        except Exception as e:
+            print(f"Warning: ffprobe failed for {path}: {e}")
+    _movie_info_cache[path] = info
+    return info
+
+
+def read_movie_frame(path, frame):
+    '''Decode frame `frame` (1-based, as used by the world image_user) of a movie with ffmpeg.'''
+    if not FFMPEG_PATH:
+        return None
+    info = movie_info(path)
+    if not info:
+        return None
+    width, height, fps = info
+    # Seek a quarter frame early so float rounding never lands on the next frame
+    t = max(0.0, (frame - 1 - 0.25) / fps)
+    try:
+        raw = subprocess.run(
+            [FFMPEG_PATH, '-v', 'error', '-ss', f'{t:.6f}', '-i', path,
+             '-frames:v', '1', '-f', 'rawvideo', '-pix_fmt', 'rgba', '-'],
+            capture_output=True, check=True,
+        ).stdout
+    except Exception as e:
+        print(f"Warning: ffmpeg could not decode frame {frame} of {path}: {e}")
+        return None
+    if len(raw) < width * height * 4:
+        return None
+    return movie_pixels(raw, width, height)
+
+
+def movie_pixels(raw, width, height):
+    '''Turn one raw top-down RGBA frame from ffmpeg (bytes or a uint8 array) into a SourceFrame.'''
+    pixels = np.frombuffer(raw, dtype=np.uint8, count=width * height * 4).reshape(height, width, 4)
+    # ffmpeg rows are top-down, Blender's are bottom-up
+    pixels = pixels[::-1].astype(np.float32) / 255.0
+    return SourceFrame(pixels, False, 'sRGB')
+
+
+def can_decode(rig_item):
+    '''Return True if the rig's source media can be decoded into NumPy buffers here.'''
+    if not rig_item.source_filepath:
+        return False
+    src_type = getattr(rig_item, 'source_type', '')
+    if src_type == 'Movie Clip':
+        return bool(FFMPEG_PATH and FFPROBE_PATH)
+    return src_type in ('Image Sequence', 'Single Image')
+
+
+def source_frame_number(rig_item, frame):
+    '''Return the movie frame a rig shows at scene frame `frame` (clamped to the clip length).'''
+    if rig_item.media_frame_count > 0:
+        return min(frame, rig_item.media_frame_count)
+    return frame
+
+
+def read_source_frame(rig_item, frame, movie_decoders=None):
+    '''Decode the source frame a rig shows at scene frame `frame`, or None if it cannot be read.
+
+    movie_decoders (a movie_decoder.DecoderPool) decodes movies sequentially and shares
+    frames between rigs; without it every movie frame is a separate ffmpeg seek.
+    '''
+    src_path = bpy.path.abspath(rig_item.source_filepath) if rig_item.source_filepath else ''
+    if not src_path:
+        return None
+    src_type = getattr(rig_item, 'source_type', '')
+    try:
+        if src_type == 'Movie Clip':
+            frame = source_frame_number(rig_item, frame)
+            if movie_decoders is not None:
+                return movie_decoders.read(src_path, frame)
+            return read_movie_frame(src_path, frame)
+        if src_type == 'Image Sequence':
+            return read_image_file(sequence_frame_path(src_path, frame))
+        return read_image_file(src_path)
+    except Exception as e:
+        print(f"Warning: could not read source frame {frame} of {src_path}: {e}")
+        return None
+
+
+class SharedFrameImage:
+    '''One bpy image holding the current decoded source frame for every camera of a rig.
+
+    The image is reused across frames as long as size and bit depth stay the
+    same; call release() once the rig is done.
+    '''
+
+    def __init__(self, name='COLMAP_RIG_source_frame'):
+        self.name = name
+        self.image = None
+
+    def load(self, src):
+        '''Copy a SourceFrame into the shared image and return the image.'''
+        img = self.image
+        if img is None or tuple(img.size) != (src.width, src.height) or img.is_float != src.is_float:
+            self.release()
+            img = bpy.data.images.new(self.name, src.width, src.height, alpha=True, float_buffer=src.is_float)
+            try:
+                img.colorspace_settings.name = src.colorspace
+            except Exception:
+                pass
+            self.image = img
+        img.pixels.foreach_set(src.pixels.ravel())
+        img.update()
+        return img
+
+    def release(self):
+        '''Free the shared image.'''
+        if self.image is not None:
+            try:
+                bpy.data.images.remove(self.image)
+            except Exception:
+                pass
+            self.image = None
@@ -0,0 +1,114 @@
+#job_pool.py
+"""Worker threads for the background jobs of a render run.
+
+EXIF insertion, write-behind encoding and downscaled levels all hand work
+from the render loop to a few threads and collect the outcome on the main
+thread. JobPool holds the shared part: submit() waits while too many jobs
+are pending (by count, or by the bytes each job holds), which keeps the
+render loop from running arbitrarily far ahead, and results come back as
+(key, error, seconds) tuples from pop_finished(). Subclasses implement
+run_job() for their kind of work.
+"""
+import collections
+import threading
+import time
+
+
+class JobPool:
+    '''Threads that run run_job(*args) for queued jobs, bounded by the count or the bytes of pending jobs.'''
+
+    # Prefix of the error reported for a job whose run_job() raised
+    error_prefix = 'job failed'
+    thread_name = 'colmap_rig_job'
+
+    def __init__(self, num_workers=1, max_pending=None, max_bytes=None):
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        # Queued and running jobs count as pending until they finish
+        self._jobs = collections.deque()
+        self._pending = 0
+        self._pending_bytes = 0
+        self._cond = threading.Condition()
+        self._finished = collections.deque()
+        self._closed = False
+        self._threads = [
+            threading.Thread(target=self._run, name=f'{self.thread_name}_{i}', daemon=True)
+            for i in range(max(1, num_workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def run_job(self, *args):
+        raise NotImplementedError
+
+    def _full(self, nbytes):
+        # A single job always fits, however large
+        if not self._pending:
+            return False
+        if self.max_pending is not None and self._pending >= self.max_pending:
+            return True
+        return self.max_bytes is not None and self._pending_bytes + nbytes > self.max_bytes
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if not self._jobs:
+                    return
+                args, key, nbytes = self._jobs.popleft()
+            error = None
+            start = time.perf_counter()
+            try:
+                self.run_job(*args)
+            except Exception as e:
+                error = f'{self.error_prefix}: {e}'
+            self._finished.append((key, error, time.perf_counter() - start))
+            with self._cond:
+                self._pending -= 1
+                self._pending_bytes -= nbytes
+                self._cond.notify_all()
+
+    def submit(self, *args, key=None, nbytes=0):
+        '''Queue run_job(*args); waits while the pool is full. key is handed back by pop_finished().'''
+        with self._cond:
+            while self._full(nbytes):
+                self._cond.wait()
+            self._pending += 1
+            self._pending_bytes += nbytes
+            self._jobs.append((args, key, nbytes))
+            self._cond.notify_all()
+
+    def pop_finished(self):
+        '''Return and forget the (key, error, seconds) results collected so far.'''
+        results = []
+        while self._finished:
+            results.append(self._finished.popleft())
+        return results
+
+    def close(self, cancel=False):
+        '''Stop the workers after all queued jobs are done.
+
+        With cancel=True jobs that have not started yet are dropped and
+        reported with a 'cancelled' error instead.
+        '''
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            if cancel:
+                while self._jobs:
+                    _, key, nbytes = self._jobs.popleft()
+                    self._pending -= 1
+                    self._pending_bytes -= nbytes
+                    self._finished.append((key, 'cancelled', 0.0))
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(cancel=exc_type is not None)
+        return False
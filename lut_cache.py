@@ -0,0 +1,114 @@
+#lut_cache.py
+"""Persistent cache of reprojection sampling grids.
+
+For an equirect rig the mapping from output pixel to source coordinate only
+depends on the camera (intrinsics + orientation), the output resolution and the
+source resolution; the frame content never enters it. Grids are therefore
+computed once, stored as .npy files and memory-mapped on every later use, so
+static cameras skip all trigonometry on repeated frames and re-runs.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+try:
+    from . import cache_utils, reprojection
+except ImportError:
+    import cache_utils
+    import reprojection
+
+# Bump when the grid layout or the sampling math changes to invalidate old entries
+LUT_VERSION = 1
+
+
+def grid_cache_key(lens, sensor_width, width, height, matrix, src_width, src_height,
+                   sensor_height=None, sensor_fit='AUTO', shift_x=0.0, shift_y=0.0):
+    '''Return a stable hex key for a camera's sampling grid.
+
+    matrix is the camera's evaluated world matrix (3x3 or 4x4, nested rows);
+    only its rotation influences the grid but translation does no harm.
+    '''
+    values = [
+        LUT_VERSION, reprojection.WORLD_ROTATION_Z,
+        lens, sensor_width, sensor_height or 0.0, sensor_fit, shift_x, shift_y,
+        width, height, src_width, src_height,
+    ]
+    values += [v for row in matrix for v in row]
+    # Round so float noise from matrix evaluation does not produce new entries
+    text = '|'.join(f'{v:.9g}' if isinstance(v, float) else str(v) for v in values)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class LutCache:
+    '''Sampling grid store backed by memory-mapped .npy files with an LRU size cap.
+
+    max_bytes <= 0 keeps grids in memory only (nothing is written to disk).
+    '''
+
+    def __init__(self, directory=None, max_bytes=0):
+        self.max_bytes = max_bytes
+        self.directory = directory or (cache_utils.cache_dir('lut_cache') if max_bytes > 0 else None)
+        self._grids = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.npy')
+
+    def get(self, key):
+        '''Return the cached grid for key or None.'''
+        grid = self._grids.get(key)
+        if grid is not None:
+            return grid
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            grid = np.load(path, mmap_mode='r')
+        except Exception as e:
+            print(f"Warning: dropping unreadable LUT cache entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        cache_utils.touch(path)
+        self._grids[key] = grid
+        return grid
+
+    def put(self, key, grid):
+        '''Store grid under key and return the array that should be used from now on.'''
+        if self.directory:
+            path = self._path(key)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, grid)
+                os.replace(tmp_path, path)
+                cache_utils.evict_lru(self.directory, self.max_bytes, suffix='.npy')
+                if os.path.exists(path):
+                    grid = np.load(path, mmap_mode='r')
+            except Exception as e:
+                print(f"Warning: could not write LUT cache entry {path}: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        self._grids[key] = grid
+        return grid
+
+    def get_or_build(self, key, build):
+        '''Return the grid for key, calling build() to compute it on a miss.'''
+        grid = self.get(key)
+        if grid is not None:
+            self.hits += 1
+            return grid
+        self.misses += 1
+        return self.put(key, build())
+
+    def release(self):
+        '''Drop in-memory references so memory maps can be closed.'''
+        self._grids.clear()
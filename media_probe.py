@@ -0,0 +1,349 @@
+#media_probe.py
+"""Header-only media probing with a persistent cache.
+
+probe() returns resolution, frame count and fps of a movie or image by
+reading only its headers: MP4/MOV atoms (moov/trak/mdhd/stsd/stsz), PNG IHDR,
+JPEG SOF, TIFF IFD and the OpenEXR header. Other containers go through
+ffprobe if it is on PATH. Results are cached in probe_cache.json in the add-on
+cache directory, keyed by absolute path and invalidated when size or mtime change. Failed
+probes are not cached, so they are retried on the next call.
+"""
+import json
+import os
+import struct
+import subprocess
+import threading
+
+try:
+    from . import cache_utils, frame_source
+except ImportError:
+    import cache_utils
+    import frame_source
+
+PROBE_CACHE_NAME = 'probe_cache.json'
+PROBE_CACHE_VERSION = 1
+
+_MP4_EXTS = {'.mp4', '.mov', '.m4v', '.3gp'}
+# Atoms that only contain other atoms on the way to a video track's sample table
+_MP4_CONTAINERS = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _result(kind, width, height, frames=1, fps=0.0):
+    return {'kind': kind, 'width': int(width), 'height': int(height), 'frames': int(frames), 'fps': float(fps)}
+
+
+# Image headers ############################################################
+
+def _probe_png(f):
+    head = f.read(24)
+    if head[:8] != b'\x89PNG\r\n\x1a\n' or head[12:16] != b'IHDR':
+        return None
+    width, height = struct.unpack('>II', head[16:24])
+    return _result('image', width, height)
+
+
+def _probe_jpeg(f):
+    if f.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return None
+        if byte != b'\xff':
+            continue
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0xD8 or code == 0x01 or 0xD0 <= code <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack('>H', length_bytes)[0]
+        if code in _JPEG_SOF:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack('>HH', data[1:5])
+            return _result('image', width, height)
+        if code == 0xDA:
+            # Start of scan without a frame header: not a valid JPEG
+            return None
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def _probe_tiff(f):
+    head = f.read(8)
+    if head[:4] == b'II*\x00':
+        endian = '<'
+    elif head[:4] == b'MM\x00*':
+        endian = '>'
+    else:
+        return None
+    f.seek(struct.unpack(endian + 'I', head[4:8])[0])
+    count = struct.unpack(endian + 'H', f.read(2))[0]
+    size = {}
+    for _ in range(count):
+        entry = f.read(12)
+        if len(entry) < 12:
+            break
+        tag, typ = struct.unpack(endian + 'HH', entry[:4])
+        if tag in (256, 257):
+            value = struct.unpack(endian + ('H' if typ == 3 else 'I'), entry[8:10] if typ == 3 else entry[8:12])[0]
+            size[tag] = value
+    if 256 not in size or 257 not in size:
+        return None
+    return _result('image', size[256], size[257])
+
+
+def _read_cstring(f, limit=256):
+    out = bytearray()
+    while len(out) < limit:
+        c = f.read(1)
+        if not c or c == b'\x00':
+            break
+        out += c
+    return bytes(out)
+
+
+def _probe_exr(f):
+    if f.read(4) != b'\x76\x2f\x31\x01':
+        return None
+    f.read(4)  # version and flags
+    while True:
+        name = _read_cstring(f)
+        if not name:
+            return None
+        _read_cstring(f)  # attribute type
+        size_bytes = f.read(4)
+        if len(size_bytes) < 4:
+            return None
+        size = struct.unpack('<i', size_bytes)[0]
+        if name == b'dataWindow' and size == 16:
+            x_min, y_min, x_max, y_max = struct.unpack('<iiii', f.read(16))
+            return _result('image', x_max - x_min + 1, y_max - y_min + 1)
+        f.seek(size, os.SEEK_CUR)
+
+
+_IMAGE_PROBES = {
+    '.png': _probe_png,
+    '.jpg': _probe_jpeg,
+    '.jpeg': _probe_jpeg,
+    '.tif': _probe_tiff,
+    '.tiff': _probe_tiff,
+    '.exr': _probe_exr,
+}
+
+
+# MP4 / QuickTime ##########################################################
+
+def _atoms(f, start, end):
+    '''Yield (type, payload start, atom end) for the atoms between start and end.'''
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack('>I4s', header)
+        header_len = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header_len = 16
+        elif size == 0:
+            size = end - pos
+        if size < header_len:
+            return
+        yield kind, pos + header_len, pos + size
+        pos += size
+
+
+def _child(f, start, end, kind):
+    return next(((s, e) for k, s, e in _atoms(f, start, end) if k == kind), None)
+
+
+def _probe_mp4(f, file_size):
+    moov = _child(f, 0, file_size, b'moov')
+    if moov is None:
+        return None
+    for kind, trak_start, trak_end in _atoms(f, *moov):
+        if kind != b'trak':
+            continue
+        mdia = _child(f, trak_start, trak_end, b'mdia')
+        if mdia is None:
+            continue
+        hdlr = _child(f, *mdia, b'hdlr')
+        if hdlr is None:
+            continue
+        f.seek(hdlr[0] + 8)
+        if f.read(4) != b'vide':
+            continue
+
+        timescale = duration = 0
+        mdhd = _child(f, *mdia, b'mdhd')
+        if mdhd is not None:
+            f.seek(mdhd[0])
+            version = f.read(4)[0]
+            if version == 1:
+                f.seek(16, os.SEEK_CUR)
+                timescale, duration = struct.unpack('>IQ', f.read(12))
+            else:
+                f.seek(8, os.SEEK_CUR)
+                timescale, duration = struct.unpack('>II', f.read(8))
+
+        minf = _child(f, *mdia, b'minf')
+        stbl = _child(f, *minf, b'stbl') if minf else None
+        if stbl is None:
+            continue
+        width = height = 0
+        stsd = _child(f, *stbl, b'stsd')
+        if stsd is not None:
+            # Visual sample entry: 8 byte header, 24 bytes of fields, then width and height
+            f.seek(stsd[0] + 8 + 32)
+            width, height = struct.unpack('>HH', f.read(4))
+        frames = 0
+        stsz = _child(f, *stbl, b'stsz')
+        if stsz is not None:
+            f.seek(stsz[0] + 8)
+            frames = struct.unpack('>I', f.read(4))[0]
+        else:
+            stts = _child(f, *stbl, b'stts')
+            if stts is not None:
+                f.seek(stts[0] + 4)
+                entries = struct.unpack('>I', f.read(4))[0]
+                for _ in range(entries):
+                    frames += struct.unpack('>II', f.read(8))[0]
+        fps = frames * timescale / duration if duration else 0.0
+        if width and height and frames:
+            return _result('movie', width, height, frames, fps)
+    return None
+
+
+def _probe_ffprobe(path):
+    if not frame_source.FFPROBE_PATH:
+        return None
+    try:
+        out = subprocess.run(
+            [frame_source.FFPROBE_PATH, '-v', 'error', '-select_streams', 'v:0',
+             '-show_entries', 'stream=width,height,avg_frame_rate,nb_frames,duration:format=duration',
+             '-of', 'json', path],
+            capture_output=True, check=True, text=True,
+        ).stdout
+        data = json.loads(out)
+        stream = data['streams'][0]
+        num, _, den = stream.get('avg_frame_rate', '0/1').partition('/')
+        fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+        frames = int(stream.get('nb_frames') or 0)
+        if not frames:
+            duration = float(stream.get('duration') or data.get('format', {}).get('duration') or 0)
+            frames = int(round(duration * fps))
+        return _result('movie', stream['width'], stream['height'], frames, fps)
+    except Exception as e:
+        print(f"Warning: ffprobe failed for {path}: {e}")
+        return None
+
+
+def probe_file(path):
+    '''Probe path without the cache; returns a result dict or None.'''
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, 'rb') as f:
+            if ext in _IMAGE_PROBES:
+                return _IMAGE_PROBES[ext](f)
+            if ext in _MP4_EXTS:
+                result = _probe_mp4(f, os.fstat(f.fileno()).st_size)
+                if result is not None:
+                    return result
+    except (OSError, struct.error, IndexError) as e:
+        print(f"Warning: could not read media header of {path}: {e}")
+        return None
+    if ext in _IMAGE_PROBES:
+        return None
+    return _probe_ffprobe(path)
+
+
+# Cache ####################################################################
+
+class ProbeCache:
+    '''Probe results stored as JSON, keyed by path and validated by size and mtime.'''
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_utils.cache_dir('probe'), PROBE_CACHE_NAME)
+        self._lock = threading.Lock()
+        self._entries = None
+
+    def _load(self):
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == PROBE_CACHE_VERSION:
+                    self._entries = data.get('entries', {})
+            except (OSError, ValueError):
+                pass
+        return self._entries
+
+    def get(self, path, st):
+        with self._lock:
+            entry = self._load().get(path)
+        if entry and entry.get('size') == st.st_size and entry.get('mtime') == st.st_mtime_ns:
+            return entry
+        return None
+
+    def clear(self):
+        '''Forget every entry, in memory and on disk.'''
+        with self._lock:
+            self._entries = {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def put(self, path, st, result):
+        with self._lock:
+            self._load()[path] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'result': result}
+            data = {'version': PROBE_CACHE_VERSION, 'entries': self._entries}
+            tmp_path = f'{self.path}.tmp'
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Warning: could not save probe cache: {e}")
+
+
+_probe_cache = None
+
+
+def probe(path, use_cache=True):
+    '''Return {'kind', 'width', 'height', 'frames', 'fps'} for a media file, or None if unknown.'''
+    global _probe_cache
+    path = os.path.abspath(path)
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    if use_cache:
+        if _probe_cache is None:
+            _probe_cache = ProbeCache()
+        entry = _probe_cache.get(path, st)
+        # Failed probes are never reused: the file may be incomplete or ffprobe missing for now
+        if entry is not None and entry['result'] is not None:
+            return entry['result']
+    result = probe_file(path)
+    if use_cache and result is not None:
+        _probe_cache.put(path, st, result)
+    return result
+
+
+def clear_cache():
+    '''Forget all cached probe results, so the next probe() of every file reads its header again.'''
+    global _probe_cache
+    if _probe_cache is None:
+        _probe_cache = ProbeCache()
+    _probe_cache.clear()
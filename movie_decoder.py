@@ -0,0 +1,333 @@
+#movie_decoder.py
+"""GOP-aware sequential decoding of movie sources.
+
+Decoding frame N of a long-GOP movie (H.264/HEVC) starts at the keyframe
+before N, so seeking to every frame of a frame_step render decodes most GOPs
+several times, once more for every rig on the same footage. MovieDecoder reads
+the keyframe layout once (packet flags via ffprobe, nothing is decoded),
+plans the frames all rigs need into segments that each start at a keyframe,
+and streams every segment through a single ffmpeg process that converts only
+the requested frames. Decoded frames stay in memory until every rig that asked
+for them has read them. Once the cache budget is full, newly decoded frames are
+not kept. Frames already held are never evicted, so a later rig reads the frames
+held in memory and decodes the rest again. With the persistent frame_cache
+enabled, every decoded frame is also written there, and later rigs and runs
+read those frames from disk instead.
+"""
+import bisect
+import os
+import subprocess
+
+try:
+    from . import frame_cache, frame_source
+except ImportError:
+    import frame_cache
+    import frame_source
+
+# Memory for decoded frames waiting for other rigs (8-bit RGBA, so an 8K x 4K frame is 128 MB)
+DEFAULT_CACHE_BYTES = 1024 * 1024 * 1024
+
+_packet_cache = {}
+
+
+def _packet_index(path):
+    '''Return (frame times in seconds, keyframe numbers) of a movie's first video stream, or (None, None).
+
+    Both follow presentation order: frame N (1-based) is shown at times[N - 1].
+    '''
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    cache_key = (path, st.st_size, st.st_mtime_ns)
+    if cache_key in _packet_cache:
+        return _packet_cache[cache_key]
+    result = (None, None)
+    if frame_source.FFPROBE_PATH:
+        try:
+            out = subprocess.run(
+                [frame_source.FFPROBE_PATH, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', path],
+                capture_output=True, check=True, text=True,
+            ).stdout
+            packets = []
+            for line in out.splitlines():
+                pts_time, _, flags = line.partition(',')
+                if pts_time and pts_time != 'N/A':
+                    packets.append((float(pts_time), 'K' in flags))
+            # Packets come in decode order; frame numbers follow presentation order
+            packets.sort()
+            keys = [i + 1 for i, (_, is_key) in enumerate(packets) if is_key]
+            if keys:
+                result = ([t for t, _ in packets], keys)
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            print(f"Warning: could not read keyframes of {path}: {e}")
+    _packet_cache[cache_key] = result
+    return result
+
+
+def keyframes(path):
+    '''Return the sorted 1-based numbers of the keyframes of a movie's first video stream, or None.'''
+    return _packet_index(path)[1]
+
+
+def frame_times(path):
+    '''Return the presentation time in seconds of every frame of a movie's first video stream, or None.'''
+    return _packet_index(path)[0]
+
+
+def keyframe_before(keys, frame):
+    '''Return the last keyframe at or before `frame` (1 if unknown).'''
+    i = bisect.bisect_right(keys, frame) - 1
+    return keys[i] if i >= 0 else 1
+
+
+def plan_segments(frames, keys):
+    '''Split frames into [(keyframe, [frames])] segments that are each decoded front to back.
+
+    A new segment (a seek) starts only where the frame's keyframe lies past the
+    previous wanted frame; otherwise decoding on is never more work than seeking.
+    '''
+    segments = []
+    for frame in sorted(set(frames)):
+        key = keyframe_before(keys, frame)
+        if segments and key <= segments[-1][1][-1]:
+            segments[-1][1].append(frame)
+        else:
+            segments.append((key, [frame]))
+    return segments
+
+
+def _runs(values, tolerance=0):
+    '''Split sorted values into evenly spaced runs [(first, last, step)]; step is 0 for a lone value.'''
+    runs = []
+    for v in values:
+        if runs:
+            first, last, step, count = runs[-1]
+            if count == 1:
+                runs[-1] = [first, v, v - first, 2]
+                continue
+            # Compared with the run's start, so small timestamp jitter can't add up
+            if abs(v - (first + count * step)) <= tolerance:
+                runs[-1] = [first, v, step, count + 1]
+                continue
+        runs.append([v, v, 0, 1])
+    return [(first, last, step) for first, last, step, _ in runs]
+
+
+def _select_times(times, half_frame):
+    '''ffmpeg select expression passing the frames shown at the given times (seconds).
+
+    Evenly spaced times become one range term each, so the expression stays
+    short however many frames a segment has (Windows caps a command line at
+    32K characters). Variable frame rate footage gets a term per irregular frame.
+    '''
+    terms = []
+    for first, last, step in _runs(times, half_frame / 2):
+        if step == 0:
+            terms.append(f'lt(abs(t-{first:.6f})\\,{half_frame:.6f})')
+            continue
+        term = f'between(t\\,{first - half_frame:.6f}\\,{last + half_frame:.6f})'
+        if step > 3 * half_frame:
+            # Only times within half a frame of first + i * step
+            term += f'*lt(mod(t-{first - half_frame:.6f}\\,{step:.6f})\\,{2 * half_frame:.6f})'
+        terms.append(term)
+    return 'select=' + '+'.join(terms)
+
+
+def select_filter(offsets):
+    '''ffmpeg select expression passing the given 0-based output frame offsets (one term per evenly spaced run).'''
+    terms = []
+    for first, last, step in _runs(offsets):
+        if step == 0:
+            terms.append(f'eq(n\\,{first})')
+        else:
+            terms.append(f'between(n\\,{first}\\,{last})*not(mod(n-{first}\\,{step}))')
+    return 'select=' + '+'.join(terms)
+
+
+class MovieDecoder:
+    '''Sequential decoder for one movie file.
+
+    want() registers the frames a rig will read; read() returns them, decoding
+    each planned segment in one ffmpeg pass.
+    '''
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_BYTES, disk_cache=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.info = frame_source.movie_info(path)
+        # Persistent frame_cache.FrameCache shared across runs, if any
+        self.disk_cache = disk_cache
+        self.source_key = frame_cache.source_key(path) if disk_cache is not None else None
+        self.keys = None
+        self.times = None
+        # Cleared by DecoderPool when the run's frames don't fit the disk cache budget
+        self.cache_writes = True
+        # {frame: number of pending reads}
+        self._wanted = {}
+        # {frame: raw top-down RGBA bytes} of frames with pending reads
+        self._cache = {}
+        self._cache_bytes = 0
+        self._proc = None
+        self._queue = []
+
+    def want(self, frames):
+        for frame in frames:
+            self._wanted[frame] = self._wanted.get(frame, 0) + 1
+
+    def read(self, frame):
+        '''Return frame `frame` (1-based) as a SourceFrame, or None if it cannot be decoded.'''
+        if not self.info:
+            return None
+        width, height, _ = self.info
+        raw = self._cache.get(frame)
+        if raw is None and self.disk_cache is not None:
+            raw = self.disk_cache.get(self.source_key, frame, width, height)
+        if raw is None:
+            raw = self._decode(frame)
+        self._consume(frame)
+        if raw is None:
+            return None
+        return frame_source.movie_pixels(raw, width, height)
+
+    def _consume(self, frame):
+        '''Count one read of frame; once nobody else wants it, drop it from the cache.'''
+        count = self._wanted.get(frame, 0) - 1
+        if count > 0:
+            self._wanted[frame] = count
+            return
+        self._wanted.pop(frame, None)
+        raw = self._cache.pop(frame, None)
+        if raw is not None:
+            self._cache_bytes -= len(raw)
+
+    def _store(self, frame, raw):
+        '''Keep a frame for its pending reads if it fits the budget; otherwise it is decoded again when read.
+
+        Held frames are only dropped by _consume(): evicting them for newer
+        frames would make a rig that reads the movie after another one miss
+        every frame, while keeping the oldest serves its first max_bytes.
+        '''
+        if frame in self._cache or self._cache_bytes + len(raw) > self.max_bytes:
+            return
+        self._cache[frame] = raw
+        self._cache_bytes += len(raw)
+
+    def _decode(self, frame):
+        if frame not in self._queue:
+            self._start(frame)
+        width, height, _ = self.info
+        size = width * height * 4
+        while self._queue:
+            next_frame = self._queue.pop(0)
+            raw = self._proc.stdout.read(size)
+            if len(raw) < size:
+                self._stop()
+                print(f"Warning: ffmpeg could not decode frame {next_frame} of {self.path}")
+                return None
+            if self.disk_cache is not None and self.cache_writes:
+                self.disk_cache.put(self.source_key, next_frame, raw, width, height)
+            if next_frame == frame:
+                if self._wanted.get(frame, 0) > 1:
+                    self._store(frame, raw)
+                return raw
+            self._store(next_frame, raw)
+        return None
+
+    def _start(self, frame):
+        '''Start decoding the segment that contains `frame`.'''
+        self._stop()
+        if self.keys is None:
+            self.times = frame_times(self.path)
+            self.keys = keyframes(self.path) or [1]
+        # Frames already in memory or on disk need no decoding
+        frames = [
+            f for f in self._wanted
+            if f not in self._cache and not (self.disk_cache is not None and self.disk_cache.has(self.source_key, f))
+        ]
+        frames.append(frame)
+        key, segment = next((k, s) for k, s in plan_segments(frames, self.keys) if frame in s)
+        _, _, fps = self.info
+        half_frame = 0.5 / fps
+        if self.times and segment[-1] <= len(self.times):
+            # Seek half a frame past the keyframe's pts: the demuxer lands on that keyframe (at or
+            # before the target) and decoding starts there. Timestamps are kept (-copyts), so frames
+            # are picked by their pts rather than by counting from wherever decoding started.
+            t = self.times[key - 1] + half_frame
+            cmd = [
+                frame_source.FFMPEG_PATH, '-v', 'error', '-seek_timestamp', '1', '-noaccurate_seek',
+                '-ss', f'{t:.6f}', '-i', self.path, '-copyts',
+                '-vf', _select_times([self.times[f - 1] for f in segment], half_frame), '-vsync', '0',
+                '-f', 'rawvideo', '-pix_fmt', 'rgba', '-',
+            ]
+        else:
+            # No packet timestamps: seek a quarter frame early and count frames from there
+            t = max(0.0, (key - 1 - 0.25) / fps)
+            cmd = [
+                frame_source.FFMPEG_PATH, '-v', 'error', '-ss', f'{t:.6f}', '-i', self.path,
+                '-vf', select_filter([f - key for f in segment]), '-vsync', '0',
+                '-f', 'rawvideo', '-pix_fmt', 'rgba', '-',
+            ]
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._queue = list(segment)
+
+    def _stop(self):
+        if self._proc is not None:
+            self._proc.kill()
+            self._proc.wait()
+            self._proc = None
+        self._queue = []
+
+    def close(self):
+        self._stop()
+        self._cache.clear()
+        self._cache_bytes = 0
+
+
+class DecoderPool:
+    '''The MovieDecoders of one render run, one per source file, shared by all rigs.'''
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, disk_cache=None):
+        self.max_bytes = max_bytes
+        self.disk_cache = disk_cache
+        self._decoders = {}
+        self._budget_checked = False
+
+    def get(self, path):
+        decoder = self._decoders.get(path)
+        if decoder is None:
+            decoder = MovieDecoder(path, self.max_bytes, self.disk_cache)
+            self._decoders[path] = decoder
+        return decoder
+
+    def want(self, path, frames):
+        self.get(path).want(frames)
+
+    def read(self, path, frame):
+        if not self._budget_checked:
+            self._check_budget()
+        return self.get(path).read(frame)
+
+    def _check_budget(self):
+        '''Stop writing to the disk cache if the run's frames can't all fit.
+
+        LRU eviction would then drop every frame before a later run reuses it,
+        so writing them only costs disk bandwidth.
+        '''
+        self._budget_checked = True
+        if self.disk_cache is None:
+            return
+        planned = sum(
+            len(decoder._wanted) * decoder.info[0] * decoder.info[1] * 4
+            for decoder in self._decoders.values() if decoder.info
+        )
+        if planned > self.disk_cache.max_bytes:
+            print(f"Frame cache: {planned // (1024 * 1024)} MB of frames exceed the {self.disk_cache.max_bytes // (1024 * 1024)} MB budget, not caching this run")
+            for decoder in self._decoders.values():
+                decoder.cache_writes = False
+
+    def close(self):
+        for decoder in self._decoders.values():
+            decoder.close()
+        self._decoders.clear()
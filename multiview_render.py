@@ -0,0 +1,111 @@
+#multiview_render.py
+"""Render all cameras of a rig in one render call through Blender's multi-view.
+
+Every included camera becomes a custom render view: a temporary camera object
+named COLMAP_MV_vNNN (sharing the camera data and following the camera's world
+matrix) is picked by its view suffix. One render.render(write_still=True) then
+writes one file per view, which the renderer moves into the per-camera folders.
+Scene sync, world upload and buffer setup are paid once per frame instead of
+once per camera.
+"""
+import os
+
+import bpy
+
+BASE_NAME = 'COLMAP_MV'
+VIEW_PREFIX = 'COLMAP_MV_'
+
+
+def view_filepath(filepath, suffix):
+    '''Return the file Blender writes for the view with `suffix` when rendering to filepath.'''
+    stem, ext = os.path.splitext(filepath)
+    return f'{stem}{suffix}{ext}'
+
+
+class MultiViewRender:
+    '''Temporary multi-view setup for one rig; call restore() when the rig is done.'''
+
+    def __init__(self, scene, cams):
+        self.scene = scene
+        self.cams = list(cams)
+        self._views = {}      # camera name -> (view name, suffix, temp object)
+        self._saved = None
+
+    def setup(self):
+        '''Create one view and temp camera per rig camera; return False (and undo) if that fails.'''
+        scene = self.scene
+        render = scene.render
+        self._saved = {
+            'use_multiview': render.use_multiview,
+            'views_format': render.views_format,
+            'image_views_format': render.image_settings.views_format,
+            'view_use': {view.name: view.use for view in render.views},
+            'camera': scene.camera,
+        }
+        try:
+            render.use_multiview = True
+            render.views_format = 'MULTIVIEW'
+            render.image_settings.views_format = 'INDIVIDUAL'
+            for view in render.views:
+                view.use = False
+            for i, cam in enumerate(self.cams):
+                suffix = f'_v{i:03d}'
+                obj = bpy.data.objects.new(f'{BASE_NAME}{suffix}', cam.data)
+                self._views[cam.name] = (None, suffix, obj)
+                scene.collection.objects.link(obj)
+                view = render.views.new(f'{VIEW_PREFIX}{i:03d}')
+                view.camera_suffix = suffix
+                self._views[cam.name] = (view.name, suffix, obj)
+                # Blender resolves the view camera by name, so a renamed object (".001") can't work
+                if obj.name != f'{BASE_NAME}{suffix}':
+                    raise RuntimeError(f'object name {BASE_NAME}{suffix} is already taken')
+        except Exception as e:
+            print(f"Warning: multi-view setup failed ({e}), rendering cameras one by one")
+            self.restore()
+            return False
+        return True
+
+    def render(self, frame_cams, filepath):
+        '''Render the given cameras at the current frame; return {camera name: written file}.'''
+        scene = self.scene
+        render = scene.render
+        used = {cam.name for cam in frame_cams}
+        first = None
+        for cam in self.cams:
+            view_name, suffix, obj = self._views[cam.name]
+            use = cam.name in used
+            render.views[view_name].use = use
+            if use:
+                obj.matrix_world = cam.matrix_world
+                if first is None:
+                    first = obj
+        scene.camera = first
+        render.filepath = filepath
+        bpy.ops.render.render(write_still=True)
+        return {
+            name: view_filepath(filepath, suffix)
+            for name, (_, suffix, _) in self._views.items()
+            if name in used
+        }
+
+    def restore(self):
+        '''Remove the temp cameras and views and restore the scene's multi-view settings.'''
+        if self._saved is None:
+            return
+        scene = self.scene
+        render = scene.render
+        for view_name, _, obj in self._views.values():
+            view = render.views.get(view_name) if view_name else None
+            if view is not None:
+                render.views.remove(view)
+            bpy.data.objects.remove(obj, do_unlink=True)
+        self._views.clear()
+        saved = self._saved
+        for view in render.views:
+            if view.name in saved['view_use']:
+                view.use = saved['view_use'][view.name]
+        render.image_settings.views_format = saved['image_views_format']
+        render.views_format = saved['views_format']
+        render.use_multiview = saved['use_multiview']
+        scene.camera = saved['camera']
+        self._saved = None
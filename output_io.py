@@ -0,0 +1,107 @@
+#output_io.py
+"""Output file naming, completeness checks and atomic writes for rendered frames."""
+import os
+
+# Temp files are hidden and carry this marker so leftovers of a crash can be found
+PARTIAL_MARKER = '.partial'
+
+_EXTENSIONS = {
+    'JPEG': 'jpg',
+    'PNG': 'png',
+    'OPEN_EXR': 'exr',
+    'TIFF': 'tif',
+}
+
+
+def file_extension(file_format):
+    '''Return the file extension used for a Blender image file format.'''
+    return _EXTENSIONS.get(file_format, 'png')
+
+
+def output_size(scene, resolution):
+    '''Return the pixel size Blender writes for a resolution at the scene's resolution percentage.'''
+    pct = scene.render.resolution_percentage
+    return max(1, resolution[0] * pct // 100), max(1, resolution[1] * pct // 100)
+
+
+def frame_filename(rig_name, frame, ext):
+    '''Return the file name of one rendered frame (4-digit zero padding with rig name prefix).'''
+    return f'{rig_name}_image{str(frame).zfill(4)}.{ext}'
+
+
+def frame_output_path(out_base, rig_name, cam_name, frame, ext):
+    '''Return {out}/{rig}/{cam}/{rig}_imageNNNN.ext.'''
+    return os.path.join(out_base, rig_name, cam_name, frame_filename(rig_name, frame, ext))
+
+
+def partial_path(path):
+    '''Return the temporary path a frame is written to before it is renamed into place.
+
+    The real extension is kept last so Blender does not append another one.
+    '''
+    folder, name = os.path.split(path)
+    stem, ext = os.path.splitext(name)
+    return os.path.join(folder, f'.{stem}{PARTIAL_MARKER}{ext}')
+
+
+def commit(tmp_path, path):
+    '''Atomically move a finished temporary file to its final path.'''
+    os.replace(tmp_path, path)
+
+
+def discard(tmp_path):
+    '''Remove a temporary file, ignoring errors.'''
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+
+def remove_partial_files(folder):
+    '''Delete temporary files left behind by an interrupted render in folder.'''
+    try:
+        names = os.listdir(folder)
+    except OSError:
+        return 0
+    removed = 0
+    for name in names:
+        if name.startswith('.') and PARTIAL_MARKER in name:
+            discard(os.path.join(folder, name))
+            removed += 1
+    return removed
+
+
+def _read_tail(f, size, count):
+    f.seek(max(0, size - count))
+    return f.read(count)
+
+
+def is_complete_image(path):
+    '''Return True if path exists, is not empty and is not truncated.
+
+    JPEG and PNG are checked for their end markers, TIFF and EXR for their
+    magic numbers; other formats only need to be non-empty.
+    '''
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return False
+    if size == 0:
+        return False
+
+    ext = os.path.splitext(path)[1].lower()
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(8)
+            if ext in ('.jpg', '.jpeg'):
+                # EOI marker; some encoders pad a few bytes after it
+                return head[:2] == b'\xff\xd8' and b'\xff\xd9' in _read_tail(f, size, 32)
+            if ext == '.png':
+                return head == b'\x89PNG\r\n\x1a\n' and _read_tail(f, size, 12)[4:8] == b'IEND'
+            if ext in ('.tif', '.tiff'):
+                return head[:4] in (b'II*\x00', b'MM\x00*')
+            if ext == '.exr':
+                return head[:4] == b'\x76\x2f\x31\x01' and size > 8
+    except OSError:
+        return False
+    return True
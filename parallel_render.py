@@ -0,0 +1,257 @@
+#parallel_render.py
+"""Split colmap_rig.render into shards rendered by headless Blender worker processes.
+
+The parent saves a copy of the current .blend, writes one work file per shard
+(a list of [rig, camera, frame] items) and starts
+`blender -b <copy> --python-expr ... -- --work-file ...` per shard. Workers run
+the regular render operator restricted to their work file and write a JSON
+result; the parent aggregates progress from their console output.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import bpy
+
+# Matches the progress line printed by COLMAP_RIG_OT_render for every camera/frame
+PROGRESS_RE = re.compile(r'^Rendering (\d+)/(\d+)')
+
+
+def build_work_list(scene):
+    '''Return the [rig, camera, frame] items the render operator would produce, in render order.'''
+    work = []
+    for rig_item in scene.rig_collection:
+        if not rig_item.do_render or not rig_item.collection:
+            continue
+        cams = [obj for obj in rig_item.collection.objects if obj.type == 'CAMERA' and not obj.hide_render]
+        for frame in range(rig_item.start_frame, rig_item.end_frame + 1, rig_item.frame_step):
+            for cam in cams:
+                work.append([rig_item.name, cam.name, frame])
+    return work
+
+
+def shard_work(work, num_shards):
+    '''Split work into at most num_shards contiguous shards of similar size.
+
+    All cameras of one rig frame stay in the same shard so each worker decodes a
+    source frame once, and frames stay in order so movie decoding stays sequential.
+    '''
+    groups = []
+    for item in work:
+        if groups and groups[-1][0][:1] == item[:1] and groups[-1][0][2] == item[2]:
+            groups[-1].append(item)
+        else:
+            groups.append([item])
+
+    num_shards = max(1, min(num_shards, len(groups)))
+    # Even cuts: shard sizes differ by at most one rig frame, so no worker trails the others
+    bounds = [round(i * len(groups) / num_shards) for i in range(num_shards + 1)]
+    return [
+        [item for group in groups[bounds[i]:bounds[i + 1]] for item in group]
+        for i in range(num_shards)
+    ]
+
+
+def load_work_file(path):
+    '''Read a shard work file and return its items as a set of (rig, camera, frame) tuples.'''
+    with open(path, 'r') as f:
+        data = json.load(f)
+    return {(rig, cam, int(frame)) for rig, cam, frame in data['items']}
+
+
+def _save_worker_blend(tmp_dir):
+    '''Save a copy of the current file that workers can open.
+
+    The copy goes next to the original so relative (//) paths keep resolving.
+    '''
+    if bpy.data.filepath:
+        base = os.path.splitext(os.path.basename(bpy.data.filepath))[0]
+        path = os.path.join(os.path.dirname(bpy.data.filepath), f'.{base}.colmap_rig_worker.blend')
+    else:
+        path = os.path.join(tmp_dir, 'colmap_rig_worker.blend')
+    bpy.ops.wm.save_as_mainfile(filepath=path, copy=True, check_existing=False)
+    return path
+
+
+def _worker_expr():
+    '''Python expression that imports this module inside the worker and runs worker_main().'''
+    if __package__:
+        return f"import importlib; importlib.import_module('{__package__}.parallel_render').worker_main()"
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    return f"import sys; sys.path.insert(0, {module_dir!r}); import parallel_render; parallel_render.worker_main()"
+
+
+class _Worker:
+    '''One worker process plus a thread that tees its output into a log and tracks progress.'''
+
+    def __init__(self, index, shard, cmd, env, log_path, result_path):
+        self.index = index
+        self.shard = shard
+        self.log_path = log_path
+        self.result_path = result_path
+        self.done = 0
+        self.proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, errors='replace', env=env,
+        )
+        self._thread = threading.Thread(target=self._read_output, daemon=True)
+        self._thread.start()
+
+    def _read_output(self):
+        with open(self.log_path, 'w') as log:
+            for line in self.proc.stdout:
+                log.write(line)
+                m = PROGRESS_RE.match(line)
+                if m:
+                    self.done = int(m.group(1))
+
+    def join(self):
+        self.proc.wait()
+        self._thread.join()
+
+    def result(self):
+        '''Return the worker's summary, or a failure entry covering its whole shard.'''
+        try:
+            with open(self.result_path, 'r') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            result = {'rendered': 0, 'failed': [], 'error': f'worker {self.index} exited with code {self.proc.returncode}'}
+        if result.get('error') and not result.get('failed'):
+            result['failed'] = [
+                {'rig': rig, 'camera': cam, 'frame': frame, 'error': result['error']}
+                for rig, cam, frame in self.shard
+            ]
+        return result
+
+
+def run_parallel(context, num_workers, threads_per_worker, work=None):
+    '''Render all queued rigs (or the given work items) with num_workers headless Blender processes.
+
+    Blocks until every worker has finished and returns a summary dict with
+    'rendered', 'failed', 'workers' and 'log_dir'.
+    '''
+    scene = context.scene
+    if work is None:
+        work = build_work_list(scene)
+    summary = {'rendered': 0, 'failed': [], 'workers': 0, 'log_dir': ''}
+    if not work:
+        return summary
+
+    shards = shard_work(work, num_workers)
+    tmp_dir = tempfile.mkdtemp(prefix='colmap_rig_parallel_')
+    blend_path = _save_worker_blend(tmp_dir)
+    out_base = bpy.path.abspath(scene.render.filepath)
+
+    env = dict(os.environ)
+    if threads_per_worker > 0:
+        env['OMP_NUM_THREADS'] = str(threads_per_worker)
+
+    workers = []
+    try:
+        for i, shard in enumerate(shards):
+            work_path = os.path.join(tmp_dir, f'shard_{i:03d}.json')
+            result_path = os.path.join(tmp_dir, f'shard_{i:03d}.result.json')
+            with open(work_path, 'w') as f:
+                json.dump({'items': shard}, f)
+            cmd = [
+                bpy.app.binary_path, '-b', blend_path,
+                '--python-expr', _worker_expr(),
+                '--',
+                '--work-file', work_path,
+                '--result-file', result_path,
+                '--output', out_base,
+                '--scene', scene.name,
+                '--threads', str(threads_per_worker),
+            ]
+            workers.append(_Worker(
+                i, shard, cmd, env,
+                os.path.join(tmp_dir, f'shard_{i:03d}.log'),
+                result_path,
+            ))
+        print(f"Started {len(workers)} render workers for {len(work)} frames (logs in {tmp_dir})")
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        last_done = -1
+        while any(w.proc.poll() is None for w in workers):
+            done = sum(w.done for w in workers)
+            if done != last_done:
+                running = sum(1 for w in workers if w.proc.poll() is None)
+                print(f"Parallel render {done}/{len(work)} ({done / len(work) * 100:.1f}%) - {running} workers running")
+                wm.progress_update(done / len(work) * 100)
+                last_done = done
+            time.sleep(0.5)
+        wm.progress_end()
+
+        for w in workers:
+            w.join()
+            result = w.result()
+            summary['rendered'] += result.get('rendered', 0)
+            summary['failed'] += result.get('failed', [])
+    finally:
+        for w in workers:
+            if w.proc.poll() is None:
+                w.proc.kill()
+        try:
+            os.remove(blend_path)
+        except OSError:
+            pass
+
+    summary['workers'] = len(workers)
+    if summary['failed']:
+        summary['log_dir'] = tmp_dir
+    else:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return summary
+
+
+def _addon_module(name):
+    '''Import an add-on module from the package (or from the source folder when run loose).'''
+    import importlib
+    if __package__:
+        return importlib.import_module(f'{__package__}.{name}')
+    return importlib.import_module(name)
+
+
+def worker_main():
+    '''Entry point executed inside a worker Blender process.'''
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='colmap_rig worker')
+    parser.add_argument('--work-file', required=True)
+    parser.add_argument('--result-file', required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--scene', default='')
+    parser.add_argument('--threads', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    scene = bpy.data.scenes.get(args.scene) or bpy.context.scene
+    scene.render.filepath = args.output
+    if args.threads > 0:
+        scene.render.threads_mode = 'FIXED'
+        scene.render.threads = args.threads
+
+    # Normally the enabled add-on is already registered; a loose source folder is not
+    if not hasattr(bpy.types.Scene, 'rig_collection'):
+        _addon_module('rig_manager').register()
+    renderer = _addon_module('renderer')
+    if not hasattr(bpy.types, 'COLMAP_RIG_OT_render'):
+        renderer.register()
+
+    try:
+        with bpy.context.temp_override(scene=scene):
+            bpy.ops.colmap_rig.render(work_file=args.work_file)
+        summary = dict(renderer.last_render_summary)
+    except Exception as e:
+        summary = {'rendered': 0, 'failed': [], 'error': str(e)}
+        print(f"Error: worker render failed: {e}")
+
+    with open(args.result_file, 'w') as f:
+        json.dump(summary, f)
+    sys.exit(1 if summary.get('failed') or summary.get('error') else 0)
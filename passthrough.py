@@ -0,0 +1,180 @@
+#passthrough.py
+"""Render-free output for Perspective rigs whose frames are just their source frames.
+
+When the output has the source's size, file type and an identity view
+transform, image sequence frames are hardlinked, reflinked or copied into
+{out}/{rig}/{cam}/ and movie frames are decoded once with ffmpeg straight into
+the output format, instead of rendering and compositing every frame.
+"""
+import os
+import shutil
+import subprocess
+import tempfile
+
+import bpy
+
+try:
+    from . import frame_source, media_probe, movie_decoder, output_io
+except ImportError:
+    import frame_source
+    import media_probe
+    import movie_decoder
+    import output_io
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/XFS)
+_FICLONE = 0x40049409
+
+_SOURCE_EXTS = {
+    '.jpg': 'jpg',
+    '.jpeg': 'jpg',
+    '.png': 'png',
+    '.tif': 'tif',
+    '.tiff': 'tif',
+    '.exr': 'exr',
+}
+
+
+def _source_size(rig_item, src_path):
+    info = media_probe.probe(src_path)
+    if info:
+        return info['width'], info['height']
+    if getattr(rig_item, 'source_type', '') == 'Movie Clip':
+        return None
+    # Formats the header probe doesn't read: load a throwaway datablock just for its size
+    img = bpy.data.images.load(src_path, check_existing=False)
+    try:
+        return tuple(img.size)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def unsupported_reason(rig_item, scene, ext, width, height):
+    '''Return why the rig's frames can't be passed through unchanged, or '' if they can.'''
+    # Without compositor media a perspective rig renders the scene, not its source frames
+    if not getattr(rig_item, 'use_compositor_media', False):
+        return 'Render Media via Compositor is off'
+    src_path = bpy.path.abspath(rig_item.source_filepath) if rig_item.source_filepath else ''
+    if not src_path or not os.path.exists(src_path):
+        return 'source media not found'
+    view = scene.view_settings
+    if view.view_transform != 'Standard' or view.look != 'None' or view.exposure != 0.0 or view.gamma != 1.0:
+        return 'view transform is not Standard'
+
+    src_type = getattr(rig_item, 'source_type', '')
+    if src_type == 'Movie Clip':
+        if not (frame_source.FFMPEG_PATH and frame_source.FFPROBE_PATH):
+            return 'ffmpeg/ffprobe not found'
+        if ext not in ('jpg', 'png'):
+            return f'cannot encode movie frames as {ext}'
+    elif src_type in ('Image Sequence', 'Single Image'):
+        if _SOURCE_EXTS.get(os.path.splitext(src_path)[1].lower()) != ext:
+            return 'source file type differs from the output format'
+    else:
+        return f'unsupported source type {src_type!r}'
+
+    try:
+        size = _source_size(rig_item, src_path)
+    except Exception as e:
+        return f'could not read source size ({e})'
+    if size is None or tuple(size) != (width, height):
+        return f'source size {size} differs from output {width}x{height}'
+    return ''
+
+
+def link_or_copy(src, dst):
+    '''Hardlink src to dst, falling back to a reflink and then a plain copy; return the method used.'''
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+    except OSError:
+        pass
+    try:
+        import fcntl
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+        return 'reflink'
+    except (ImportError, OSError):
+        output_io.discard(dst)
+    shutil.copyfile(src, dst)
+    return 'copy'
+
+
+def _place(src, path):
+    '''Put src at path through a temp file, so an interrupted run never leaves a partial frame.'''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = output_io.partial_path(path)
+    output_io.discard(tmp_path)
+    try:
+        link_or_copy(src, tmp_path)
+        output_io.commit(tmp_path, path)
+    except Exception:
+        output_io.discard(tmp_path)
+        raise
+
+
+def _ffmpeg_quality(quality):
+    '''Map Blender's JPEG quality (0-100) to ffmpeg's -q:v scale (2 best .. 31 worst).'''
+    return str(round(2 + (100 - quality) * 29 / 100))
+
+
+def _decode_movie_frames(src_path, frames, ext, quality, tmp_dir):
+    '''Decode the 1-based movie frames in one ffmpeg pass; return {frame: decoded file}.'''
+    frames = sorted(set(frames))
+    # ffmpeg counts frames from 0, the rig from 1 (same mapping as frame_source.read_movie_frame);
+    # uneven frame lists (after resume/incremental runs) get an eq() list, not every frame in between
+    select = movie_decoder.select_filter([frame - 1 for frame in frames])
+    cmd = [frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-i', src_path, '-vf', select, '-vsync', '0']
+    if ext == 'jpg':
+        cmd += ['-q:v', _ffmpeg_quality(quality)]
+    cmd.append(os.path.join(tmp_dir, f'%06d.{ext}'))
+    subprocess.run(cmd, capture_output=True, check=True)
+
+    decoded = {}
+    for i, frame in enumerate(frames):
+        path = os.path.join(tmp_dir, f'{i + 1:06d}.{ext}')
+        if os.path.exists(path):
+            decoded[frame] = path
+    return decoded
+
+
+def export_frames(rig_item, items, ext, scene):
+    '''Write source frames for items [(key, frame, output path)]; yield (key, error) per item.'''
+    src_path = bpy.path.abspath(rig_item.source_filepath)
+    if getattr(rig_item, 'source_type', '') != 'Movie Clip':
+        for key, frame, path in items:
+            try:
+                _place(frame_source.sequence_frame_path(src_path, frame), path)
+                yield key, None
+            except Exception as e:
+                yield key, f'passthrough failed: {e}'
+        return
+
+    if not items:
+        return
+    # Decode next to the output so the final rename stays on one filesystem
+    out_dir = os.path.dirname(os.path.dirname(items[0][2]))
+    os.makedirs(out_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=f'.passthrough{output_io.PARTIAL_MARKER}', dir=out_dir)
+    try:
+        try:
+            decoded = _decode_movie_frames(
+                src_path, [frame_source.source_frame_number(rig_item, frame) for _, frame, _ in items], ext,
+                scene.render.image_settings.quality, tmp_dir,
+            )
+        except Exception as e:
+            for key, _, _ in items:
+                yield key, f'passthrough decode failed: {e}'
+            return
+        for key, frame, path in items:
+            # Frames past the clip's end hold its last frame, as in a render
+            frame = frame_source.source_frame_number(rig_item, frame)
+            if frame not in decoded:
+                yield key, f'frame {frame} not in source movie'
+                continue
+            try:
+                _place(decoded[frame], path)
+                yield key, None
+            except Exception as e:
+                yield key, f'passthrough failed: {e}'
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
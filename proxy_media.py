@@ -0,0 +1,192 @@
+#proxy_media.py
+"""Downscaled proxies of rig media for the viewport preview.
+
+Equirect worlds and perspective camera backgrounds show a proxy instead of the
+full-resolution source while editing; COLMAP_RIG_OT_render swaps the original
+back in. Movies become an all-intra H.264 file with the same frames, image
+sequences a JPEG sequence with the same file numbers (gaps included), so the
+image_user frame mapping of the source applies unchanged. Proxies are built
+with ffmpeg on a worker thread and kept in the add-on cache directory, keyed
+by source path, size, mtime and proxy width, so they survive across sessions.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+
+import bpy
+
+try:
+    from . import cache_utils, frame_source, media_probe, output_io, sequence_index
+except ImportError:
+    import cache_utils
+    import frame_source
+    import media_probe
+    import output_io
+    import sequence_index
+
+# ffmpeg quality settings for proxies (viewport only, so size beats fidelity)
+PROXY_CRF = 28
+PROXY_JPEG_QUALITY = 5
+
+# Running proxy builds by key
+_jobs = {}
+
+
+def _source_state(src_path, source_type):
+    '''Return a string that changes whenever the source media changes, or None if it is missing.'''
+    try:
+        if source_type == 'Image Sequence':
+            index = sequence_index.get_index(src_path)
+            if index is None:
+                return None
+            st = os.stat(index.directory)
+            return f'{index.directory}|{index.base}|{index.ext}|{index.first}-{index.last}|{len(index.frames)}|{st.st_mtime_ns}'
+        st = os.stat(src_path)
+    except OSError:
+        return None
+    return f'{src_path}|{st.st_size}|{st.st_mtime_ns}'
+
+
+def proxy_key(src_path, source_type, width):
+    state = _source_state(src_path, source_type)
+    if state is None:
+        return None
+    return hashlib.sha1(f'{source_type}|{width}|{state}'.encode()).hexdigest()[:20]
+
+
+def proxy_file(src_path, source_type, proxy_dir):
+    '''Return the file inside proxy_dir that stands in for src_path.'''
+    if source_type == 'Movie Clip':
+        return os.path.join(proxy_dir, 'proxy.mp4')
+    stem = os.path.splitext(os.path.basename(src_path))[0]
+    return os.path.join(proxy_dir, f'{stem}.jpg')
+
+
+def _run(cmd, cancelled):
+    '''Run ffmpeg, killing it if the job is cancelled; return True on success.'''
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    while proc.poll() is None:
+        if cancelled.wait(0.2):
+            proc.kill()
+            proc.wait()
+            return False
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.read().decode(errors='replace').strip())
+    return True
+
+
+def _build(src_path, source_type, width, tmp_dir, cancelled):
+    scale = f'scale={width}:-2'
+    if source_type == 'Movie Clip':
+        # All-intra so viewport scrubbing never decodes from a distant keyframe
+        cmd = [
+            frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-i', src_path, '-an', '-vf', scale, '-vsync', '0',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(PROXY_CRF), '-g', '1', '-pix_fmt', 'yuv420p',
+            proxy_file(src_path, source_type, tmp_dir),
+        ]
+        return _run(cmd, cancelled)
+
+    index = sequence_index.get_index(src_path) if source_type == 'Image Sequence' else None
+    sources = [index.path(n) for n in index.frames] if index is not None else [src_path]
+    for path in sources:
+        if cancelled.is_set():
+            return False
+        cmd = [
+            frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-i', path, '-vf', scale,
+            '-q:v', str(PROXY_JPEG_QUALITY), proxy_file(path, source_type, tmp_dir),
+        ]
+        if not _run(cmd, cancelled):
+            return False
+    return True
+
+
+class ProxyJob:
+    '''Builds one proxy on a worker thread into a temp directory that is renamed into place when done.'''
+
+    def __init__(self, key, src_path, source_type, width):
+        self.key = key
+        self.src_path = src_path
+        self.source_type = source_type
+        self.width = width
+        self.callbacks = []
+        self.error = None
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f'colmap_rig_proxy_{key}', daemon=True)
+
+    def _run(self):
+        proxy_dir = os.path.join(cache_utils.cache_dir('proxy'), self.key)
+        tmp_dir = f'{proxy_dir}{output_io.PARTIAL_MARKER}'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        try:
+            os.makedirs(tmp_dir)
+            if _build(self.src_path, self.source_type, self.width, tmp_dir, self.cancelled):
+                os.replace(tmp_dir, proxy_dir)
+        except Exception as e:
+            self.error = str(e)
+            print(f"Warning: proxy generation failed for {self.src_path}: {e}")
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            self.done.set()
+
+
+def _poll_jobs():
+    '''Timer callback: run the callbacks of finished proxy builds on the main thread.'''
+    for key, job in list(_jobs.items()):
+        if not job.done.is_set():
+            continue
+        del _jobs[key]
+        if job.cancelled.is_set() or job.error:
+            continue
+        for callback in job.callbacks:
+            try:
+                callback(job.src_path)
+            except Exception as e:
+                print(f"Warning: proxy callback failed: {e}")
+    return 0.5 if _jobs else None
+
+
+def viewport_path(src_path, source_type, width, on_ready=None, build=True):
+    '''Return the file the viewport should show for src_path.
+
+    That is the proxy if it exists, otherwise the source itself. If the source is
+    wider than `width` and no proxy exists yet, one is built in the background
+    (unless build is False) and on_ready(src_path) is called on the main thread
+    once it's there.
+    '''
+    if not src_path or source_type not in ('Movie Clip', 'Image Sequence', 'Single Image'):
+        return src_path
+    key = proxy_key(src_path, source_type, width)
+    if key is None:
+        return src_path
+    proxy_dir = os.path.join(cache_utils.cache_dir('proxy'), key)
+    if os.path.isdir(proxy_dir):
+        cache_utils.touch(proxy_dir)
+        return proxy_file(src_path, source_type, proxy_dir)
+
+    # No event loop in background mode, and ffmpeg is needed to build the proxy
+    if not build or bpy.app.background or not frame_source.FFMPEG_PATH:
+        return src_path
+    info = media_probe.probe(src_path)
+    if info is None or info['width'] <= width:
+        return src_path
+
+    job = _jobs.get(key)
+    if job is None:
+        job = ProxyJob(key, src_path, source_type, width)
+        _jobs[key] = job
+        job.thread.start()
+        if not bpy.app.timers.is_registered(_poll_jobs):
+            bpy.app.timers.register(_poll_jobs, first_interval=0.5)
+    if on_ready is not None and on_ready not in job.callbacks:
+        job.callbacks.append(on_ready)
+    return src_path
+
+
+def cancel_all():
+    for key in list(_jobs):
+        _jobs.pop(key).cancelled.set()
+    if bpy.app.timers.is_registered(_poll_jobs):
+        bpy.app.timers.unregister(_poll_jobs)
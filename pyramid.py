@@ -0,0 +1,128 @@
+#pyramid.py
+"""Downscaled copies of rendered frames (1/2, 1/4, ...) for coarse-to-fine reconstruction.
+
+Level N of the pyramid mirrors the full-resolution tree under
+{out}/downscale_{2**N}/{rig}/{cam}/{rig}_imageNNNN.ext, so its rig_config.json
+has the same image_prefix entries. Once a frame is on disk a small thread pool
+runs a single ffmpeg process that reads it, area-downscales it to every level
+and writes the level files (with EXIF for the level's size) through the usual
+partial file + rename, so each extra level costs a resize instead of a render.
+"""
+import os
+import subprocess
+
+try:
+    from . import exif_writer, frame_source, job_pool, output_io
+except ImportError:
+    import exif_writer
+    import frame_source
+    import job_pool
+    import output_io
+
+LEVEL_DIR_PREFIX = 'downscale_'
+
+
+def level_factors(levels):
+    '''Return the downscale factors of the first `levels` pyramid levels: 2, 4, 8, ...'''
+    return [2 ** i for i in range(1, max(0, levels) + 1)]
+
+
+def level_dir(out_base, factor):
+    '''Return the output folder of the level with this downscale factor.'''
+    return os.path.join(out_base, f'{LEVEL_DIR_PREFIX}{factor}')
+
+
+def level_output_path(out_base, factor, rig_name, cam_name, frame, ext):
+    '''Return the path of one frame in a level's {rig}/{cam} tree.'''
+    return output_io.frame_output_path(level_dir(out_base, factor), rig_name, cam_name, frame, ext)
+
+
+def level_size(width, height, factor):
+    '''Return the pixel size of a level (rounded down, at least 1 pixel).'''
+    return max(1, width // factor), max(1, height // factor)
+
+
+def unsupported_reason(scene):
+    '''Return why downscaled levels can't be written for this scene's output, or '' if they can.'''
+    if not frame_source.FFMPEG_PATH:
+        return 'ffmpeg not found'
+    file_format = scene.render.image_settings.file_format
+    if file_format not in ('JPEG', 'PNG', 'TIFF'):
+        return f'{file_format} output is not supported'
+    return ''
+
+
+def output_settings(scene):
+    '''Snapshot of the image settings the levels are encoded with.'''
+    img = scene.render.image_settings
+    return {
+        'format': img.file_format,
+        'quality': img.quality,
+        'compression': img.compression,
+    }
+
+
+def _encoder_args(settings):
+    if settings['format'] == 'JPEG':
+        # Same quality mapping as passthrough movie decoding (Blender 0-100 -> ffmpeg -q:v 31-2)
+        return ['-q:v', str(round(2 + (100 - settings['quality']) * 29 / 100))]
+    if settings['format'] == 'PNG':
+        return ['-compression_level', str(min(9, max(0, round(settings['compression'] * 9 / 100))))]
+    return []
+
+
+def build_levels(src_path, outputs, settings):
+    '''Write every level of one frame in a single ffmpeg pass.
+
+    outputs is a list of (width, height, path, exif_bytes or None); files are
+    written to their partial paths and renamed into place when all are encoded.
+    '''
+    count = len(outputs)
+    graph = f'[0:v]split={count}' + ''.join(f'[s{i}]' for i in range(count)) + ';' + ';'.join(
+        f'[s{i}]scale={width}:{height}:flags=area[o{i}]' for i, (width, height, _, _) in enumerate(outputs)
+    )
+    cmd = [frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-i', src_path, '-filter_complex', graph]
+    tmp_paths = []
+    for i, (_, _, path, _) in enumerate(outputs):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_paths.append(output_io.partial_path(path))
+        cmd += ['-map', f'[o{i}]', '-frames:v', '1', '-update', '1'] + _encoder_args(settings) + [tmp_paths[-1]]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+        for tmp_path, (_, _, path, exif_bytes) in zip(tmp_paths, outputs):
+            if exif_bytes is not None:
+                exif_writer.insert_exif(exif_bytes, tmp_path, path)
+            else:
+                output_io.commit(tmp_path, path)
+    except subprocess.CalledProcessError as e:
+        for tmp_path in tmp_paths:
+            output_io.discard(tmp_path)
+        raise RuntimeError(e.stderr.decode('utf-8', 'replace').strip() or f'ffmpeg exited with {e.returncode}')
+    except Exception:
+        for tmp_path in tmp_paths:
+            output_io.discard(tmp_path)
+        raise
+
+
+class LevelWriterPool(job_pool.JobPool):
+    '''Threads that build the downscaled levels of finished frames.
+
+    Same interface as exif_writer.ExifWriterPool: submit() blocks once
+    max_pending frames are pending and results come back as (key, error, seconds)
+    from pop_finished().
+    '''
+
+    error_prefix = 'downscale failed'
+    thread_name = 'colmap_rig_levels'
+
+    def __init__(self, settings, num_workers=None, max_pending=32):
+        self.settings = settings
+        num_workers = num_workers or max(1, min(4, (os.cpu_count() or 2) // 2))
+        super().__init__(num_workers, max_pending=max_pending)
+
+    def run_job(self, src_path, outputs):
+        build_levels(src_path, outputs, self.settings)
+
+    def submit(self, src_path, outputs, key=None):
+        '''Queue the levels of the finished frame at src_path; key is handed back by pop_finished().'''
+        super().submit(src_path, outputs, key=key)
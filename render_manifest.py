@@ -0,0 +1,134 @@
+#render_manifest.py
+"""Render manifest for incremental re-rendering.
+
+render_manifest.json in the output folder records, per camera folder, a
+fingerprint of every input that affects the camera's pixels together with the
+frames that were rendered with it. On the next run only camera/frame
+combinations whose fingerprint changed (or that were never rendered) are
+queued again.
+"""
+import hashlib
+import json
+import os
+
+import bpy
+
+try:
+    from . import render_profiles
+except ImportError:
+    import render_profiles
+
+MANIFEST_NAME = 'render_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _animation_signature(obj):
+    '''Describe the keyframes animating obj and its parents, so animated cameras change the fingerprint.'''
+    signature = []
+    while obj is not None:
+        anim = obj.animation_data
+        if anim and anim.action:
+            for fc in anim.action.fcurves:
+                signature.append((obj.name, fc.data_path, fc.array_index,
+                                  [tuple(round(v, 6) for v in kp.co) for kp in fc.keyframe_points]))
+        obj = obj.parent
+    return signature
+
+
+def _source_signature(path, source_type):
+    '''Return (path, size, mtime) of the source media, plus its folder mtime for sequences.
+
+    Only sequences need the folder: frames added or removed change it. For movies and
+    stills it would also change whenever outputs are written next to the media.
+    '''
+    if not path:
+        return None
+    path = bpy.path.abspath(path)
+    try:
+        st = os.stat(path)
+        if source_type != 'Image Sequence':
+            return (path, st.st_size, st.st_mtime_ns)
+        folder_mtime = os.stat(os.path.dirname(path)).st_mtime_ns
+    except OSError:
+        return (path, None)
+    return (path, st.st_size, st.st_mtime_ns, folder_mtime)
+
+
+def camera_fingerprint(scene, rig_item, cam, depsgraph, write_exif):
+    '''Return a hex digest of all inputs that affect the rendered pixels of cam.
+
+    The frame range is not part of it: frames are tracked individually, so
+    extending a range only renders the new frames.
+    '''
+    cd = cam.data
+    img = scene.render.image_settings
+    view = scene.view_settings
+    matrix = cam.evaluated_get(depsgraph).matrix_world
+    inputs = {
+        'matrix': [round(v, 6) for row in matrix for v in row],
+        'animation': _animation_signature(cam),
+        'camera': [cd.type, cd.lens, cd.sensor_width, cd.sensor_height, cd.sensor_fit, cd.shift_x, cd.shift_y],
+        'resolution': [rig_item.render_resolution[0], rig_item.render_resolution[1], scene.render.resolution_percentage],
+        'rig': [getattr(rig_item, 'rig_type', ''), getattr(rig_item, 'render_method', ''),
+                getattr(rig_item, 'use_compositor_media', False)],
+        'profile': render_profiles.profile_signature(scene, getattr(rig_item, 'render_profile', 'SCENE')),
+        'source': _source_signature(rig_item.source_filepath, getattr(rig_item, 'source_type', '')),
+        'format': [img.file_format, img.color_mode, img.color_depth, img.quality, img.compression],
+        'view': [view.view_transform, view.look, view.exposure, view.gamma],
+        'engine': scene.render.engine,
+        'exif': bool(write_exif),
+    }
+    text = json.dumps(inputs, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class RenderManifest:
+    '''Per-camera fingerprints and rendered frames stored in {out}/render_manifest.json.'''
+
+    def __init__(self, out_base):
+        self.path = os.path.join(out_base, MANIFEST_NAME)
+        self.cameras = {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                for key, entry in data.get('cameras', {}).items():
+                    self.cameras[key] = {
+                        'fingerprint': entry.get('fingerprint', ''),
+                        'frames': set(entry.get('frames', [])),
+                    }
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _key(rig_name, cam_name):
+        return f'{rig_name}/{cam_name}'
+
+    def is_current(self, rig_name, cam_name, frame, fingerprint):
+        '''Return True if frame was rendered with the same fingerprint before.'''
+        entry = self.cameras.get(self._key(rig_name, cam_name))
+        return bool(entry) and entry['fingerprint'] == fingerprint and frame in entry['frames']
+
+    def record(self, rig_name, cam_name, frame, fingerprint):
+        '''Remember that frame was rendered with fingerprint; a new fingerprint forgets older frames.'''
+        key = self._key(rig_name, cam_name)
+        entry = self.cameras.get(key)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            entry = {'fingerprint': fingerprint, 'frames': set()}
+            self.cameras[key] = entry
+        entry['frames'].add(frame)
+
+    def save(self):
+        '''Write the manifest atomically.'''
+        data = {
+            'version': MANIFEST_VERSION,
+            'cameras': {
+                key: {'fingerprint': entry['fingerprint'], 'frames': sorted(entry['frames'])}
+                for key, entry in sorted(self.cameras.items())
+            },
+        }
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,112 @@
+#render_profiles.py
+"""Per-rig render settings applied around a rig's render and restored afterwards.
+
+An equirect rig only shows an emissive world background, so the scene's
+sampling, denoising and light path settings cost time without changing the
+pixels. The 'REPROJECTION' profile switches them to the cheapest values that
+still give each pixel the bilinear source lookup at its center; 'SCENE' keeps
+the scene's own settings. Settings missing in the running Blender version or
+engine are skipped.
+"""
+
+# Profile name -> [(owner path relative to the scene, attribute, value)]
+PROFILES = {
+    'SCENE': [],
+    'REPROJECTION': [
+        # Keep scene data in memory between the per-camera renders
+        ('render', 'use_persistent_data', True),
+        ('render', 'use_motion_blur', False),
+        ('render', 'use_sequencer', False),
+        ('render', 'dither_intensity', 0.0),
+        # One sample at the pixel center: a near-zero box filter removes the sub-pixel jitter
+        ('cycles', 'samples', 1),
+        ('cycles', 'use_adaptive_sampling', False),
+        ('cycles', 'use_denoising', False),
+        ('cycles', 'pixel_filter_type', 'BOX'),
+        ('render', 'filter_size', 0.01),
+        ('cycles', 'filter_width', 0.01),
+        ('cycles', 'max_bounces', 0),
+        ('cycles', 'diffuse_bounces', 0),
+        ('cycles', 'glossy_bounces', 0),
+        ('cycles', 'transmission_bounces', 0),
+        ('cycles', 'volume_bounces', 0),
+        ('cycles', 'transparent_max_bounces', 0),
+        ('cycles', 'caustics_reflective', False),
+        ('cycles', 'caustics_refractive', False),
+        ('cycles', 'use_auto_tile', True),
+        ('cycles', 'tile_size', 2048),
+        ('eevee', 'taa_render_samples', 1),
+        ('eevee', 'use_gtao', False),
+        ('eevee', 'use_bloom', False),
+        ('eevee', 'use_ssr', False),
+        ('eevee', 'use_motion_blur', False),
+        # Identity colour pipeline so frames keep the source's values
+        ('view_settings', 'view_transform', 'Standard'),
+        ('view_settings', 'look', 'None'),
+        ('view_settings', 'exposure', 0.0),
+        ('view_settings', 'gamma', 1.0),
+    ],
+}
+
+# Environment texture filtering per profile (None keeps the node's setting)
+ENV_INTERPOLATION = {
+    'SCENE': None,
+    'REPROJECTION': 'Linear',
+}
+
+
+def _owner(scene, path):
+    owner = scene
+    for name in path.split('.'):
+        owner = getattr(owner, name, None)
+        if owner is None:
+            return None
+    return owner
+
+
+def _env_node(world):
+    if world is None or not world.use_nodes or not world.node_tree:
+        return None
+    return next((n for n in world.node_tree.nodes if n.type == 'TEX_ENVIRONMENT'), None)
+
+
+def apply_profile(scene, name, world=None):
+    '''Apply render profile `name` to scene (and world's environment texture); return the values to restore.'''
+    saved = []
+    for path, attr, value in PROFILES.get(name, ()):
+        owner = _owner(scene, path)
+        if owner is None or not hasattr(owner, attr):
+            continue
+        old = getattr(owner, attr)
+        if old == value:
+            continue
+        try:
+            setattr(owner, attr, value)
+        except (AttributeError, TypeError, ValueError):
+            continue
+        saved.append((owner, attr, old))
+
+    interpolation = ENV_INTERPOLATION.get(name)
+    env_tex = _env_node(world)
+    if interpolation and env_tex is not None and env_tex.interpolation != interpolation:
+        saved.append((env_tex, 'interpolation', env_tex.interpolation))
+        env_tex.interpolation = interpolation
+    return saved
+
+
+def restore_profile(saved):
+    '''Undo apply_profile(), in reverse order.'''
+    for owner, attr, old in reversed(saved):
+        try:
+            setattr(owner, attr, old)
+        except (AttributeError, TypeError, ValueError, ReferenceError):
+            pass
+    saved.clear()
+
+
+def profile_signature(scene, name):
+    '''Return the settings a profile renders with, for render_manifest fingerprints.'''
+    return [name] + [
+        [path, attr, value] for path, attr, value in PROFILES.get(name, ())
+        if hasattr(_owner(scene, path), attr)
+    ]
@@ -0,0 +1,125 @@
+#render_timing.py
+"""Opt-in per-phase timings for the render loop.
+
+COLMAP_RIG_OT_render wraps each phase (frame_set, decode, world switch,
+compositor setup, render, write, EXIF) in `timings.phase(...)`. With profiling
+disabled the operator uses NULL_TIMINGS, whose phase() hands back one shared
+no-op context manager, so the loop only pays for a method call.
+"""
+import contextlib
+import csv
+import json
+import math
+import os
+import time
+
+TIMINGS_NAME = 'render_timings'
+
+# Report order; frame_set, decode, world and compositor are per rig frame, the rest per camera
+# (exif, encode and downscale run on worker threads, overlapping with the render loop)
+PHASES = ('frame_set', 'decode', 'world', 'compositor', 'render', 'write', 'encode', 'exif', 'downscale')
+
+
+def percentile(sorted_values, pct):
+    '''Nearest-rank percentile of an already sorted list.'''
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _stats(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'min': values[0],
+        'mean': sum(values) / len(values),
+        'p95': percentile(values, 95),
+        'total': sum(values),
+    }
+
+
+class _NullTimings:
+    '''Stand-in used when profiling is off.'''
+
+    enabled = False
+    _null = contextlib.nullcontext()
+
+    def phase(self, name, rig, cam=''):
+        return self._null
+
+    def add(self, name, rig, cam, seconds):
+        pass
+
+
+NULL_TIMINGS = _NullTimings()
+
+
+class RenderTimings:
+    '''Collects (phase, rig, camera) samples and writes min/mean/p95 per rig and per camera.'''
+
+    enabled = True
+
+    def __init__(self):
+        self.samples = {}
+
+    @contextlib.contextmanager
+    def phase(self, name, rig, cam=''):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, rig, cam, time.perf_counter() - start)
+
+    def add(self, name, rig, cam, seconds):
+        self.samples.setdefault((rig, cam, name), []).append(seconds)
+
+    def aggregate(self):
+        '''Return {'rigs': {rig: {phase: stats}}, 'cameras': {rig/cam: {phase: stats}}}.'''
+        per_rig = {}
+        per_cam = {}
+        for (rig, cam, name), values in self.samples.items():
+            per_rig.setdefault(rig, {}).setdefault(name, []).extend(values)
+            if cam:
+                per_cam.setdefault(f'{rig}/{cam}', {})[name] = values
+        return {
+            'rigs': {rig: {name: _stats(v) for name, v in phases.items()} for rig, phases in per_rig.items()},
+            'cameras': {key: {name: _stats(v) for name, v in phases.items()} for key, phases in per_cam.items()},
+        }
+
+    def phase_totals(self):
+        '''Return {phase: total seconds} over all rigs and cameras.'''
+        totals = {}
+        for (_, _, name), values in self.samples.items():
+            totals[name] = totals.get(name, 0.0) + sum(values)
+        return totals
+
+    def summary(self, top=3):
+        '''One-line summary of the most expensive phases, e.g. "render 81%, write 9%, exif 6%".'''
+        totals = self.phase_totals()
+        grand = sum(totals.values())
+        if grand <= 0:
+            return ''
+        ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return ', '.join(f'{name} {seconds / grand:.0%}' for name, seconds in ranked)
+
+    def write(self, out_base):
+        '''Write render_timings.json and render_timings.csv into out_base; return the JSON path.'''
+        data = self.aggregate()
+        os.makedirs(out_base, exist_ok=True)
+        json_path = os.path.join(out_base, f'{TIMINGS_NAME}.json')
+        with open(json_path, 'w') as f:
+            json.dump(data, f, indent=4, sort_keys=True)
+
+        order = {name: i for i, name in enumerate(PHASES)}
+        with open(os.path.join(out_base, f'{TIMINGS_NAME}.csv'), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['scope', 'rig', 'camera', 'phase', 'count', 'min', 'mean', 'p95', 'total'])
+            for scope, groups in (('rig', data['rigs']), ('camera', data['cameras'])):
+                for key in sorted(groups):
+                    rig, _, cam = key.partition('/')
+                    for name in sorted(groups[key], key=lambda n: order.get(n, len(order))):
+                        s = groups[key][name]
+                        writer.writerow([scope, rig, cam, name, s['count'],
+                                         f"{s['min']:.6f}", f"{s['mean']:.6f}", f"{s['p95']:.6f}", f"{s['total']:.6f}"])
+        return json_path
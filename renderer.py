@@ -1,59 +1,110 @@
 import bpy
 import os
-import re
-from pathlib import Path
+import shutil
+import tempfile
 from bpy.types import Operator
 
 try:
-    import piexif
-    PIEXIF_AVAILABLE = True
+    from . import (
+        compositor_media, exif_writer, frame_cache, frame_source, lut_cache, movie_decoder, multiview_render,
+        output_io, parallel_render, passthrough, pyramid, render_manifest, render_profiles, render_timing,
+        reprojection, rig_manager, shard_output, write_behind,
+    )
 except ImportError:
-    PIEXIF_AVAILABLE = False
-    print("Warning: piexif not available, EXIF data will not be written to images")
-
-
-def write_camera_exif(image_path, camera_obj, scene):
-    """Write EXIF metadata to JPEG images for COLMAP camera parameter detection."""
-    if not PIEXIF_AVAILABLE:
-        return
-    
-    # Only write EXIF to JPEG files
-    if not (image_path.lower().endswith('.jpg') or image_path.lower().endswith('.jpeg')):
-        return
-    
-    try:
-        camera_data = camera_obj.data
-        
-        # Get camera parameters
-        focal_mm = camera_data.lens  # Focal length in mm
-        sensor_width_mm = camera_data.sensor_width  # Sensor width in mm
-        image_width_px = scene.render.resolution_x
-        image_height_px = scene.render.resolution_y
-        
-        # Calculate 35mm equivalent focal length
-        focal_35mm = int((focal_mm / sensor_width_mm) * 36.0)
-        
-        # Create EXIF data
-        exif_dict = {
-            "0th": {
-                piexif.ImageIFD.Make: "Blender",
-                piexif.ImageIFD.Model: "Virtual Camera",
-                piexif.ImageIFD.Software: f"Blender {bpy.app.version_string}",
-            },
-            "Exif": {
-                piexif.ExifIFD.FocalLength: (int(focal_mm * 100), 100),  # Store as rational (numerator, denominator)
-                piexif.ExifIFD.FocalLengthIn35mmFilm: focal_35mm,
-                piexif.ExifIFD.PixelXDimension: image_width_px,
-                piexif.ExifIFD.PixelYDimension: image_height_px,
-            },
-        }
-        
-        # Insert EXIF data into the image
-        exif_bytes = piexif.dump(exif_dict)
-        piexif.insert(exif_bytes, image_path)
-        
-    except Exception as e:
-        print(f"Warning: Failed to write EXIF data to {image_path}: {e}")
+    import compositor_media
+    import exif_writer
+    import frame_cache
+    import frame_source
+    import lut_cache
+    import movie_decoder
+    import multiview_render
+    import output_io
+    import parallel_render
+    import passthrough
+    import pyramid
+    import render_manifest
+    import render_profiles
+    import render_timing
+    import reprojection
+    import rig_manager
+    import shard_output
+    import write_behind
+
+PIEXIF_AVAILABLE = exif_writer.PIEXIF_AVAILABLE
+
+# Summary of the last colmap_rig.render run (read by parallel workers and scripts)
+last_render_summary = {}
+
+
+def _writes_exif(rig_item):
+    """Return True if frames of this rig get EXIF metadata."""
+    return (
+        PIEXIF_AVAILABLE
+        and getattr(rig_item, 'rig_type', 'EQUIRECT_360') != 'PERSPECTIVE'
+        and getattr(rig_item, 'write_exif', True)
+    )
+
+
+def _camera_fingerprints(scene, depsgraph):
+    """Return {(rig name, camera name): fingerprint} for every camera queued for rendering."""
+    fingerprints = {}
+    for rig_item in scene.rig_collection:
+        if not rig_item.do_render or not rig_item.collection:
+            continue
+        for cam in rig_item.collection.objects:
+            if cam.type == 'CAMERA' and not cam.hide_render:
+                fingerprints[(rig_item.name, cam.name)] = render_manifest.camera_fingerprint(
+                    scene, rig_item, cam, depsgraph, _writes_exif(rig_item)
+                )
+    return fingerprints
+
+
+def _reprojection_grid(cam, depsgraph, width, height, src, cache):
+    """Return the equirect sampling grid for one pinhole camera, computing it only on a cache miss."""
+    cd = cam.data
+    matrix_world = cam.evaluated_get(depsgraph).matrix_world
+    matrix = tuple(tuple(row) for row in matrix_world)
+    key = lut_cache.grid_cache_key(
+        cd.lens, cd.sensor_width, width, height, matrix, src.width, src.height,
+        sensor_height=cd.sensor_height, sensor_fit=cd.sensor_fit,
+        shift_x=cd.shift_x, shift_y=cd.shift_y,
+    )
+
+    def build():
+        rotation = tuple(tuple(row) for row in matrix_world.to_3x3().normalized())
+        return reprojection.build_sampling_grid(
+            cd.lens, cd.sensor_width, width, height, rotation, src.width, src.height,
+            sensor_height=cd.sensor_height, sensor_fit=cd.sensor_fit,
+            shift_x=cd.shift_x, shift_y=cd.shift_y,
+        )
+
+    return cache.get_or_build(key, build)
+
+
+def _world_env_node(rig_item):
+    """Return the Environment Texture node of the rig's world, if there is one."""
+    world = bpy.data.worlds.get(f"World_{rig_item.name}")
+    if world is None or not world.use_nodes or not world.node_tree:
+        return None
+    return next((n for n in world.node_tree.nodes if n.type == 'TEX_ENVIRONMENT'), None)
+
+
+def _decodes_movie(rig_item):
+    """Return True if rendering this rig reads its movie frames through the shared decoder."""
+    if getattr(rig_item, 'source_type', '') != 'Movie Clip' or not frame_source.can_decode(rig_item):
+        return False
+    rig_type = getattr(rig_item, 'rig_type', 'EQUIRECT_360')
+    if rig_type == 'EQUIRECT_360':
+        return True
+    return getattr(rig_item, 'use_compositor_media', False) and getattr(rig_item, 'render_method', 'RENDER') != 'PASSTHROUGH'
+
+
+def _save_pixels(image, pixels, filepath, scene):
+    """Write an RGBA buffer through a scratch image using the scene's output settings."""
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    image.pixels.foreach_set(pixels.ravel())
+    # save_render applies the scene's view transform and file format like a regular render
+    image.save_render(filepath, scene=scene)
 
 
 class COLMAP_RIG_OT_render(Operator):
@@ -61,6 +112,35 @@ class COLMAP_RIG_OT_render(Operator):
     bl_label = 'Render all rigs to folders'
     bl_description = 'Render frames for cameras in rig collections based on rig item settings (ESC to cancel between frames)'
 
+    # Set by parallel render workers: JSON list of [rig, camera, frame] items to render
+    work_file: bpy.props.StringProperty(
+        name='Work File',
+        default='',
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    def _execute_parallel(self, context, num_workers, out_base, pending, skipped_count, manifest, fingerprints):
+        threads = getattr(context.scene, 'colmap_rig_worker_threads', 0)
+        if threads <= 0:
+            threads = max(1, (os.cpu_count() or 1) // num_workers)
+        summary = parallel_render.run_parallel(context, num_workers, threads, work=pending)
+
+        # Workers never touch the manifest; record what they rendered here
+        if manifest is not None:
+            failed = {(f['rig'], f['camera'], f['frame']) for f in summary['failed']}
+            for rig_name, cam_name, frame in pending:
+                if (rig_name, cam_name, frame) not in failed:
+                    manifest.record(rig_name, cam_name, frame, fingerprints[(rig_name, cam_name)])
+            manifest.save()
+
+        last_render_summary.clear()
+        last_render_summary.update(summary, skipped=skipped_count, output=out_base)
+        if summary['failed']:
+            self.report({'WARNING'}, f"Rendered {summary['rendered']} frames with {summary['workers']} workers into {out_base}; {len(summary['failed'])} frames failed (logs in {summary['log_dir']})")
+        else:
+            self.report({'INFO'}, f"Rendered {summary['rendered']} frames with {summary['workers']} workers into {out_base}")
+        return {'FINISHED'}
+
     def execute(self, context):
         
         scene = context.scene
@@ -88,9 +168,143 @@ class COLMAP_RIG_OT_render(Operator):
         if not hasattr(scene, 'rig_collection'):
             self.report({'WARNING'}, 'No rig collection found in scene')
             return {'CANCELLED'}
-        
-        # Initialize progress
-        context.window_manager.progress_begin(0, 100)
+
+        # Restrict rendering to a shard when running as a parallel worker
+        work = parallel_render.load_work_file(self.work_file) if self.work_file else None
+
+        ext = output_io.file_extension(scene.render.image_settings.file_format)
+        resume = getattr(scene, 'colmap_rig_resume', False)
+
+        # Incremental mode: the parent keeps a manifest of per-camera input fingerprints
+        manifest = None
+        fingerprints = {}
+        if getattr(scene, 'colmap_rig_incremental', False) and work is None:
+            manifest = render_manifest.RenderManifest(out_base)
+            fingerprints = _camera_fingerprints(scene, context.evaluated_depsgraph_get())
+
+        # Packed output: frames are staged locally and appended to per-camera tar shards
+        shards = shard_output.ShardStore(out_base) if getattr(scene, 'colmap_rig_pack_shards', False) else None
+
+        # Pyramid levels: 1/2, 1/4, ... copies downscaled from every finished frame
+        level_factors = pyramid.level_factors(getattr(scene, 'colmap_rig_pyramid_levels', 0))
+        if level_factors:
+            reason = pyramid.unsupported_reason(scene)
+            if shards is not None:
+                reason = 'packed shard output'
+            if reason:
+                print(f"Warning: downscaled levels not possible ({reason}), writing full resolution only")
+                level_factors = []
+        missing_levels = []
+
+        def is_pending(rig_name, cam_name, frame):
+            if shards is not None:
+                # Indexed frames are complete by construction
+                up_to_date = resume or (
+                    manifest is not None and manifest.is_current(rig_name, cam_name, frame, fingerprints[(rig_name, cam_name)])
+                )
+                return not (up_to_date and shards.contains(rig_name, cam_name, output_io.frame_filename(rig_name, frame, ext)))
+            path = output_io.frame_output_path(out_base, rig_name, cam_name, frame, ext)
+            if resume and output_io.is_complete_image(path):
+                pass
+            elif manifest is not None and manifest.is_current(rig_name, cam_name, frame, fingerprints[(rig_name, cam_name)]):
+                if not output_io.is_complete_image(path):
+                    return True
+            else:
+                return True
+            # Up to date at full resolution: a missing level only needs a downscale, not a render
+            if level_factors and not all(
+                output_io.is_complete_image(pyramid.level_output_path(out_base, factor, rig_name, cam_name, frame, ext))
+                for factor in level_factors
+            ):
+                missing_levels.append((rig_name, cam_name, frame))
+            return False
+
+        # Planned (rig, camera, frame) items; resume and incremental mode drop outputs that are up to date
+        planned = parallel_render.build_work_list(scene)
+        if work is not None:
+            planned = [item for item in planned if tuple(item) in work]
+        pending = [item for item in planned if is_pending(*item)]
+        skipped_count = len(planned) - len(pending)
+        pending_set = {tuple(item) for item in pending}
+        total_frames_to_render = len(pending)
+        failed = []
+
+        # Opt-in per-phase timings; the no-op stand-in keeps the loop cheap when profiling is off
+        if getattr(scene, 'colmap_rig_profile', False):
+            timings = render_timing.RenderTimings()
+        else:
+            timings = render_timing.NULL_TIMINGS
+
+        # Levels are built on a pool once the full-resolution frame is on disk
+        level_pool = pyramid.LevelWriterPool(pyramid.output_settings(scene)) if level_factors else None
+        level_exif = {}
+
+        def submit_levels(key):
+            rig_name, cam_name, frame = key
+            rig_item = scene.rig_collection.get(rig_name)
+            cam = bpy.data.objects.get(cam_name)
+            if rig_item is None or cam is None:
+                return
+            width, height = output_io.output_size(scene, rig_item.render_resolution)
+            outputs = []
+            for factor in level_factors:
+                level_width, level_height = pyramid.level_size(width, height, factor)
+                exif = None
+                if _writes_exif(rig_item) and ext == 'jpg':
+                    # EXIF carries the pixel size, so every level gets its own block
+                    if (cam_name, factor) not in level_exif:
+                        level_exif[(cam_name, factor)] = exif_writer.camera_exif_bytes(cam, scene, level_width, level_height)
+                    exif = level_exif[(cam_name, factor)]
+                outputs.append((
+                    level_width, level_height,
+                    pyramid.level_output_path(out_base, factor, rig_name, cam_name, frame, ext), exif,
+                ))
+            level_pool.submit(output_io.frame_output_path(out_base, rig_name, cam_name, frame, ext), outputs, key=key)
+
+        def finish_levels():
+            """Collect finished level jobs; a failed level is re-built from the frame on the next run."""
+            if level_pool is None:
+                return
+            for (rig_name, cam_name, frame), error, seconds in level_pool.pop_finished():
+                timings.add('downscale', rig_name, cam_name, seconds)
+                if error:
+                    print(f"Error: downscaled levels of {rig_name}/{cam_name} frame {frame} failed: {error}")
+                    failed.append({'rig': rig_name, 'camera': cam_name, 'frame': frame, 'error': error})
+
+        def close_levels(cancel=False):
+            if level_pool is not None:
+                level_pool.close(cancel=cancel)
+                finish_levels()
+
+        for key in missing_levels:
+            submit_levels(key)
+
+        if total_frames_to_render == 0:
+            close_levels()
+            if skipped_count:
+                last_render_summary.clear()
+                last_render_summary.update(rendered=0, rigs=0, failed=failed, skipped=skipped_count, output=out_base)
+                message = f'All {skipped_count} frames already up to date in {out_base}'
+                if missing_levels:
+                    message += f'; built downscaled levels for {len(missing_levels) - len(failed)} frames'
+                if failed:
+                    self.report({'WARNING'}, f'{message}; {len(failed)} failed (see console)')
+                else:
+                    self.report({'INFO'}, message)
+                return {'FINISHED'}
+            self.report({'WARNING'}, 'No frames to render')
+            return {'CANCELLED'}
+
+        # Hand the work list to headless worker processes if requested
+        num_workers = getattr(scene, 'colmap_rig_parallel_workers', 1)
+        if num_workers > 1 and not self.work_file:
+            result = self._execute_parallel(context, num_workers, out_base, pending, skipped_count, manifest, fingerprints)
+            # Workers build the levels of the frames they render; missing levels of existing frames are built here
+            close_levels()
+            if failed:
+                last_render_summary['failed'] = last_render_summary.get('failed', []) + failed
+                self.report({'WARNING'}, f'{len(failed)} frames failed to get their downscaled levels (see console)')
+            return result
         
         # Store original settings
         original_camera = scene.camera
@@ -101,233 +315,486 @@ class COLMAP_RIG_OT_render(Operator):
         orig_resolution_x = scene.render.resolution_x
         orig_resolution_y = scene.render.resolution_y
         
-        # Temporarily disable auto-camera-switching during rendering
         orig_sel_cam_active = scene.sel_cam_active
-        scene.sel_cam_active = False
         
         rendered_count = 0
         total_frames = 0
         
-        # Calculate total frames to render for progress tracking
-        total_frames_to_render = 0
-        for rig_item in scene.rig_collection:
-            if not rig_item.do_render or not rig_item.collection:
-                continue
-            cams = [obj for obj in rig_item.collection.objects if obj.type == 'CAMERA' and not obj.hide_render]
-            if cams:
-                frames_in_range = len(range(rig_item.start_frame, rig_item.end_frame + 1, rig_item.frame_step))
-                total_frames_to_render += frames_in_range * len(cams)
-        
-        if total_frames_to_render == 0:
-            self.report({'WARNING'}, 'No frames to render')
-            return {'CANCELLED'}
-        
         current_frame_index = 0
-        
-        # Process each rig item
+
+        # Sampling grids for direct reprojection, persisted across frames and runs
+        grid_cache = lut_cache.LutCache(
+            max_bytes=getattr(scene, 'colmap_rig_lut_cache_size', 0) * 1024 * 1024
+        )
+
+        def finish_frame(key, error):
+            """Book-keeping once a frame is on disk (or failed), possibly after its EXIF job."""
+            nonlocal total_frames
+            rig_name, cam_name, frame = key
+            if not error and shards is not None:
+                try:
+                    with timings.phase('write', rig_name, cam_name):
+                        shards.add(rig_name, cam_name, output_io.frame_output_path(frame_base, rig_name, cam_name, frame, ext))
+                except Exception as e:
+                    error = f'packing into shard failed: {e}'
+            if error:
+                print(f"Error: rendering {rig_name}/{cam_name} frame {frame} failed: {error}")
+                failed.append({'rig': rig_name, 'camera': cam_name, 'frame': frame, 'error': error})
+                path = output_io.frame_output_path(frame_base, rig_name, cam_name, frame, ext)
+                output_io.discard(output_io.partial_path(path))
+                if shards is not None:
+                    output_io.discard(path)
+                return
+            total_frames += 1
+            if manifest is not None:
+                manifest.record(rig_name, cam_name, frame, fingerprints[(rig_name, cam_name)])
+            if level_pool is not None:
+                submit_levels(key)
+
+        # Movies are decoded front to back once per run; rigs on the same footage share the frames
+        frames_on_disk = frame_cache.FrameCache(
+            max_bytes=getattr(scene, 'colmap_rig_frame_cache_size', 0) * 1024 * 1024
+        )
+        movie_decoders = movie_decoder.DecoderPool(disk_cache=frames_on_disk if frames_on_disk.enabled else None)
+        pending_frames = {}
+        for rig_name, _, frame in pending:
+            pending_frames.setdefault(rig_name, set()).add(frame)
         for rig_item in scene.rig_collection:
-            # Skip if collection doesn't exist
-            if not rig_item.collection or rig_item.collection.name not in bpy.data.collections:
-                continue
-            
-            # Set world per rig type (ensure equirect rigs use their world, perspective uses none)
-            try:
-                if getattr(rig_item, 'rig_type', 'EQUIRECT_360') == 'EQUIRECT_360':
-                    world_name = f"World_{rig_item.name}"
-                    if world_name in bpy.data.worlds:
-                        scene.world = bpy.data.worlds[world_name]
-                else:
-                    scene.world = None
-            except Exception:
-                pass
+            if rig_item.do_render and rig_item.name in pending_frames and _decodes_movie(rig_item):
+                movie_decoders.want(
+                    bpy.path.abspath(rig_item.source_filepath),
+                    [frame_source.source_frame_number(rig_item, f) for f in pending_frames[rig_item.name]],
+                )
 
-            # Apply this rig's resolution settings
-            scene.render.resolution_x = rig_item.render_resolution[0]
-            scene.render.resolution_y = rig_item.render_resolution[1]
-            
-            coll = rig_item.collection
+        # Frames are written under frame_base: the output folder, or a local staging folder when packing
+        frame_base = tempfile.mkdtemp(prefix='colmap_rig_stage_') if shards is not None else out_base
+
+        # Process each rig item; EXIF is injected by a background pool while the next frame renders
+        exif_pool = exif_writer.ExifWriterPool()
+        # Write-behind: encoding and saving move off the main thread (pool started on first use)
+        use_write_behind = getattr(scene, 'colmap_rig_write_behind', False)
+        writer_pool = None
+
+        # Initialize progress
+        context.window_manager.progress_begin(0, 100)
+        # Temporarily disable auto-camera-switching during rendering
+        scene.sel_cam_active = False
+        # Everything changed from here on is put back in the finally block, also on errors and cancel
+        try:
+            for rig_item in scene.rig_collection:
+                # Skip if collection doesn't exist
+                if not rig_item.collection or rig_item.collection.name not in bpy.data.collections:
+                    continue
             
-            # Get cameras that are not disabled in renders
-            cams = [
-                obj for obj in coll.objects
-                if obj.type == 'CAMERA' and not obj.hide_render
-            ]
+                # Set world per rig type (ensure equirect rigs use their world, perspective uses none)
+                with timings.phase('world', rig_item.name):
+                    try:
+                        if getattr(rig_item, 'rig_type', 'EQUIRECT_360') == 'EQUIRECT_360':
+                            # World media is loaded lazily; render from the original, not the viewport proxy
+                            world = rig_manager.ensure_world_image(rig_item, for_render=True)
+                            if world is not None:
+                                scene.world = world
+                        else:
+                            scene.world = None
+                    except Exception:
+                        pass
+
+                # Apply this rig's resolution settings
+                scene.render.resolution_x = rig_item.render_resolution[0]
+                scene.render.resolution_y = rig_item.render_resolution[1]
             
-            if not cams:
-                continue
+                coll = rig_item.collection
             
-            # Create folder structure if include_in_json is True
-            if rig_item.include_in_json:
-                for cam in cams:
-                    cam_folder = os.path.join(out_base, rig_item.name, cam.name)
-                    os.makedirs(cam_folder, exist_ok=True)
+                # Get cameras that are not disabled in renders
+                cams = [
+                    obj for obj in coll.objects
+                    if obj.type == 'CAMERA' and not obj.hide_render
+                ]
             
-            # Only render if do_render is True
-            if not rig_item.do_render:
-                continue
+                if not cams:
+                    continue
             
-            # Use rig item's frame settings
-            start = rig_item.start_frame
-            end = rig_item.end_frame
-            step = rig_item.frame_step
+                # Create folder structure if include_in_json is True (packed output is unpacked on demand)
+                if rig_item.include_in_json and shards is None:
+                    for cam in cams:
+                        cam_folder = os.path.join(out_base, rig_item.name, cam.name)
+                        os.makedirs(cam_folder, exist_ok=True)
+                        for factor in level_factors:
+                            os.makedirs(os.path.join(pyramid.level_dir(out_base, factor), rig_item.name, cam.name), exist_ok=True)
             
-            # Render frames
-            for frame in range(start, end + 1, step):
-                scene.frame_set(frame)
-                
+                # Only render if do_render is True
+                if not rig_item.do_render:
+                    continue
+
+                # Drop temp files of an interrupted run so they can't be mistaken for frames
                 for cam in cams:
-                    # Configure compositor for Perspective rigs if requested
-                    try:
-                        rig_type = getattr(rig_item, 'rig_type', 'EQUIRECT_360')
-                        use_comp = getattr(rig_item, 'use_compositor_media', False)
-                        src_path = getattr(rig_item, 'source_filepath', '')
-                    except Exception:
-                        rig_type, use_comp, src_path = 'EQUIRECT_360', False, ''
-
-                    if rig_type == 'PERSPECTIVE' and use_comp and src_path:
-                        scene.use_nodes = True
-                        if not scene.node_tree:
-                            scene.node_tree = bpy.data.node_groups.new('Compositing', 'CompositorNodeTree')
-                        nt = scene.node_tree
-                        # Ensure composite node exists
-                        comp = next((n for n in nt.nodes if n.type == 'COMPOSITE'), None)
-                        if not comp:
-                            comp = nt.nodes.new('CompositorNodeComposite')
-                            comp.location = (400, 0)
-                        src_type = getattr(rig_item, 'source_type', '')
-                        # Use Movie Clip node for videos
-                        if src_type == 'Movie Clip':
-                            clip_node = next((n for n in nt.nodes if n.name == 'RIG_MEDIA_CLIP' and n.type == 'MOVIECLIP'), None)
-                            if not clip_node:
-                                clip_node = nt.nodes.new('CompositorNodeMovieClip')
-                                clip_node.name = 'RIG_MEDIA_CLIP'
-                                clip_node.label = 'RIG_MEDIA_CLIP'
-                                clip_node.location = (0, -120)
-                            try:
-                                clip = bpy.data.movieclips.load(src_path, check_existing=True)
-                                clip_node.clip = clip
-                                # Clear composite input links
-                                while comp.inputs and comp.inputs[0].is_linked:
-                                    nt.links.remove(comp.inputs[0].links[0])
-                                nt.links.new(clip_node.outputs.get('Image'), comp.inputs[0])
-                            except Exception as e:
-                                print(f'Warning: compositor movie clip load failed: {e}')
-                        else:
-                            # Image node; for sequences, swap image per frame
-                            img_node = next((n for n in nt.nodes if n.name == 'RIG_MEDIA_IMAGE' and n.type == 'IMAGE'), None)
-                            if not img_node:
-                                img_node = nt.nodes.new('CompositorNodeImage')
-                                img_node.name = 'RIG_MEDIA_IMAGE'
-                                img_node.label = 'RIG_MEDIA_IMAGE'
-                                img_node.location = (0, 0)
-                            try:
-                                frame_path = src_path
-                                if src_type == 'Image Sequence':
-                                    p = Path(src_path)
-                                    stem = p.stem
-                                    m = re.match(r'(.+?)(\d+)$', stem)
-                                    if m:
-                                        base, digits = m.groups()
-                                        pad = len(digits)
-                                        frame_name = f"{base}{str(frame).zfill(pad)}{p.suffix}"
-                                        fp = Path(p.parent) / frame_name
-                                        if fp.exists():
-                                            frame_path = str(fp)
-                                img = bpy.data.images.load(frame_path, check_existing=True)
-                                img.source = 'FILE'
-                                img_node.image = img
-                                # Clear composite input links
-                                while comp.inputs and comp.inputs[0].is_linked:
-                                    nt.links.remove(comp.inputs[0].links[0])
-                                nt.links.new(img_node.outputs.get('Image'), comp.inputs[0])
-                            except Exception as e:
-                                print(f'Warning: compositor image load failed: {e}')
-                    else:
-                        # Disable compositor for non-composited passes
-                        scene.use_nodes = False
+                    os.makedirs(os.path.join(frame_base, rig_item.name, cam.name), exist_ok=True)
+                    output_io.remove_partial_files(os.path.join(frame_base, rig_item.name, cam.name))
+                    for factor in level_factors:
+                        output_io.remove_partial_files(os.path.join(pyramid.level_dir(out_base, factor), rig_item.name, cam.name))
 
-                    current_frame_index += 1
-                    progress = (current_frame_index / total_frames_to_render) * 100
-                    
-                    # Update progress in console and UI
-                    print(f"Rendering {current_frame_index}/{total_frames_to_render} ({progress:.1f}%) - {rig_item.name}/{cam.name} frame {frame}")
-                    context.window_manager.progress_update(current_frame_index / total_frames_to_render * 100)
-                    # Construct output path
-                    cam_folder = os.path.join(out_base, rig_item.name, cam.name)
-                    
-                    # Determine file extension from render settings
-                    file_format = scene.render.image_settings.file_format
-                    if file_format == 'JPEG':
-                        ext = 'jpg'
-                    elif file_format == 'PNG':
-                        ext = 'png'
-                    elif file_format == 'OPEN_EXR':
-                        ext = 'exr'
-                    elif file_format == 'TIFF':
-                        ext = 'tif'
+                # EXIF only depends on camera and resolution: build it once per camera
+                exif_bytes = {}
+                if _writes_exif(rig_item) and ext == 'jpg':
+                    exif_bytes = {cam.name: exif_writer.camera_exif_bytes(cam, scene) for cam in cams}
+            
+                # Use rig item's frame settings
+                start = rig_item.start_frame
+                end = rig_item.end_frame
+                step = rig_item.frame_step
+
+                rig_type = getattr(rig_item, 'rig_type', 'EQUIRECT_360')
+                use_comp = getattr(rig_item, 'use_compositor_media', False)
+
+                # Direct reprojection: sample the equirect source instead of rendering the world
+                use_reprojection = (
+                    rig_type == 'EQUIRECT_360'
+                    and getattr(rig_item, 'render_method', 'RENDER') == 'REPROJECT'
+                    and bool(rig_item.source_filepath)
+                )
+                out_width, out_height = output_io.output_size(scene, rig_item.render_resolution)
+                reprojection_image = None
+
+                # Passthrough: the output frames are the source frames, so copy them instead of rendering
+                if rig_type == 'PERSPECTIVE' and getattr(rig_item, 'render_method', 'RENDER') == 'PASSTHROUGH':
+                    reason = passthrough.unsupported_reason(rig_item, scene, ext, out_width, out_height)
+                    if reason:
+                        print(f"Warning: {rig_item.name}: passthrough not possible ({reason}), rendering instead")
                     else:
-                        ext = 'png'  # fallback
-                    
-                    # Use 4-digit zero padding with rig_name prefix
-                    filename = f'{rig_item.name}_image{str(frame).zfill(4)}.{ext}'
-                    filepath = os.path.join(cam_folder, filename)
-                    
-                    # Set scene camera and render
-                    scene.camera = cam
-                    scene.render.filepath = filepath
-                    
-                    bpy.ops.render.render(write_still=True)
+                        items = [
+                            ((rig_item.name, cam.name, frame), frame,
+                             output_io.frame_output_path(frame_base, rig_item.name, cam.name, frame, ext))
+                            for frame in range(start, end + 1, step)
+                            for cam in cams
+                            if (rig_item.name, cam.name, frame) in pending_set
+                        ]
+                        for key, error in passthrough.export_frames(rig_item, items, ext, scene):
+                            current_frame_index += 1
+                            print(f"Rendering {current_frame_index}/{total_frames_to_render} ({current_frame_index / total_frames_to_render * 100:.1f}%) - {key[0]}/{key[1]} frame {key[2]} (passthrough)")
+                            context.window_manager.progress_update(current_frame_index / total_frames_to_render * 100)
+                            finish_frame(key, error)
+                        finish_levels()
+                        if manifest is not None:
+                            manifest.save()
+                        rendered_count += 1
+                        continue
+
+                # Frame-major decode: one shared buffer feeds the world (equirect) or the
+                # compositor (perspective) for every camera instead of each render re-reading the media
+                env_node = _world_env_node(rig_item) if rig_type == 'EQUIRECT_360' else None
+                orig_env_image = env_node.image if env_node is not None else None
+                use_comp = use_comp and rig_type == 'PERSPECTIVE' and bool(rig_item.source_filepath)
+                # The world and the compositor read stills and sequences natively (one image load per
+                # frame, cached by Blender); only movies are worth decoding up front
+                use_shared_frame = (
+                    frame_source.can_decode(rig_item)
+                    and getattr(rig_item, 'source_type', '') == 'Movie Clip'
+                    and (env_node is not None or use_comp)
+                )
+                static_source = getattr(rig_item, 'source_type', '') not in ('Movie Clip', 'Image Sequence')
+                shared_frame = frame_source.SharedFrameImage()
+                src = None
+
+                # Per-rig state is put back even when a frame raises or the render is cancelled
+                comp_pipeline = None
+                profile_saved = []
+                multiview = None
+                grabber = None
+                try:
+                    # Compositor graph is built once per rig; frames only swap its input
+                    with timings.phase('compositor', rig_item.name):
+                        if use_comp:
+                            comp_pipeline = compositor_media.CompositorMediaPipeline(scene, rig_item)
+                            comp_pipeline.build(shared=use_shared_frame)
+                        else:
+                            # Disable compositor for non-composited passes
+                            scene.use_nodes = False
+
+                    # Per-rig render profile, restored once the rig is done (like resolution and camera)
+                    profile_saved = render_profiles.apply_profile(
+                        scene, getattr(rig_item, 'render_profile', 'SCENE'), scene.world
+                    )
+
+                    # Multi-view: one render call per frame produces every camera of the rig as a view
+                    if (
+                        rig_type == 'EQUIRECT_360' and not use_reprojection
+                        and getattr(rig_item, 'render_method', 'RENDER') == 'MULTIVIEW' and len(cams) > 1
+                    ):
+                        multiview = multiview_render.MultiViewRender(scene, cams)
+                        if not multiview.setup():
+                            multiview = None
+
+                    # Tap the composited result so frames can be encoded on the write-behind pool
+                    write_settings = None
+                    if use_write_behind and not use_reprojection and multiview is None:
+                        reason = write_behind.unsupported_reason(scene)
+                        if reason:
+                            print(f"Warning: {rig_item.name}: write-behind not possible ({reason}), writing on the main thread")
+                        else:
+                            grabber = write_behind.PixelGrabber(scene, use_compositor=comp_pipeline is not None)
+                            if grabber.setup():
+                                write_settings = write_behind.output_settings(scene)
+                                if writer_pool is None:
+                                    writer_pool = write_behind.WriteBehindPool()
+                            else:
+                                grabber = None
+
+                    # Render frames
+                    for frame in range(start, end + 1, step):
+                        frame_cams = [c for c in cams if (rig_item.name, c.name, frame) in pending_set]
+                        if not frame_cams:
+                            continue
+                        with timings.phase('frame_set', rig_item.name):
+                            scene.frame_set(frame)
+
+                        if not (static_source and src is not None):
+                            src = None
+                            if use_reprojection or use_shared_frame:
+                                with timings.phase('decode', rig_item.name):
+                                    src = frame_source.read_source_frame(rig_item, frame, movie_decoders)
+                                if src is None:
+                                    print(f"Warning: could not decode {rig_item.name} frame {frame}, rendering from the original media")
+
+                        frame_image = None
+                        if use_reprojection and src is not None:
+                            if reprojection_image is None:
+                                reprojection_image = bpy.data.images.new(
+                                    'COLMAP_RIG_reprojection', out_width, out_height,
+                                    alpha=True, float_buffer=src.is_float,
+                                )
+                                try:
+                                    reprojection_image.colorspace_settings.name = src.colorspace
+                                except Exception:
+                                    pass
+                            depsgraph = context.evaluated_depsgraph_get()
+                        elif use_shared_frame and static_source and shared_frame.image is not None:
+                            frame_image = shared_frame.image
+                        elif use_shared_frame and src is not None:
+                            with timings.phase('decode', rig_item.name):
+                                frame_image = shared_frame.load(src)
+                            if not static_source:
+                                # The bpy image now holds the only copy of this frame
+                                src = None
+                        if env_node is not None:
+                            with timings.phase('world', rig_item.name):
+                                env_node.image = frame_image if frame_image is not None else orig_env_image
+                        if comp_pipeline is not None:
+                            with timings.phase('compositor', rig_item.name):
+                                comp_pipeline.set_frame(frame, frame_image)
+
+                        view_files = {}
+                        multiview_error = None
+                        if multiview is not None:
+                            # Views are written next to the first camera's frames as partial files, then moved per camera
+                            mv_path = output_io.partial_path(output_io.frame_output_path(frame_base, rig_item.name, cams[0].name, frame, ext))
+                            with timings.phase('render', rig_item.name):
+                                try:
+                                    view_files = multiview.render(frame_cams, mv_path)
+                                except Exception as e:
+                                    multiview_error = str(e)
+
+                        for cam in frame_cams:
+                            current_frame_index += 1
+                            progress = (current_frame_index / total_frames_to_render) * 100
                     
-                    # Write EXIF data to JPEG files only if enabled and rig is not Perspective
-                    try:
-                        rig_type = getattr(rig_item, 'rig_type', 'EQUIRECT_360')
-                        write_exif = getattr(rig_item, 'write_exif', True)
-                    except Exception:
-                        rig_type, write_exif = 'EQUIRECT_360', True
-                    if rig_type != 'PERSPECTIVE' and write_exif:
-                        write_camera_exif(filepath, cam, scene)
+                            # Update progress in console and UI
+                            print(f"Rendering {current_frame_index}/{total_frames_to_render} ({progress:.1f}%) - {rig_item.name}/{cam.name} frame {frame}")
+                            context.window_manager.progress_update(current_frame_index / total_frames_to_render * 100)
+                            # Construct output path; frames are written to a temp file and renamed when complete
+                            filepath = output_io.frame_output_path(frame_base, rig_item.name, cam.name, frame, ext)
+                            tmp_filepath = output_io.partial_path(filepath)
                     
-                    total_frames += 1
-            
-            rendered_count += 1
-        
-        # End progress
-        context.window_manager.progress_end()
-        
-        # Restore original settings
-        scene.camera = original_camera
-        scene.render.filepath = orig_filepath
-        scene.frame_start = orig_frame_start
-        scene.frame_end = orig_frame_end
-        scene.frame_step = orig_frame_step
-        scene.render.resolution_x = orig_resolution_x
-        scene.render.resolution_y = orig_resolution_y
-        scene.sel_cam_active = orig_sel_cam_active
-        # Restore compositor link/state
-        try:
-            if original_composite_link and scene.node_tree:
-                nt = scene.node_tree
-                from_node_name, from_socket_name, comp_name, comp_input_name = original_composite_link
-                comp = nt.nodes.get(comp_name)
-                from_node = nt.nodes.get(from_node_name)
-                if comp and from_node:
-                    # Clear current link
-                    if comp.inputs and comp.inputs[0].is_linked:
-                        nt.links.remove(comp.inputs[0].links[0])
-                    nt.links.new(from_node.outputs.get(from_socket_name), comp.inputs[0])
-        except Exception:
-            pass
-        scene.use_nodes = orig_use_nodes
+                            # Set scene camera and render
+                            scene.camera = cam
+                            scene.render.filepath = tmp_filepath
+
+                            try:
+                                if use_reprojection and src is not None and cam.data.type == 'PERSP':
+                                    with timings.phase('render', rig_item.name, cam.name):
+                                        grid = _reprojection_grid(cam, depsgraph, out_width, out_height, src, grid_cache)
+                                        pixels = reprojection.reproject(src.pixels, grid)
+                                    with timings.phase('write', rig_item.name, cam.name):
+                                        _save_pixels(reprojection_image, pixels, tmp_filepath, scene)
+                                elif multiview is not None:
+                                    # Rendered above as one view of the frame's multi-view pass
+                                    if multiview_error:
+                                        raise RuntimeError(f'multi-view render failed: {multiview_error}')
+                                    output_io.commit(view_files[cam.name], tmp_filepath)
+                                elif grabber is not None:
+                                    with timings.phase('render', rig_item.name, cam.name):
+                                        bpy.ops.render.render()
+                                    with timings.phase('write', rig_item.name, cam.name):
+                                        write_pixels = grabber.grab()
+                                else:
+                                    # write_still saves inside the render call, so 'render' includes encoding here
+                                    with timings.phase('render', rig_item.name, cam.name):
+                                        bpy.ops.render.render(write_still=True)
+
+                                # EXIF insertion and the final rename run on the pool while the next camera renders
+                                key = (rig_item.name, cam.name, frame)
+                                if grabber is not None:
+                                    # Encoding, EXIF and the rename all run on the write-behind pool
+                                    writer_pool.submit(write_pixels, write_settings, exif_bytes.get(cam.name), tmp_filepath, filepath, key=key)
+                                    write_pixels = None
+                                elif cam.name in exif_bytes:
+                                    exif_pool.submit(exif_bytes[cam.name], tmp_filepath, filepath, key=key)
+                                else:
+                                    with timings.phase('write', rig_item.name, cam.name):
+                                        output_io.commit(tmp_filepath, filepath)
+                                    finish_frame(key, None)
+                            except Exception as e:
+                                finish_frame((rig_item.name, cam.name, frame), str(e))
+
+                            for key, error, seconds in exif_pool.pop_finished():
+                                timings.add('exif', key[0], key[1], seconds)
+                                finish_frame(key, error)
+                            if writer_pool is not None:
+                                for key, error, seconds in writer_pool.pop_finished():
+                                    timings.add('encode', key[0], key[1], seconds)
+                                    finish_frame(key, error)
+                            finish_levels()
+                finally:
+                    if reprojection_image is not None:
+                        bpy.data.images.remove(reprojection_image)
+                    if multiview is not None:
+                        multiview.restore()
+                    render_profiles.restore_profile(profile_saved)
+                    if grabber is not None:
+                        grabber.restore()
+                    if env_node is not None:
+                        env_node.image = orig_env_image
+                    if comp_pipeline is not None:
+                        comp_pipeline.release()
+                    shared_frame.release()
+                src = None
+                if manifest is not None:
+                    manifest.save()
+
+                rendered_count += 1
+        except BaseException:
+            # Drop queued EXIF jobs; frames already handed over finish and are renamed.
+            # finish_frame() discards the temp files of the cancelled ones
+            exif_pool.close(cancel=True)
+            for key, error, _ in exif_pool.pop_finished():
+                finish_frame(key, error)
+            if writer_pool is not None:
+                writer_pool.close(cancel=True)
+                for key, error, _ in writer_pool.pop_finished():
+                    finish_frame(key, error)
+            close_levels(cancel=True)
+            if shards is not None:
+                shards.close()
+                shutil.rmtree(frame_base, ignore_errors=True)
+            raise
+        else:
+            exif_pool.close()
+            for key, error, seconds in exif_pool.pop_finished():
+                timings.add('exif', key[0], key[1], seconds)
+                finish_frame(key, error)
+            if writer_pool is not None:
+                writer_pool.close()
+                for key, error, seconds in writer_pool.pop_finished():
+                    timings.add('encode', key[0], key[1], seconds)
+                    finish_frame(key, error)
+            # Levels are queued by finish_frame, so they close after the EXIF and write-behind pools
+            close_levels()
+            if shards is not None:
+                shards.close()
+                shutil.rmtree(frame_base, ignore_errors=True)
+            if manifest is not None:
+                manifest.save()
+        finally:
+            grid_cache.release()
+            movie_decoders.close()
+
+            # End progress
+            context.window_manager.progress_end()
+
+            # Restore original settings
+            scene.camera = original_camera
+            scene.render.filepath = orig_filepath
+            scene.frame_start = orig_frame_start
+            scene.frame_end = orig_frame_end
+            scene.frame_step = orig_frame_step
+            scene.render.resolution_x = orig_resolution_x
+            scene.render.resolution_y = orig_resolution_y
+            scene.sel_cam_active = orig_sel_cam_active
+            # Swap the viewport proxies back into the worlds that were rendered
+            for rig_item in scene.rig_collection:
+                env_node = _world_env_node(rig_item)
+                if env_node is not None and env_node.image is not None:
+                    rig_manager.ensure_world_image(rig_item)
+            # Restore compositor link/state
+            try:
+                if original_composite_link and scene.node_tree:
+                    nt = scene.node_tree
+                    from_node_name, from_socket_name, comp_name, comp_input_name = original_composite_link
+                    comp = nt.nodes.get(comp_name)
+                    from_node = nt.nodes.get(from_node_name)
+                    if comp and from_node:
+                        # Clear current link
+                        if comp.inputs and comp.inputs[0].is_linked:
+                            nt.links.remove(comp.inputs[0].links[0])
+                        nt.links.new(from_node.outputs.get(from_socket_name), comp.inputs[0])
+            except Exception:
+                pass
+            scene.use_nodes = orig_use_nodes
+
+        last_render_summary.clear()
+        last_render_summary.update(rendered=total_frames, rigs=rendered_count, failed=failed, skipped=skipped_count, output=out_base)
+        timings_note = ''
+        if timings.enabled and timings.samples:
+            last_render_summary['timings'] = timings.aggregate()
+            # Parallel workers share the output folder; their timings go into the worker result only
+            if not self.work_file:
+                try:
+                    timings_path = timings.write(out_base)
+                    timings_note = f'; time spent: {timings.summary()} (see {os.path.basename(timings_path)})'
+                except OSError as e:
+                    print(f"Warning: could not write render timings: {e}")
         
         if rendered_count == 0:
             self.report({'WARNING'}, 'No rigs marked for rendering')
             return {'CANCELLED'}
         
-        self.report({'INFO'}, f'Rendered {total_frames} frames for {rendered_count} rigs into {out_base}')
+        message = f'Rendered {total_frames} frames for {rendered_count} rigs into {out_base}'
+        if skipped_count:
+            message += f' ({skipped_count} already up to date)'
+        message += timings_note
+        if failed:
+            self.report({'WARNING'}, f'{message}; {len(failed)} frames failed (see console)')
+        else:
+            self.report({'INFO'}, message)
+        return {'FINISHED'}
+
+class COLMAP_RIG_OT_unpack_shards(Operator):
+    bl_idname = 'colmap_rig.unpack_shards'
+    bl_label = 'Unpack frame shards'
+    bl_description = 'Extract packed frames from {output}/_shards into the {rig}/{camera}/ folders referenced by rig_config.json'
+
+    def execute(self, context):
+        out_base = bpy.path.abspath(context.scene.render.filepath)
+        if not out_base or not os.path.isdir(os.path.join(out_base, shard_output.SHARD_DIR)):
+            self.report({'WARNING'}, f'No frame shards found in {out_base}')
+            return {'CANCELLED'}
+
+        wm = context.window_manager
+        wm.progress_begin(0, 100)
+        try:
+            extracted, skipped = shard_output.unpack(
+                out_base, progress=lambda done, total: wm.progress_update(done / total * 100)
+            )
+        except Exception as e:
+            self.report({'ERROR'}, f'Unpacking shards failed: {e}')
+            return {'CANCELLED'}
+        finally:
+            wm.progress_end()
+        self.report({'INFO'}, f'Unpacked {extracted} frames into {out_base} ({skipped} already up to date)')
         return {'FINISHED'}
 
 classes = (
     COLMAP_RIG_OT_render,
+    COLMAP_RIG_OT_unpack_shards,
 )
 
 def register():
@@ -0,0 +1,114 @@
+#reprojection.py
+"""Direct equirect-to-pinhole reprojection for EQUIRECT_360 rigs.
+
+An equirect rig only ever shows the world environment texture, so every pixel of
+a pinhole camera is a lookup into the source frame. This module reproduces the
+sampling Blender does (Generated texture coordinates -> Mapping node rotated
+90° around Z -> equirectangular Environment Texture with linear interpolation)
+with plain NumPy arrays, without going through bpy.ops.render.render.
+
+All pixel buffers use Blender's layout: float32 RGBA, rows ordered bottom-up
+(the same order as Image.pixels).
+"""
+import math
+
+import numpy as np
+
+# Must match the Mapping node rotation in rig_manager.create_or_update_world_material
+WORLD_ROTATION_Z = math.radians(90.0)
+
+
+def _world_rotation():
+    '''Rotation applied by the world Mapping node (Euler XYZ = (0, 0, 90°)).'''
+    c = math.cos(WORLD_ROTATION_Z)
+    s = math.sin(WORLD_ROTATION_Z)
+    return np.array((
+        (c, -s, 0.0),
+        (s,  c, 0.0),
+        (0.0, 0.0, 1.0),
+    ), dtype=np.float64)
+
+
+def focal_length_px(lens, sensor_width, width, height, sensor_height=None, sensor_fit='AUTO'):
+    '''Return the focal length in pixels the way Blender resolves the sensor fit.
+
+    AUTO fits the sensor width to the larger image dimension, HORIZONTAL to the
+    width and VERTICAL fits sensor_height to the height.
+    '''
+    if sensor_fit == 'VERTICAL' and sensor_height:
+        return lens / sensor_height * height
+    if sensor_fit == 'HORIZONTAL':
+        return lens / sensor_width * width
+    return lens / sensor_width * max(width, height)
+
+
+def build_sampling_grid(lens, sensor_width, width, height, rotation, src_width, src_height,
+                        sensor_height=None, sensor_fit='AUTO', shift_x=0.0, shift_y=0.0):
+    '''Compute the equirect source coordinate for every pixel of a pinhole camera.
+
+    rotation is the 3x3 rotation part of the camera's evaluated world matrix.
+    Returns a float32 array of shape (height, width, 2) holding continuous
+    (x, y) pixel coordinates into the source frame, where integer values are
+    texel centers. Rows are bottom-up like Image.pixels.
+    '''
+    f = focal_length_px(lens, sensor_width, width, height, sensor_height, sensor_fit)
+    size = max(width, height)
+
+    # Camera space ray through each pixel center (Blender cameras look down -Z, Y up)
+    xc = (np.arange(width, dtype=np.float64) + 0.5 - width / 2.0 + shift_x * size) / f
+    yc = (np.arange(height, dtype=np.float64) + 0.5 - height / 2.0 + shift_y * size) / f
+
+    # Camera -> world -> environment texture space
+    m = _world_rotation() @ np.asarray(rotation, dtype=np.float64).reshape(3, 3)
+    dx = m[0, 0] * xc[None, :] + m[0, 1] * yc[:, None] - m[0, 2]
+    dy = m[1, 0] * xc[None, :] + m[1, 1] * yc[:, None] - m[1, 2]
+    dz = m[2, 0] * xc[None, :] + m[2, 1] * yc[:, None] - m[2, 2]
+
+    # Blender's direction_to_equirectangular
+    u = -np.arctan2(dy, dx) / (2.0 * math.pi) + 0.5
+    v = np.arctan2(dz, np.hypot(dx, dy)) / math.pi + 0.5
+
+    grid = np.empty((height, width, 2), dtype=np.float32)
+    grid[..., 0] = u * src_width - 0.5
+    grid[..., 1] = v * src_height - 0.5
+    return grid
+
+
+def sample_bilinear(src, grid):
+    '''Bilinearly sample src at the coordinates in grid.
+
+    Columns wrap around at the ±180° seam, rows clamp at the poles.
+    src has shape (src_height, src_width, channels); the result has shape
+    grid.shape[:2] + (channels,) and dtype float32.
+    '''
+    src_h, src_w = src.shape[:2]
+    channels = src.shape[2]
+    flat = src.reshape(-1, channels)
+
+    x = grid[..., 0]
+    y = grid[..., 1]
+    x0f = np.floor(x)
+    y0f = np.floor(y)
+    fx = (x - x0f)[..., None]
+    fy = (y - y0f)[..., None]
+
+    x0 = np.mod(x0f.astype(np.int64), src_w)
+    x1 = x0 + 1
+    x1[x1 == src_w] = 0
+    y0 = y0f.astype(np.int64)
+    y1 = np.clip(y0 + 1, 0, src_h - 1)
+    np.clip(y0, 0, src_h - 1, out=y0)
+
+    row0 = y0 * src_w
+    row1 = y1 * src_w
+    top = np.take(flat, row0 + x0, axis=0) * (1.0 - fx) + np.take(flat, row0 + x1, axis=0) * fx
+    bottom = np.take(flat, row1 + x0, axis=0) * (1.0 - fx) + np.take(flat, row1 + x1, axis=0) * fx
+    return (top * (1.0 - fy) + bottom * fy).astype(np.float32, copy=False)
+
+
+def reproject(src, grid):
+    '''Produce an RGBA pinhole image from an equirect frame and a sampling grid.'''
+    out = sample_bilinear(src, grid)
+    if out.shape[2] == 4:
+        out[..., 3] = 1.0
+    return out
@@ -5,6 +5,11 @@ import mathutils
 from bpy.types import Operator
 from bpy.props import StringProperty
 
+try:
+    from . import pyramid
+except ImportError:
+    import pyramid
+
 
 def _get_evaluated_matrix(obj, depsgraph):
     '''Return the evaluated world matrix for an object using the depsgraph.'''
@@ -165,7 +170,21 @@ class COLMAP_RIG_OT_export(Operator):
         with open(json_path, 'w') as f:
             json.dump(rigs, f, indent=4)
 
-        self.report({'INFO'}, f'Exported {len(rigs)} rigs to {json_path}')
+        # Downscaled levels mirror the {rig}/{cam} tree, so they get the same config
+        level_paths = []
+        out_base = bpy.path.abspath(scene.render.filepath)
+        if out_base:
+            for factor in pyramid.level_factors(getattr(scene, 'colmap_rig_pyramid_levels', 0)):
+                level_path = os.path.join(pyramid.level_dir(out_base, factor), 'rig_config.json')
+                os.makedirs(os.path.dirname(level_path), exist_ok=True)
+                with open(level_path, 'w') as f:
+                    json.dump(rigs, f, indent=4)
+                level_paths.append(level_path)
+
+        message = f'Exported {len(rigs)} rigs to {json_path}'
+        if level_paths:
+            message += f' and {len(level_paths)} downscaled levels'
+        self.report({'INFO'}, message)
         return {'FINISHED'}
 
     
@@ -3,7 +3,14 @@ import bpy
 import os
 import math
 import pathlib
-import re
+import threading
+
+try:
+    from . import media_probe, proxy_media, sequence_index
+except ImportError:
+    import media_probe
+    import proxy_media
+    import sequence_index
 
 # Rig Item Property Group
 class RigItem(bpy.types.PropertyGroup):
@@ -117,6 +124,27 @@ class RigItem(bpy.types.PropertyGroup):
         description = 'For Perspective rigs: composite the media (movie/sequence) directly to the output frames',
         default = True
     )
+    render_method: bpy.props.EnumProperty(
+        name = 'Render Method',
+        description = 'How frames are produced (Direct Reprojection, Multi-View: Equirect rigs, Passthrough: Perspective rigs)',
+        items = [
+            ('RENDER', 'Blender Render', 'Render every camera with the scene render engine'),
+            ('REPROJECT', 'Direct Reprojection', 'Sample the equirect source directly with NumPy, no scene render (perspective cameras only)'),
+            ('MULTIVIEW', 'Multi-View', 'Equirect rigs: render all cameras of a frame in one render call as multi-view views'),
+            ('PASSTHROUGH', 'Passthrough', 'Perspective rigs: link/copy source frames into the output without rendering when size and format match'),
+        ],
+        default = 'RENDER'
+    )
+    # Render settings applied while this rig renders (see render_profiles)
+    render_profile: bpy.props.EnumProperty(
+        name = 'Render Profile',
+        description = 'Render settings used for this rig; restored after the rig is done',
+        items = [
+            ('SCENE', 'Scene Settings', 'Render with the scene\'s engine, samples, denoiser and view transform'),
+            ('REPROJECTION', 'Fast Reprojection', 'Equirect rigs: 1 sample, no denoising or light bounces, Standard view transform, persistent data'),
+        ],
+        default = 'SCENE'
+    )
 
 
 ###########################################################################
@@ -174,6 +202,13 @@ def projected_frames_for_rig(rig_item: bpy.types.PropertyGroup) -> int:
     except Exception:
         return 0
 
+def sequence_frame_offset(rig_item):
+    """Return the image_user frame offset that maps rig frame 1 to the first file of a sequence."""
+    if rig_item.source_type != 'Image Sequence':
+        return 0
+    index = sequence_index.get_index(bpy.path.abspath(rig_item.source_filepath))
+    return index.first - 1 if index is not None else 0
+
 def create_perspective_camera(rig_item, context):
     """Create a single camera for perspective rig with movie clip as background."""
     if not rig_item.collection:
@@ -226,9 +261,131 @@ def remove_rig_collection(rig_item):
         bpy.data.collections.remove(coll)
         rig_item.collection = None
 
-def create_or_update_world_material(rig_item):
+def _world_env_node(world):
+    """Return the Environment Texture node of a rig world, if there is one."""
+    if world is None or not world.use_nodes or not world.node_tree:
+        return None
+    return next((n for n in world.node_tree.nodes if n.type == 'TEX_ENVIRONMENT'), None)
+
+def _same_path(a, b):
+    return os.path.normcase(os.path.normpath(bpy.path.abspath(a))) == os.path.normcase(os.path.normpath(bpy.path.abspath(b)))
+
+def _image_source(rig_item):
+    if rig_item.source_type == 'Movie Clip':
+        return 'MOVIE'
+    if rig_item.source_type == 'Image Sequence':
+        return 'SEQUENCE'
+    return 'FILE'
+
+def world_graph_is_valid(world):
+    """Cheap check that a rig world still has its node graph (environment texture feeding the world output)."""
+    env_tex = _world_env_node(world)
+    if env_tex is None:
+        return False
+    output = next((n for n in world.node_tree.nodes if n.type == 'OUTPUT_WORLD'), None)
+    return output is not None and output.inputs['Surface'].is_linked and env_tex.outputs['Color'].is_linked
+
+def viewport_media_path(rig_item, build=True):
+    """Return the media file the viewport shows for the rig: its proxy once built, else the source.
+
+    A missing proxy is built in the background (unless build is False) and swapped in by refresh_proxy_users().
+    """
+    filepath = rig_item.source_filepath
+    scene = rig_item.id_data
+    if not filepath or bpy.app.background or not getattr(scene, 'colmap_rig_use_proxy', True):
+        return filepath
+    return proxy_media.viewport_path(
+        bpy.path.abspath(filepath), rig_item.source_type,
+        getattr(scene, 'colmap_rig_proxy_width', 2048), on_ready=refresh_proxy_users, build=build,
+    )
+
+def refresh_proxy_users(src_path):
+    """Swap a freshly built proxy into the worlds and camera backgrounds of every rig using src_path."""
+    for scene in bpy.data.scenes:
+        if not hasattr(scene, 'rig_collection'):
+            continue
+        for item in scene.rig_collection:
+            if not item.source_filepath or not _same_path(item.source_filepath, src_path):
+                continue
+            if item.rig_type == 'EQUIRECT_360':
+                # Worlds whose media hasn't been loaded yet pick up the proxy when they are activated
+                env_tex = _world_env_node(bpy.data.worlds.get(f"World_{item.name}"))
+                if env_tex is not None and env_tex.image is not None:
+                    ensure_world_image(item)
+            elif item.collection:
+                for cam in item.collection.objects:
+                    if cam.type == 'CAMERA' and cam.data.background_images:
+                        set_camera_background_image_for_perspective(item, cam)
+
+def world_image_is_current(rig_item, env_tex, filepath=None):
+    """Return True if env_tex already shows filepath (default: the rig's media) with the rig's frame mapping."""
+    if filepath is None:
+        filepath = rig_item.source_filepath
+    filepath = filepath.strip() if filepath else ''
+    img = env_tex.image
+    if not filepath:
+        return img is None
+    if img is None or not _same_path(img.filepath, filepath) or img.source != _image_source(rig_item):
+        return False
+    if rig_item.source_type in ['Movie Clip', 'Image Sequence'] and rig_item.media_frame_count > 0:
+        user = env_tex.image_user
+        return user.frame_duration == rig_item.media_frame_count and user.frame_offset == sequence_frame_offset(rig_item)
+    return True
+
+def assign_world_image(rig_item, env_tex, filepath=None):
+    """Load filepath (default: the rig's media) and assign it to the world's Environment Texture node."""
+    if filepath is None:
+        filepath = rig_item.source_filepath
+    if not (filepath and filepath.strip()):
+        env_tex.image = None
+        return
+    try:
+        # Load image or movie
+        old_img = env_tex.image
+        img = bpy.data.images.load(filepath, check_existing=True)
+        
+        # Set image source type BEFORE assigning to texture
+        img.source = _image_source(rig_item)
+        
+        # Assign image to texture
+        env_tex.image = img
+        # Free the image swapped out (e.g. the full-resolution source after a render)
+        if old_img is not None and old_img != img and old_img.users == 0:
+            bpy.data.images.remove(old_img)
+        
+        # Configure image_user for animated textures
+        if rig_item.source_type in ['Movie Clip', 'Image Sequence']:
+            env_tex.image_user.use_auto_refresh = True
+            env_tex.image_user.use_cyclic = False
+            env_tex.image_user.frame_start = 1
+            if rig_item.media_frame_count > 0:
+                env_tex.image_user.frame_duration = rig_item.media_frame_count
+                env_tex.image_user.frame_offset = sequence_frame_offset(rig_item)
+        
+    except Exception as e:
+        print(f"Error loading image for world material: {e}")
+
+def ensure_world_image(rig_item, for_render=False):
+    """Make sure the rig's world exists and shows its media, loading the image only if needed.
+
+    Called when a rig becomes active (viewport proxy) or is about to render (for_render,
+    the original source); returns the world or None.
+    """
+    if rig_item.rig_type != 'EQUIRECT_360':
+        return None
+    filepath = rig_item.source_filepath if for_render else viewport_media_path(rig_item)
+    world = bpy.data.worlds.get(f"World_{rig_item.name}")
+    if world is None or not world_graph_is_valid(world):
+        world = create_or_update_world_material(rig_item, load_image=False)
+    env_tex = _world_env_node(world)
+    if not world_image_is_current(rig_item, env_tex, filepath):
+        assign_world_image(rig_item, env_tex, filepath)
+    return world
+
+def create_or_update_world_material(rig_item, load_image=True):
     """Create or update world material with environment texture for the rig.
-    Only creates world material for EQUIRECT_360 rigs."""
+    Only creates world material for EQUIRECT_360 rigs.
+    With load_image=False the graph is built without media; ensure_world_image() adds it later."""
     
     # Only create world material for equirect rigs
     if rig_item.rig_type != 'EQUIRECT_360':
@@ -262,34 +419,9 @@ def create_or_update_world_material(rig_item):
     env_tex = nodes.new(type='ShaderNodeTexEnvironment')
     env_tex.location = (400, 0)
     
-    # Set image/movie if filepath exists
-    if rig_item.source_filepath and rig_item.source_filepath.strip():
-        try:
-            # Load image or movie - always load to ensure we have the latest
-            img = bpy.data.images.load(rig_item.source_filepath, check_existing=True)
-            
-            # Set image source type BEFORE assigning to texture
-            if rig_item.source_type == 'Movie Clip':
-                img.source = 'MOVIE'
-            elif rig_item.source_type == 'Image Sequence':
-                img.source = 'SEQUENCE'
-            else:
-                img.source = 'FILE'
-            
-            # Assign image to texture
-            env_tex.image = img
-            
-            # Configure image_user for animated textures
-            if rig_item.source_type in ['Movie Clip', 'Image Sequence']:
-                env_tex.image_user.use_auto_refresh = True
-                env_tex.image_user.use_cyclic = False
-                env_tex.image_user.frame_start = 1
-                if rig_item.media_frame_count > 0:
-                    env_tex.image_user.frame_duration = rig_item.media_frame_count
-                    env_tex.image_user.frame_offset = 0
-            
-        except Exception as e:
-            print(f"Error loading image for world material: {e}")
+    # Set image/movie (viewport proxy when available) if filepath exists
+    if load_image:
+        assign_world_image(rig_item, env_tex, viewport_media_path(rig_item))
     
     background = nodes.new(type='ShaderNodeBackground')
     background.location = (600, 0)
@@ -309,7 +441,7 @@ def set_camera_background_image_for_perspective(rig_item, cam_obj):
     """Attach or update the camera background image for a perspective rig camera.
     This is viewport-only; it does not render into final frames.
     """
-    filepath = rig_item.source_filepath
+    filepath = viewport_media_path(rig_item)
     if not filepath:
         return
 
@@ -337,6 +469,7 @@ def set_camera_background_image_for_perspective(rig_item, cam_obj):
         bg.image_user.frame_start = 1
         if rig_item.media_frame_count > 0:
             bg.image_user.frame_duration = rig_item.media_frame_count
+            bg.image_user.frame_offset = sequence_frame_offset(rig_item)
 
 def remove_world_material(rig_item):
     """Remove the world material associated with the rig_item."""
@@ -385,77 +518,77 @@ def update_world_name(rig_item, context):
             world.name = new_world_name
             break
 
-def update_media_info(rig_item, context):
-    """Auto-detect media type and update frame count when source_filepath changes."""
-    
-    filepath = rig_item.source_filepath
-    if not filepath:
-        rig_item.source_type = 'Unknown'
-        rig_item.media_frame_count = 0
-        return
-    
+MOVIE_EXTS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpeg', '.mpg'}
+IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.exr', '.tif', '.tiff', '.bmp', '.tga', '.dpx'}
+
+def probe_media(filepath):
+    """Detect type, frame count and resolution of an absolute media path.
+
+    Only reads file headers and directory listings and never touches bpy data,
+    so it can run on a worker thread. Returns a dict that apply_media_info() applies.
+    """
+    result = {'source_type': 'Unknown', 'frame_count': 0, 'resolution': None, 'message': ''}
     path = pathlib.Path(filepath)
-    
-    # Valid extensions
-    MOVIE_EXTS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.m4v', '.mpeg', '.mpg'}
-    IMAGE_EXTS = {'.jpg', '.jpeg', '.png', '.exr', '.tif', '.tiff', '.bmp', '.tga', '.dpx'}
-    
     if not path.exists():
-        print(f"Warning: File does not exist: {filepath}")
-        rig_item.source_type = 'File not found'
-        return
-    
+        result['source_type'] = 'File not found'
+        result['message'] = f"Warning: File does not exist: {filepath}"
+        return result
+
     ext = path.suffix.lower()
-    
+    info = media_probe.probe(filepath) if ext in MOVIE_EXTS or ext in IMAGE_EXTS else None
+    if info:
+        result['resolution'] = (info['width'], info['height'])
+
     # Auto-detect type based on extension
     if ext in MOVIE_EXTS:
-        rig_item.source_type = 'Movie Clip'
-        
-        # Try to get movie clip frame count
+        result['source_type'] = 'Movie Clip'
+        # Frame count from the container header; None asks the main thread to load the clip
+        if info and info['frames'] > 0:
+            result['frame_count'] = info['frames']
+            result['message'] = f"Movie clip probed: {info['frames']} frames, {info['width']}x{info['height']} @ {info['fps']:.3f} fps"
+        else:
+            result['frame_count'] = None
+    elif ext in IMAGE_EXTS:
+        # For image sequences, look up the cached index of the directory (e.g., image_0001.png -> image_####.png)
+        index = sequence_index.get_index(filepath)
+        if index is not None:
+            result['source_type'] = 'Image Sequence'
+            # Rig frames run 1..span; sequences starting at e.g. 1001 are shifted via the image_user offset
+            result['frame_count'] = index.span
+            missing = sum(b - a + 1 for a, b in index.gaps)
+            result['message'] = f"Image sequence detected: {len(index.frames)} files ({index.first}-{index.last}, {missing} missing)"
+        else:
+            result['source_type'] = 'Single Image'
+            result['frame_count'] = 1
+    else:
+        result['source_type'] = 'Unknown format'
+        result['message'] = f"Warning: Unsupported file extension '{ext}'"
+    return result
+
+def apply_media_info(rig_item, result):
+    """Apply a probe_media() result to the rig and (re)build its world or camera background."""
+    filepath = rig_item.source_filepath
+    if result['message']:
+        print(result['message'])
+    rig_item.source_type = result['source_type']
+    if result['source_type'] == 'File not found':
+        return
+
+    frame_count = result['frame_count']
+    if result['source_type'] == 'Movie Clip' and frame_count is None:
         try:
             # Load movie clip temporarily to get frame count
             clip = bpy.data.movieclips.load(filepath)
             frame_count = clip.frame_duration
             bpy.data.movieclips.remove(clip)
-            
-            rig_item.media_frame_count = frame_count
-            rig_item.end_frame = frame_count
             print(f"Movie clip loaded: {frame_count} frames")
         except Exception as e:
             print(f"Error loading movie clip: {e}")
-        # No manual override; use detected frame count
-    
-    elif ext in IMAGE_EXTS:
-        # For image sequences, count files with frame numbers in the same directory
-        parent = path.parent
-        stem = path.stem
-        
-        # Try to detect sequence pattern (e.g., image_0001.png -> image_####.png)
-        match = re.match(r'(.+?)(\d+)$', stem)
-        if match:
-            rig_item.source_type = 'Image Sequence'
-            base_name, frame_num = match.groups()
-            pad_length = len(frame_num)
-            
-            # Count files matching pattern
-            count = 0
-            for file in parent.glob(f"{base_name}*{ext}"):
-                if re.match(rf'{re.escape(base_name)}\d{{{pad_length}}}{re.escape(ext)}$', file.name):
-                    count += 1
-            
-            if count > 0:
-                rig_item.media_frame_count = count
-                rig_item.end_frame = count
-                print(f"Image sequence detected: {count} frames")
-                # No manual override; use detected sequence count
-        else:
-            rig_item.source_type = 'Single Image'
-            rig_item.media_frame_count = 1
-            rig_item.end_frame = 1
-    else:
-        rig_item.source_type = 'Unknown format'
-        print(f"Warning: Unsupported file extension '{ext}'")
-    
+    # No manual override; use detected frame count
+    if frame_count:
+        rig_item.media_frame_count = frame_count
+        rig_item.end_frame = frame_count
+
     # Create appropriate setup based on rig type
     if rig_item.rig_type == 'EQUIRECT_360':
         # Create or update world material with the media
@@ -474,15 +607,122 @@ def update_media_info(rig_item, context):
                     print(f"Warning: Could not set camera background image: {e}")
         # Update rig resolution from media (update callback handles scene sync)
         try:
-            img = bpy.data.images.load(filepath, check_existing=True)
-            width = int(img.size[0]) if img.size[0] else 0
-            height = int(img.size[1]) if img.size[1] else 0
+            if result['resolution']:
+                width, height = result['resolution']
+            else:
+                img = bpy.data.images.load(filepath, check_existing=True)
+                width = int(img.size[0]) if img.size[0] else 0
+                height = int(img.size[1]) if img.size[1] else 0
             if width > 0 and height > 0:
                 # Respect minimum of 64; update callback syncs to scene automatically
                 rig_item.render_resolution = (max(64, width), max(64, height))
         except Exception as e:
             print(f"Warning: Could not load media to detect resolution: {e}")
 
+def update_media_info(rig_item, context, threaded=None):
+    """Auto-detect media type and update frame count when source_filepath changes.
+
+    In the UI the probe runs on a worker thread and is applied from a timer;
+    in background mode (no event loop for timers) it runs synchronously.
+    """
+    # Any newer edit supersedes a probe that is still running
+    cancel_media_probe(rig_item)
+
+    filepath = rig_item.source_filepath
+    if not filepath:
+        rig_item.source_type = 'Unknown'
+        rig_item.media_frame_count = 0
+        return
+
+    if threaded is None:
+        threaded = not bpy.app.background
+    if not threaded:
+        apply_media_info(rig_item, probe_media(bpy.path.abspath(filepath)))
+        return
+    start_media_probe(rig_item)
+
+
+###########################################################################
+### Background Probing ####################################################
+###########################################################################
+
+# Newest running probe per rig, keyed by (scene pointer, rig name); kept in Python only,
+# so nothing about a probe is saved to the .blend
+_probe_jobs = {}
+
+def _probe_key(rig_item):
+    # Rig items live in Scene.rig_collection, so id_data is the owning scene
+    return (rig_item.id_data.as_pointer(), rig_item.name)
+
+class _ProbeJob:
+    def __init__(self, key, filepath):
+        self.key = key
+        self.filepath = filepath
+        self.cancelled = threading.Event()
+        self.result = None
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='colmap_rig_probe', daemon=True)
+
+    def _run(self):
+        try:
+            result = probe_media(self.filepath)
+        except Exception as e:
+            result = {'source_type': 'Unknown', 'frame_count': 0, 'resolution': None, 'message': f"Error probing media: {e}"}
+        if not self.cancelled.is_set():
+            self.result = result
+        self.done.set()
+
+def is_probing(rig_item):
+    """Return True while a background probe for this rig is running."""
+    return _probe_key(rig_item) in _probe_jobs
+
+def cancel_media_probe(rig_item):
+    """Drop the probe still running for this rig, if any; its result is never applied."""
+    job = _probe_jobs.pop(_probe_key(rig_item), None)
+    if job is not None:
+        job.cancelled.set()
+
+def start_media_probe(rig_item):
+    """Probe the rig's media on a worker thread and apply the result from a timer."""
+    cancel_media_probe(rig_item)
+    key = _probe_key(rig_item)
+    job = _ProbeJob(key, bpy.path.abspath(rig_item.source_filepath))
+    _probe_jobs[key] = job
+    job.thread.start()
+    if not bpy.app.timers.is_registered(_poll_media_probes):
+        bpy.app.timers.register(_poll_media_probes, first_interval=0.1)
+
+def _poll_media_probes():
+    """Timer callback: apply finished probes on the main thread."""
+    for key, job in list(_probe_jobs.items()):
+        if not job.done.is_set():
+            continue
+        del _probe_jobs[key]
+        if job.cancelled.is_set() or job.result is None:
+            continue
+        scene_pointer, rig_name = key
+        scene = next((s for s in bpy.data.scenes if s.as_pointer() == scene_pointer), None)
+        if scene is None or not hasattr(scene, 'rig_collection'):
+            continue
+        rig_item = next((item for item in scene.rig_collection if item.name == rig_name), None)
+        # A rig renamed or re-pointed meanwhile has started (or needs) its own probe
+        if rig_item is not None and bpy.path.abspath(rig_item.source_filepath) == job.filepath:
+            try:
+                apply_media_info(rig_item, job.result)
+            except Exception as e:
+                print(f"Error applying media info: {e}")
+    _redraw_ui()
+    return 0.1 if _probe_jobs else None
+
+def _redraw_ui():
+    wm = bpy.context.window_manager
+    if wm is None:
+        return
+    for window in wm.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
 def update_collection_visibility(scene):
     """Show only the active rig collection in viewport, hide all others, and set it as active."""
     if not hasattr(scene, 'rig_collection') or not hasattr(scene, 'rig_index'):
@@ -514,11 +754,11 @@ def update_collection_visibility(scene):
                 if cameras:
                     scene.camera = cameras[-1]
                 
-                # Switch world material to this rig's world (only for equirect rigs)
+                # Switch world material to this rig's world (only for equirect rigs), loading its media on first use
                 if item.rig_type == 'EQUIRECT_360':
-                    world_name = f"World_{item.name}"
-                    if world_name in bpy.data.worlds:
-                        scene.world = bpy.data.worlds[world_name]
+                    world = ensure_world_image(item)
+                    if world is not None:
+                        scene.world = world
                 else:
                     # For perspective rigs, clear the world material
                     scene.world = None
@@ -541,42 +781,129 @@ def update_collection_visibility(scene):
                 scene.render.resolution_y = item.render_resolution[1]
 
 
-@bpy.app.handlers.persistent
-def update_collection_num_cameras(scene):
-    """
-    executed when appending or removing items from the rig_collection
-    """
+# Collection names whose cameras need recounting, per scene name (None marks every rig)
+_dirty_collections = {}
+# Rig collection names per scene name as of the last handler call
+_rig_signatures = {}
+# Seconds of quiet before dirty counts are flushed
+COUNT_DEBOUNCE = 0.05
 
-    for i, item in enumerate(scene.rig_collection):
+def _set_if_changed(owner, attr, value):
+    """Write a property only if it differs; every write queues another depsgraph update."""
+    if getattr(owner, attr) != value:
+        setattr(owner, attr, value)
+
+def recount_rig_cameras(scene, collection_names=None):
+    """Update num_cameras/num_inkl_cameras of the rigs whose collection is in collection_names (all if None)."""
+    for item in scene.rig_collection:
+        coll = item.collection
         # Default to zero if collection is missing
-        if not item.collection or item.collection.name not in bpy.data.collections:
-            item.num_cameras = 0
-            item.num_inkl_cameras = 0
+        if not coll or coll.name not in bpy.data.collections:
+            _set_if_changed(item, 'num_cameras', 0)
+            _set_if_changed(item, 'num_inkl_cameras', 0)
+            continue
+        if collection_names is not None and coll.name not in collection_names:
             continue
 
-        coll = item.collection
         cams = [obj for obj in coll.objects if obj.type == 'CAMERA']
-        item.num_cameras = len(cams)
-
+        _set_if_changed(item, 'num_cameras', len(cams))
         # Cameras included for export/render are those not hidden in render
-        included_cams = [cam for cam in cams if not getattr(cam, 'hide_render', False)]
-        item.num_inkl_cameras = len(included_cams)
+        _set_if_changed(item, 'num_inkl_cameras', sum(1 for cam in cams if not cam.hide_render))
+
+def _rig_signature(scene):
+    return tuple(item.collection.name if item.collection else '' for item in scene.rig_collection)
+
+def _flush_camera_counts():
+    """Timer callback: recount the rigs marked dirty since the last flush."""
+    pending = dict(_dirty_collections)
+    _dirty_collections.clear()
+    for scene_name, names in pending.items():
+        scene = bpy.data.scenes.get(scene_name)
+        if scene is not None and hasattr(scene, 'rig_collection'):
+            recount_rig_cameras(scene, None if None in names else names)
+    return None
+
+@bpy.app.handlers.persistent
+def update_collection_num_cameras(scene, depsgraph=None):
+    """
+    executed on depsgraph updates; recounts only rigs whose collection or cameras changed
+    """
+    if not hasattr(scene, 'rig_collection'):
+        return
+    if depsgraph is None:
+        recount_rig_cameras(scene)
+        return
+
+    dirty = set()
+    # Rigs added, removed or relinked to another collection
+    signature = _rig_signature(scene)
+    if _rig_signatures.get(scene.name) != signature:
+        _rig_signatures[scene.name] = signature
+        dirty.add(None)
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.Collection):
+            # Objects linked to or unlinked from the collection
+            dirty.add(id_data.name)
+        elif isinstance(id_data, bpy.types.Object) and id_data.type == 'CAMERA':
+            # Moving cameras around doesn't change the counts
+            if update.is_updated_transform and not update.is_updated_geometry:
+                continue
+            dirty.update(coll.name for coll in id_data.users_collection)
+    if not dirty:
+        return
+
+    _dirty_collections.setdefault(scene.name, set()).update(dirty)
+    if bpy.app.background:
+        _flush_camera_counts()
+        return
+    # Restart the timer so a burst of updates is flushed once it settles
+    if bpy.app.timers.is_registered(_flush_camera_counts):
+        bpy.app.timers.unregister(_flush_camera_counts)
+    bpy.app.timers.register(_flush_camera_counts, first_interval=COUNT_DEBOUNCE)
 
 @bpy.app.handlers.persistent
-def selected_camera_to_active(scene):
-    if scene.sel_cam_active and bpy.context.object is not None and bpy.context.object.type == 'CAMERA':
-        scene.camera = bpy.context.object
+def selected_camera_to_active(scene, depsgraph=None):
+    obj = bpy.context.object
+    if scene.sel_cam_active and obj is not None and obj.type == 'CAMERA' and scene.camera != obj:
+        scene.camera = obj
+
+def _world_is_current_on_load(rig_item, world):
+    """Return True if a saved rig world can be kept as is: valid graph, and no image yet or the source or its proxy."""
+    if world is None or not world_graph_is_valid(world):
+        return False
+    env_tex = _world_env_node(world)
+    # Media is loaded lazily, so a world saved without an image isn't stale
+    if env_tex.image is None:
+        return True
+    return world_image_is_current(rig_item, env_tex) or world_image_is_current(
+        rig_item, env_tex, viewport_media_path(rig_item, build=False)
+    )
 
 @bpy.app.handlers.persistent
 def rebuild_world_materials_on_load(dummy):
-    """Rebuild all world materials when file is loaded to ensure textures are properly reloaded."""
+    """Validate world materials when a file is loaded and rebuild only stale ones.
+
+    Media is not loaded here; the active rig gets its image in update_collection_visibility,
+    other rigs when they become active or render.
+    """
     try:
         scene = bpy.context.scene
-        if hasattr(scene, 'rig_collection'):
-            for item in scene.rig_collection:
-                if item.source_filepath and item.source_filepath.strip():
-                    create_or_update_world_material(item)
-            print(f"Rebuilt {len(scene.rig_collection)} world materials on file load")
+        if not hasattr(scene, 'rig_collection'):
+            return
+        rebuilt = 0
+        for item in scene.rig_collection:
+            if item.rig_type != 'EQUIRECT_360' or not (item.source_filepath and item.source_filepath.strip()):
+                continue
+            if _world_is_current_on_load(item, bpy.data.worlds.get(f"World_{item.name}")):
+                continue
+            create_or_update_world_material(item, load_image=False)
+            rebuilt += 1
+        if rebuilt:
+            print(f"Rebuilt {rebuilt} of {len(scene.rig_collection)} world materials on file load")
+        # The active rig's world is shown right away, so it gets its media now
+        if 0 <= scene.rig_index < len(scene.rig_collection):
+            ensure_world_image(scene.rig_collection[scene.rig_index])
     except Exception as e:
         print(f"Error rebuilding world materials on load: {e}")
     
@@ -834,7 +1161,10 @@ class UIListPanelRigCollection(bpy.types.Panel):
             rowm.prop(item, 'source_filepath', text='Path')
             rowm.operator('object.rig_browse_media', text='', icon='FILEBROWSER')
             rowm = media_box.row(align=True)
-            rowm.label(text=f'Auto: {item.media_frame_count}', icon='TIME')
+            if is_probing(item):
+                rowm.label(text='Probing…', icon='SORTTIME')
+            else:
+                rowm.label(text=f'Auto: {item.media_frame_count}', icon='TIME')
             
             # For perspective rigs, show camera creation button if no camera exists
             if item.rig_type == 'PERSPECTIVE' and item.collection:
@@ -873,6 +1203,10 @@ class UIListPanelRigCollection(bpy.types.Panel):
             comp_cell = flags_grid.column()
             comp_cell.enabled = (item.rig_type == 'PERSPECTIVE')
             comp_cell.prop(item, 'use_compositor_media')
+            method_row = flags_box.row()
+            method_row.prop(item, 'render_method', text='Method')
+            profile_row = flags_box.row()
+            profile_row.prop(item, 'render_profile', text='Profile')
 
 
         else:
@@ -926,4 +1260,11 @@ def unregister():
 
     bpy.app.handlers.depsgraph_update_post.remove(update_collection_num_cameras)
     bpy.app.handlers.depsgraph_update_post.remove(selected_camera_to_active)
-    bpy.app.handlers.load_post.remove(rebuild_world_materials_on_load)
\ No newline at end of file
+    bpy.app.handlers.load_post.remove(rebuild_world_materials_on_load)
+    if bpy.app.timers.is_registered(_flush_camera_counts):
+        bpy.app.timers.unregister(_flush_camera_counts)
+    for key in list(_probe_jobs):
+        _probe_jobs.pop(key).cancelled.set()
+    if bpy.app.timers.is_registered(_poll_media_probes):
+        bpy.app.timers.unregister(_poll_media_probes)
+    proxy_media.cancel_all()
@@ -0,0 +1,129 @@
+#sequence_index.py
+"""In-memory index of numbered image sequences.
+
+A directory is scanned once and every sequence in it (files sharing a name
+prefix and extension, e.g. shot_0001.jpg .. shot_0480.jpg) is indexed with its
+frame numbers, padding, gaps and file sizes. The scan is cached per directory
+and redone only when the directory's mtime changes, so media probing and the
+per-frame lookups of the renderer don't hit the file system again.
+
+Rig frames count from 1: rig frame f shows file number first + f - 1, which
+matches the image_user frame offset set on the world and background images.
+"""
+import bisect
+import os
+import re
+import threading
+from pathlib import Path
+
+SEQUENCE_STEM_RE = re.compile(r'(.+?)(\d+)$')
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class SequenceIndex:
+    '''Frame numbers and file names of one image sequence.'''
+
+    def __init__(self, directory, base, ext, files):
+        self.directory = directory
+        self.base = base
+        self.ext = ext
+        # {file number: (file name, size in bytes)}
+        self.files = files
+        self.frames = sorted(files)
+        lengths = {len(name) - len(base) - len(ext) for name, _ in files.values()}
+        # 0 means unpadded (digit count varies)
+        self.padding = lengths.pop() if len(lengths) == 1 else 0
+
+    @property
+    def first(self):
+        return self.frames[0]
+
+    @property
+    def last(self):
+        return self.frames[-1]
+
+    @property
+    def span(self):
+        '''Number of rig frames covered, including missing files.'''
+        return self.last - self.first + 1
+
+    @property
+    def gaps(self):
+        '''Missing file numbers between first and last as inclusive (start, end) ranges.'''
+        gaps = []
+        for a, b in zip(self.frames, self.frames[1:]):
+            if b - a > 1:
+                gaps.append((a + 1, b - 1))
+        return gaps
+
+    def size(self, number):
+        entry = self.files.get(number)
+        return entry[1] if entry else None
+
+    def number_for_frame(self, frame):
+        '''Return the file number shown at rig frame `frame`; missing files hold the previous frame.'''
+        number = self.first + max(frame, 1) - 1
+        if number in self.files:
+            return number
+        i = bisect.bisect_right(self.frames, number)
+        return self.frames[max(i - 1, 0)]
+
+    def path(self, number):
+        return os.path.join(self.directory, self.files[number][0])
+
+    def frame_path(self, frame):
+        '''Return the file shown at rig frame `frame`.'''
+        return self.path(self.number_for_frame(frame))
+
+
+def _scan(directory):
+    '''Index every numbered file of directory: {(base, lower-case ext): SequenceIndex}.'''
+    groups = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            name = entry.name
+            stem, ext = os.path.splitext(name)
+            m = SEQUENCE_STEM_RE.match(stem)
+            if not m or not ext:
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                size = entry.stat().st_size
+            except OSError:
+                continue
+            base, digits = m.groups()
+            groups.setdefault((base, ext.lower()), {})[int(digits)] = (name, size)
+    return {
+        key: SequenceIndex(directory, key[0], key[1], files)
+        for key, files in groups.items()
+    }
+
+
+def get_index(path):
+    '''Return the SequenceIndex the file at path belongs to, or None if it has no frame number.'''
+    p = Path(path)
+    m = SEQUENCE_STEM_RE.match(p.stem)
+    if not m:
+        return None
+    directory = str(p.parent)
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+    with _cache_lock:
+        cached = _cache.get(directory)
+        if cached is None or cached[0] != mtime:
+            try:
+                cached = (mtime, _scan(directory))
+            except OSError:
+                return None
+            _cache[directory] = cached
+    return cached[1].get((m.group(1), p.suffix.lower()))
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
@@ -0,0 +1,234 @@
+#shard_output.py
+"""Packed output: rendered frames appended to per-camera tar shards.
+
+Instead of one file per frame under {out}/{rig}/{cam}/, frames are rendered
+into a local staging folder and appended to uncompressed tar shards in
+{out}/_shards/{rig}/{cam}/. A shard grows sequentially up to SHARD_MAX_BYTES.
+Its .idx file gets one JSON line per frame (data offset and size), written
+after the frame's bytes are flushed, so a crash never indexes a partial frame.
+Every process writes its own shards, which lets parallel workers share an
+output folder without locking.
+
+Members are stored as {rig}/{cam}/{file}, so `tar -xf` of any shard already
+recreates the COLMAP layout. unpack() does the same from the indices (the
+newest copy of a frame wins) and skips files that are already extracted.
+It needs no Blender:
+
+    python shard_output.py /renders [/dataset]
+"""
+import argparse
+import json
+import os
+import shutil
+import tarfile
+import time
+
+try:
+    from . import output_io
+except ImportError:
+    import output_io
+
+SHARD_DIR = '_shards'
+INDEX_SUFFIX = '.idx'
+# Roll over to a new shard once the current one is this large
+SHARD_MAX_BYTES = 4 * 1024 * 1024 * 1024
+_COPY_CHUNK = 8 * 1024 * 1024
+
+
+def shard_folder(out_base, rig_name, cam_name):
+    '''Return the folder holding the shards of one camera.'''
+    return os.path.join(out_base, SHARD_DIR, rig_name, cam_name)
+
+
+def _padded(size):
+    return (size + tarfile.BLOCKSIZE - 1) // tarfile.BLOCKSIZE * tarfile.BLOCKSIZE
+
+
+class _ShardWriter:
+    '''Appends files to the shards of one camera, starting a new shard when the current one is full.'''
+
+    def __init__(self, folder, run_id):
+        self.folder = folder
+        self.run_id = run_id
+        self._seq = 0
+        self._tar = None
+        self._index = None
+        self.path = None
+
+    def _open(self):
+        os.makedirs(self.folder, exist_ok=True)
+        stem = f'{self.run_id}-{self._seq:03d}'
+        self._seq += 1
+        self.path = os.path.join(self.folder, f'{stem}.tar')
+        self._tar = tarfile.open(self.path, 'w', format=tarfile.PAX_FORMAT)
+        self._index = open(os.path.join(self.folder, f'{stem}{INDEX_SUFFIX}'), 'w')
+
+    def add(self, src_path, arcname):
+        '''Append src_path as arcname; return its index entry.'''
+        if self._tar is None or self._tar.offset >= SHARD_MAX_BYTES:
+            self.close()
+            self._open()
+        size = os.path.getsize(src_path)
+        info = tarfile.TarInfo(arcname)
+        info.size = size
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        with open(src_path, 'rb') as f:
+            self._tar.addfile(info, f)
+        self._tar.fileobj.flush()
+        entry = {
+            'name': os.path.basename(arcname),
+            'shard': os.path.basename(self.path),
+            # addfile() leaves the offset after the data and its padding
+            'offset': self._tar.offset - _padded(size),
+            'size': size,
+            'mtime': info.mtime,
+        }
+        self._index.write(json.dumps(entry) + '\n')
+        self._index.flush()
+        return entry
+
+    def close(self):
+        if self._tar is not None:
+            self._tar.close()
+            self._index.close()
+            self._tar = None
+            self._index = None
+
+
+class ShardStore:
+    '''The shards of one output folder: lookups for resume/incremental checks and appends for new frames.'''
+
+    def __init__(self, out_base):
+        self.out_base = out_base
+        # Sorts by start time, so shards of later runs override earlier copies of a frame
+        self.run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self._members = {}
+        self._writers = {}
+
+    def cameras(self):
+        '''Return the (rig, camera) pairs that have shards.'''
+        root = os.path.join(self.out_base, SHARD_DIR)
+        pairs = []
+        for rig_name in sorted(os.listdir(root)) if os.path.isdir(root) else ():
+            rig_folder = os.path.join(root, rig_name)
+            if os.path.isdir(rig_folder):
+                pairs.extend((rig_name, cam_name) for cam_name in sorted(os.listdir(rig_folder)))
+        return pairs
+
+    def members(self, rig_name, cam_name):
+        '''Return {file name: index entry} of a camera; the newest shard wins for duplicates.'''
+        key = (rig_name, cam_name)
+        if key in self._members:
+            return self._members[key]
+        members = {}
+        folder = shard_folder(self.out_base, rig_name, cam_name)
+        try:
+            names = sorted(n for n in os.listdir(folder) if n.endswith(INDEX_SUFFIX))
+        except OSError:
+            names = []
+        for name in names:
+            with open(os.path.join(folder, name)) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Last line of a shard whose writer was killed
+                        continue
+                    members[entry['name']] = entry
+        self._members[key] = members
+        return members
+
+    def contains(self, rig_name, cam_name, filename):
+        return filename in self.members(rig_name, cam_name)
+
+    def add(self, rig_name, cam_name, src_path):
+        '''Move a finished frame file into the camera's current shard.'''
+        writer = self._writers.get((rig_name, cam_name))
+        if writer is None:
+            writer = _ShardWriter(shard_folder(self.out_base, rig_name, cam_name), self.run_id)
+            self._writers[(rig_name, cam_name)] = writer
+        filename = os.path.basename(src_path)
+        entry = writer.add(src_path, f'{rig_name}/{cam_name}/{filename}')
+        self.members(rig_name, cam_name)[filename] = entry
+        os.remove(src_path)
+
+    def close(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers.clear()
+
+
+def _extract(shard_path, entry, path):
+    tmp_path = output_io.partial_path(path)
+    try:
+        with open(shard_path, 'rb') as src, open(tmp_path, 'wb') as dst:
+            src.seek(entry['offset'])
+            remaining = entry['size']
+            while remaining:
+                chunk = src.read(min(_COPY_CHUNK, remaining))
+                if not chunk:
+                    raise OSError(f'{shard_path} is truncated')
+                dst.write(chunk)
+                remaining -= len(chunk)
+        os.utime(tmp_path, (entry['mtime'], entry['mtime']))
+        output_io.commit(tmp_path, path)
+    except Exception:
+        output_io.discard(tmp_path)
+        raise
+
+
+def unpack(out_base, dest=None, progress=None):
+    '''Recreate {dest}/{rig}/{cam}/ frame files from the shards of out_base; return (extracted, skipped).
+
+    Files whose size and modification time match the index are skipped, so
+    unpacking again after an incremental render only writes the new frames.
+    progress(done, total) is called after every file if given.
+    '''
+    dest = dest or out_base
+    store = ShardStore(out_base)
+    jobs = []
+    for rig_name, cam_name in store.cameras():
+        folder = shard_folder(out_base, rig_name, cam_name)
+        for filename, entry in sorted(store.members(rig_name, cam_name).items()):
+            jobs.append((os.path.join(folder, entry['shard']), entry, os.path.join(dest, rig_name, cam_name, filename)))
+
+    extracted = skipped = 0
+    made = set()
+    for done, (shard_path, entry, path) in enumerate(jobs, 1):
+        try:
+            st = os.stat(path)
+            current = st.st_size == entry['size'] and int(st.st_mtime) == entry['mtime']
+        except OSError:
+            current = False
+        if current:
+            skipped += 1
+        else:
+            folder = os.path.dirname(path)
+            if folder not in made:
+                os.makedirs(folder, exist_ok=True)
+                made.add(folder)
+            _extract(shard_path, entry, path)
+            extracted += 1
+        if progress is not None:
+            progress(done, len(jobs))
+
+    # The rig JSON's image prefixes are relative to the unpacked folder
+    config = os.path.join(out_base, 'rig_config.json')
+    if os.path.abspath(dest) != os.path.abspath(out_base) and os.path.exists(config):
+        os.makedirs(dest, exist_ok=True)
+        shutil.copyfile(config, os.path.join(dest, 'rig_config.json'))
+    return extracted, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Unpack colmap_rig frame shards into the {rig}/{cam}/ layout.')
+    parser.add_argument('output', help='render output folder containing _shards')
+    parser.add_argument('dest', nargs='?', default='', help='folder to unpack into (default: the output folder)')
+    args = parser.parse_args(argv)
+    extracted, skipped = unpack(args.output, args.dest or None)
+    print(f'Unpacked {extracted} frames ({skipped} already up to date) into {args.dest or args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,319 @@
+"""Benchmark export, render, EXIF, media probing and depsgraph handlers on synthetic rigs.
+
+Run in background Blender; arguments go after "--":
+
+    blender -b --factory-startup --python tests/benchmark.py -- --output bench.json
+    blender -b --factory-startup --python tests/benchmark.py -- --baseline bench_baseline.json
+
+Synthetic equirect sources (image sequences, and movies when ffmpeg is on PATH)
+are generated per resolution, rigs with 1..24 cameras are built through the
+rig_manager API and every operation is timed. Results are written as JSON; with
+--baseline they are compared against a stored run and the script exits with 1
+if any timing regressed by more than --tolerance.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import bpy
+import numpy as np
+
+# Ensure add-on modules are importable
+EXT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if EXT_DIR not in sys.path:
+    sys.path.insert(0, EXT_DIR)
+
+import rig_manager as rm
+import rig_json_maker
+import renderer as rndr
+import exif_writer
+import frame_source
+import media_probe
+import sequence_index
+
+for module in (rm, rig_json_maker, rndr, exif_writer):
+    try:
+        module.register()
+    except Exception as e:
+        print(f"[BENCH] Register of {module.__name__} failed: {e}")
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='benchmark.py')
+    parser.add_argument('--resolutions', default='2048,4096,8192,12288', help='equirect source widths (height = width / 2)')
+    parser.add_argument('--cameras', default='1,6,24', help='camera counts per rig')
+    parser.add_argument('--frames', type=int, default=3, help='frames rendered per case')
+    parser.add_argument('--media', default='sequence,movie', help='source kinds: sequence, movie')
+    parser.add_argument('--methods', default='RENDER,REPROJECT', help='rig render methods to time')
+    parser.add_argument('--render-size', type=int, default=512, help='square output resolution per camera')
+    parser.add_argument('--handler-iterations', type=int, default=200)
+    parser.add_argument('--output', default='', help='results JSON (default: benchmark_results.json next to this script)')
+    parser.add_argument('--baseline', default='', help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write the results to --baseline instead of comparing')
+    parser.add_argument('--tolerance', type=float, default=0.15, help='allowed slowdown vs. baseline (0.15 = 15%%)')
+    parser.add_argument('--keep', action='store_true', help='keep generated media and renders')
+    args = parser.parse_args(argv)
+    args.resolutions = [int(v) for v in args.resolutions.split(',') if v]
+    args.cameras = [int(v) for v in args.cameras.split(',') if v]
+    args.media = [v for v in args.media.split(',') if v]
+    args.methods = [v for v in args.methods.split(',') if v]
+    return args
+
+
+# Synthetic media ###########################################################
+
+def equirect_pattern(width, height, frame):
+    '''Return an RGBA float32 equirect test frame (bottom-up rows) that changes per frame.'''
+    u = (np.arange(width, dtype=np.float32) + 0.5) / width
+    v = (np.arange(height, dtype=np.float32) + 0.5) / height
+    uu, vv = np.meshgrid(u, v)
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    pixels[..., 0] = uu
+    pixels[..., 1] = vv
+    pixels[..., 2] = 0.5 + 0.5 * np.sin(2.0 * math.pi * (8.0 * uu + 4.0 * vv + frame * 0.1))
+    pixels[..., 3] = 1.0
+    # Grid lines every 10 degrees give the reprojection something to resample
+    grid = (np.mod(uu * 36.0, 1.0) < 0.02) | (np.mod(vv * 18.0, 1.0) < 0.04)
+    pixels[grid, :3] = 1.0
+    return pixels
+
+
+def make_sequence(folder, width, height, frames):
+    '''Write an equirect JPEG sequence and return the path of its first frame.'''
+    os.makedirs(folder, exist_ok=True)
+    img = bpy.data.images.new('BENCH_source', width, height, alpha=True)
+    img.file_format = 'JPEG'
+    try:
+        for frame in range(1, frames + 1):
+            img.pixels.foreach_set(equirect_pattern(width, height, frame).ravel())
+            img.filepath_raw = os.path.join(folder, f'equirect_{frame:04d}.jpg')
+            img.save()
+    finally:
+        bpy.data.images.remove(img)
+    return os.path.join(folder, 'equirect_0001.jpg')
+
+
+def make_movie(sequence_first, path):
+    '''Encode the sequence into an mp4 with ffmpeg; return None when that is not possible.'''
+    if not frame_source.FFMPEG_PATH:
+        return None
+    pattern = os.path.join(os.path.dirname(sequence_first), 'equirect_%04d.jpg')
+    for codec in (['-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-g', '12'], ['-c:v', 'mpeg4', '-q:v', '3']):
+        cmd = [frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-framerate', '24', '-i', pattern] + codec + [path]
+        if subprocess.run(cmd).returncode == 0:
+            return path
+    return None
+
+
+# Scene setup ###############################################################
+
+def reset_scene(out_dir, render_size):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.samples = 1
+    scene.cycles.device = 'CPU'
+    scene.render.image_settings.file_format = 'JPEG'
+    scene.render.filepath = out_dir
+    scene.render.resolution_percentage = 100
+    scene.render.resolution_x = render_size
+    scene.render.resolution_y = render_size
+    return scene
+
+
+def build_rig(scene, name, num_cams, frames, method, render_size):
+    '''Create an equirect rig with num_cams cameras on a horizontal ring; the source is set by the caller.'''
+    item = scene.rig_collection.add()
+    item.name = name
+    item.rig_type = 'EQUIRECT_360'
+    coll = rm.create_rig_collection(item)
+    for i in range(num_cams):
+        camd = bpy.data.cameras.new(f'{name}_Cam{i:02d}')
+        camd.lens = 12.0
+        camd.sensor_width = 36.0
+        camo = bpy.data.objects.new(camd.name, camd)
+        camo.rotation_euler = (math.pi / 2, 0.0, 2.0 * math.pi * i / num_cams)
+        coll.objects.link(camo)
+    item.start_frame = 1
+    item.end_frame = frames
+    item.frame_step = 1
+    item.render_resolution = (render_size, render_size)
+    item.render_method = method
+    item.include_in_json = True
+    item.do_render = True
+    return item
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def time_camera_moves(context, item, iterations):
+    '''Return the time update_collection_num_cameras adds to a depsgraph update that moves a rig camera.'''
+    handlers = bpy.app.handlers.depsgraph_update_post
+    cam = item.collection.objects[0]
+
+    def moves():
+        for i in range(iterations):
+            cam.location.x = 0.001 * (i % 2)
+            context.view_layer.update()
+
+    registered = rm.update_collection_num_cameras in handlers
+    if registered:
+        handlers.remove(rm.update_collection_num_cameras)
+    try:
+        without, _ = timed(moves)
+        handlers.append(rm.update_collection_num_cameras)
+        with_handler, _ = timed(moves)
+    finally:
+        # Leave the handler registered exactly as it was found
+        if (rm.update_collection_num_cameras in handlers) != registered:
+            if registered:
+                handlers.append(rm.update_collection_num_cameras)
+            else:
+                handlers.remove(rm.update_collection_num_cameras)
+    cam.location.x = 0.0
+    return max(0.0, with_handler - without) / iterations
+
+
+# Cases #####################################################################
+
+def bench_case(case, source_path, args, work_dir, results):
+    res, media, num_cams, method = case
+    key = f'{media}_{res}_{num_cams}cam_{method.lower()}'
+    out_dir = os.path.join(work_dir, 'out', key)
+    scene = reset_scene(out_dir, args.render_size)
+    item = build_rig(scene, 'BenchRig', num_cams, args.frames, method, args.render_size)
+    context = bpy.context
+
+    # Media probing as triggered by setting the source path (synchronous in background mode),
+    # with the probe and sequence caches cleared so every case times a cold probe
+    media_probe.clear_cache()
+    sequence_index.clear_cache()
+    t, _ = timed(setattr, item, 'source_filepath', source_path)
+    results[f'{key}/update_media_info'] = t
+    item.end_frame = args.frames
+
+    # Depsgraph handlers run on every scene update
+    n = args.handler_iterations
+    t, _ = timed(lambda: [rm.update_collection_num_cameras(scene) for _ in range(n)])
+    results[f'{key}/handler_num_cameras'] = t / n
+    # Incremental path: a real depsgraph update from moving a camera, with and without the
+    # handler registered; the difference is what the handler adds to every update
+    results[f'{key}/handler_num_cameras_incremental'] = time_camera_moves(context, item, n)
+    t, _ = timed(lambda: [rm.selected_camera_to_active(scene) for _ in range(n)])
+    results[f'{key}/handler_camera_to_active'] = t / n
+
+    t, _ = timed(bpy.ops.colmap_rig.export, filepath=os.path.join(out_dir, 'rig_config.json'))
+    results[f'{key}/export'] = t
+
+    render_time, ret = timed(bpy.ops.colmap_rig.render)
+    rendered = rndr.last_render_summary.get('rendered', 0)
+    if 'FINISHED' not in ret or not rendered:
+        print(f"[BENCH] {key}: render failed ({ret}, {rndr.last_render_summary.get('failed')})")
+        return
+    results[f'{key}/render_total'] = render_time
+    results[f'{key}/render_per_frame'] = render_time / args.frames
+    results[f'{key}/render_per_camera'] = render_time / rendered
+
+    # EXIF insertion on the rendered JPEGs, timed separately from the render loop
+    if exif_writer.PIEXIF_AVAILABLE:
+        jpgs = []
+        for root, _, files in os.walk(out_dir):
+            jpgs += [os.path.join(root, f) for f in files if f.endswith('.jpg') and not f.startswith('.')]
+        if jpgs:
+            cam = item.collection.objects[0]
+            exif_bytes = exif_writer.camera_exif_bytes(cam, scene)
+            t, _ = timed(lambda: [exif_writer.insert_exif(exif_bytes, p) for p in jpgs])
+            results[f'{key}/exif_per_file'] = t / len(jpgs)
+    print(f"[BENCH] {key}: rendered {rendered} frames in {render_time:.3f}s")
+
+
+def compare(results, baseline, tolerance):
+    '''Print a comparison table and return the keys that got slower than tolerance allows.'''
+    regressions = []
+    print(f"[BENCH] {'metric':<60} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for key in sorted(results):
+        if key not in baseline:
+            continue
+        base, cur = baseline[key], results[key]
+        ratio = cur / base if base > 0 else float('inf')
+        flag = ''
+        if ratio > 1.0 + tolerance:
+            regressions.append(key)
+            flag = '  REGRESSION'
+        print(f"[BENCH] {key:<60} {base:>10.4f} {cur:>10.4f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix='colmap_rig_bench_')
+    results = {}
+    try:
+        for res in args.resolutions:
+            width, height = res, res // 2
+            media_dir = os.path.join(work_dir, 'media', str(res))
+            t, sequence = timed(make_sequence, os.path.join(media_dir, 'seq'), width, height, args.frames)
+            print(f"[BENCH] generated {width}x{height} sequence in {t:.1f}s")
+            sources = {'sequence': sequence}
+            if 'movie' in args.media:
+                movie = make_movie(sequence, os.path.join(media_dir, 'equirect.mp4'))
+                if movie:
+                    sources['movie'] = movie
+                else:
+                    print(f"[BENCH] skipping movie cases at {res}: ffmpeg not available or encoding failed")
+            for media in args.media:
+                if media not in sources:
+                    continue
+                for num_cams in args.cameras:
+                    for method in args.methods:
+                        bench_case((res, media, num_cams, method), sources[media], args, work_dir, results)
+            if not args.keep:
+                shutil.rmtree(os.path.join(work_dir, 'out'), ignore_errors=True)
+    finally:
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'blender': bpy.app.version_string,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'baseline')},
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_results.json')
+    if args.save_baseline and args.baseline:
+        output = args.baseline
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4, sort_keys=True)
+    print(f"[BENCH] wrote {len(results)} timings to {output}")
+
+    code = 0
+    if args.baseline and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f).get('results', {})
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"[BENCH] {len(regressions)} timings regressed by more than {args.tolerance:.0%}")
+            code = 1
+        else:
+            print('[BENCH] no regressions')
+    sys.exit(code)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Check that Direct Reprojection lands within a pixel of a Blender render of the same camera.
+
+Run in background Blender; arguments go after "--":
+
+    blender -b --factory-startup --python tests/reprojection_check.py -- --keep
+
+A synthetic float equirect encodes its own coordinates (longitude as cos/sin in
+R/G so it stays continuous across the ±180° seam, latitude in B). One rig with
+cameras at eight yaw angles (so at least one looks across the seam) and one
+pitched towards the pole is rendered with `Blender Render` and with
+`Direct Reprojection` to 32-bit EXR. Every output pixel's decoded source
+direction is compared between the two, in units of that pixel's own angular
+size. The script exits with 1 if any pixel is off by more than --tolerance pixels.
+"""
+import argparse
+import math
+import os
+import shutil
+import sys
+import tempfile
+
+import bpy
+import numpy as np
+
+# Ensure add-on modules are importable
+EXT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if EXT_DIR not in sys.path:
+    sys.path.insert(0, EXT_DIR)
+
+import rig_manager as rm
+import renderer as rndr
+
+for module in (rm, rndr):
+    try:
+        module.register()
+    except Exception as e:
+        print(f"[CHECK] Register of {module.__name__} failed: {e}")
+
+RIG_NAME = 'ReprojectionCheck'
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    parser = argparse.ArgumentParser(prog='reprojection_check.py')
+    parser.add_argument('--source-width', type=int, default=2048, help='equirect source width (height = width / 2)')
+    parser.add_argument('--size', type=int, default=256, help='square output resolution per camera')
+    parser.add_argument('--lens', type=float, default=24.0, help='camera focal length in mm (36 mm sensor)')
+    parser.add_argument('--tolerance', type=float, default=1.0, help='allowed error in output pixels')
+    parser.add_argument('--keep', action='store_true', help='keep the generated source and renders')
+    return parser.parse_args(argv)
+
+
+def coordinate_equirect(width, height):
+    '''Return an RGBA float32 equirect (bottom-up rows) whose pixels encode their longitude and latitude.'''
+    u = (np.arange(width, dtype=np.float32) + 0.5) / width
+    v = (np.arange(height, dtype=np.float32) + 0.5) / height
+    uu, vv = np.meshgrid(u, v)
+    pixels = np.empty((height, width, 4), dtype=np.float32)
+    pixels[..., 0] = 0.5 + 0.5 * np.cos(2.0 * math.pi * uu)
+    pixels[..., 1] = 0.5 + 0.5 * np.sin(2.0 * math.pi * uu)
+    pixels[..., 2] = vv
+    pixels[..., 3] = 1.0
+    return pixels
+
+
+def make_source(path, width, height):
+    img = bpy.data.images.new('CHECK_source', width, height, alpha=True, float_buffer=True)
+    try:
+        img.pixels.foreach_set(coordinate_equirect(width, height).ravel())
+        img.filepath_raw = path
+        img.file_format = 'OPEN_EXR'
+        img.save()
+    finally:
+        bpy.data.images.remove(img)
+    return path
+
+
+def decoded_directions(pixels):
+    '''Unit vectors of the source directions encoded in a rendered (h, w, 4) frame.'''
+    lon = np.arctan2(pixels[..., 1] - 0.5, pixels[..., 0] - 0.5)
+    lat = (pixels[..., 2] - 0.5) * math.pi
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def pixel_angles(size, lens, sensor):
+    '''Angular size (radians) of every pixel of a square rectilinear camera.'''
+    c = ((np.arange(size) + 0.5) / size - 0.5) * sensor
+    xx, yy = np.meshgrid(c, c)
+    cos_theta = lens / np.sqrt(xx * xx + yy * yy + lens * lens)
+    return (sensor / size) / lens * cos_theta * cos_theta
+
+
+def read_exr(path):
+    img = bpy.data.images.load(path)
+    try:
+        width, height = img.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        img.pixels.foreach_get(pixels)
+        return pixels.reshape(height, width, 4)
+    finally:
+        bpy.data.images.remove(img)
+
+
+def build_scene(out_dir, source_path, args):
+    bpy.ops.wm.read_homefile(use_empty=True)
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = 'CPU'
+    scene.render.image_settings.file_format = 'OPEN_EXR'
+    scene.render.image_settings.color_depth = '32'
+    scene.render.resolution_percentage = 100
+    scene.view_settings.view_transform = 'Standard'
+
+    item = scene.rig_collection.add()
+    item.name = RIG_NAME
+    item.rig_type = 'EQUIRECT_360'
+    coll = rm.create_rig_collection(item)
+    # Eight yaws cover the seam wherever the world mapping puts it; the last camera looks towards a pole
+    views = [(f'Yaw{yaw:03d}', 0.0, yaw) for yaw in range(0, 360, 45)] + [('Pitch60', 60.0, 20.0)]
+    for name, pitch, yaw in views:
+        camd = bpy.data.cameras.new(name)
+        camd.lens = args.lens
+        camd.sensor_width = 36.0
+        camo = bpy.data.objects.new(name, camd)
+        camo.rotation_euler = (math.radians(90.0 + pitch), 0.0, math.radians(yaw))
+        coll.objects.link(camo)
+    item.source_filepath = source_path
+    item.start_frame = 1
+    item.end_frame = 1
+    item.frame_step = 1
+    item.render_resolution = (args.size, args.size)
+    # One sample at the pixel center, as the reprojection samples
+    item.render_profile = 'REPROJECTION'
+    item.include_in_json = True
+    item.do_render = True
+    return scene, item, [name for name, _, _ in views]
+
+
+def render(scene, item, method, out_dir):
+    item.render_method = method
+    scene.render.filepath = out_dir
+    ret = bpy.ops.colmap_rig.render()
+    if 'FINISHED' not in ret or rndr.last_render_summary.get('failed'):
+        raise RuntimeError(f"{method} render failed: {ret} {rndr.last_render_summary.get('failed')}")
+
+
+def main():
+    args = parse_args()
+    work_dir = tempfile.mkdtemp(prefix='colmap_rig_reprojection_check_')
+    failed = []
+    try:
+        source = make_source(os.path.join(work_dir, 'equirect.exr'), args.source_width, args.source_width // 2)
+        scene, item, cams = build_scene(work_dir, source, args)
+        render(scene, item, 'RENDER', os.path.join(work_dir, 'render'))
+        render(scene, item, 'REPROJECT', os.path.join(work_dir, 'reproject'))
+
+        limit = pixel_angles(args.size, args.lens, 36.0)
+        for cam in cams:
+            name = f'{RIG_NAME}_image0001.exr'
+            rendered = read_exr(os.path.join(work_dir, 'render', RIG_NAME, cam, name))
+            reprojected = read_exr(os.path.join(work_dir, 'reproject', RIG_NAME, cam, name))
+            dot = np.clip(np.sum(decoded_directions(rendered) * decoded_directions(reprojected), axis=-1), -1.0, 1.0)
+            error = np.arccos(dot) / limit
+            worst, p99 = float(error.max()), float(np.percentile(error, 99))
+            status = 'ok' if worst <= args.tolerance else 'FAIL'
+            print(f"[CHECK] {cam:<8} max {worst:.3f} px, p99 {p99:.3f} px  {status}")
+            if worst > args.tolerance:
+                failed.append(cam)
+    finally:
+        if args.keep:
+            print(f"[CHECK] kept files in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if failed:
+        print(f"[CHECK] reprojection differs by more than {args.tolerance} px for: {', '.join(failed)}")
+        sys.exit(1)
+    print(f"[CHECK] all {len(cams)} cameras within {args.tolerance} px")
+
+
+if __name__ == '__main__':
+    main()
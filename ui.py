@@ -26,8 +26,43 @@ class COLMAP_RIG_PT_panel(bpy.types.Panel):
             text='Render all rigs',
             icon='SCENE',
             )
+        row = layout.row()
+        row.operator(
+            'colmap_rig.apply_exif',
+            text='Apply EXIF to rendered frames',
+            icon='FILE_IMAGE',
+            )
+        row = layout.row()
+        row.operator(
+            'colmap_rig.unpack_shards',
+            text='Unpack frame shards',
+            icon='PACKAGE',
+            )
         # row.enabled = False
 
+        box = layout.box()
+        box.label(text='Render Options', icon='PREFERENCES')
+        row = box.row(align=True)
+        row.prop(scene, 'colmap_rig_resume')
+        row.prop(scene, 'colmap_rig_incremental')
+        row.prop(scene, 'colmap_rig_profile')
+        box.prop(scene, 'colmap_rig_write_behind')
+        box.prop(scene, 'colmap_rig_pyramid_levels')
+        box.prop(scene, 'colmap_rig_pack_shards')
+        box.prop(scene, 'colmap_rig_lut_cache_size')
+        box.prop(scene, 'colmap_rig_frame_cache_size')
+        row = box.row(align=True)
+        row.prop(scene, 'colmap_rig_parallel_workers', text='Workers')
+        row.prop(scene, 'colmap_rig_worker_threads', text='Threads')
+
+        box = layout.box()
+        box.label(text='Viewport', icon='RESTRICT_VIEW_OFF')
+        row = box.row(align=True)
+        row.prop(scene, 'colmap_rig_use_proxy')
+        sub = row.row(align=True)
+        sub.enabled = scene.colmap_rig_use_proxy
+        sub.prop(scene, 'colmap_rig_proxy_width', text='Width')
+
 
 classes = (
     COLMAP_RIG_PT_panel,
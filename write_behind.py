@@ -0,0 +1,251 @@
+#write_behind.py
+"""Write-behind encoding of rendered frames on worker threads.
+
+Instead of render.render(write_still=True), which encodes and writes every
+frame on the main thread, the composited result is tapped with a compositor
+Viewer node, copied out as a NumPy buffer and handed to a thread pool that
+encodes it (PNG via zlib, JPEG via ffmpeg), inserts EXIF and renames the file
+into place while the next camera renders. The pool is bounded by the bytes of
+queued frames, so a slow disk makes the render loop wait instead of filling
+memory. Only setups whose colour conversion can be reproduced are supported:
+8/16-bit PNG or JPEG, RGB/RGBA, an sRGB display and an identity Standard view
+transform. Pixel values then match Blender's output apart from dithering;
+JPEG files come from ffmpeg's mjpeg encoder, so their compression artefacts
+differ slightly from Blender's own JPEG writer.
+"""
+import os
+import struct
+import subprocess
+import zlib
+
+import bpy
+import numpy as np
+
+try:
+    from . import exif_writer, frame_source, job_pool, output_io
+except ImportError:
+    import exif_writer
+    import frame_source
+    import job_pool
+    import output_io
+
+VIEWER_NODE_NAME = 'COLMAP_RIG_VIEWER'
+# Queued frames are float32 RGBA (16 bytes per pixel): 1 GB holds about 7 frames of 4096 x 2048
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+def unsupported_reason(scene):
+    '''Return why frames of this scene can't be written behind, or '' if they can.'''
+    img = scene.render.image_settings
+    view = scene.view_settings
+    if img.file_format not in ('PNG', 'JPEG'):
+        return f'{img.file_format} output is not supported'
+    if img.file_format == 'JPEG' and not frame_source.FFMPEG_PATH:
+        return 'ffmpeg not found for JPEG encoding'
+    if img.color_mode not in ('RGB', 'RGBA'):
+        return f'color mode {img.color_mode} is not supported'
+    if scene.display_settings.display_device != 'sRGB':
+        return f'display device {scene.display_settings.display_device} is not sRGB'
+    if view.view_transform != 'Standard' or view.look != 'None' or view.exposure != 0.0 or view.gamma != 1.0:
+        return 'view transform is not Standard'
+    if scene.render.use_multiview:
+        return 'multi-view output'
+    return ''
+
+
+def output_settings(scene):
+    '''Snapshot of the image settings the workers encode with.'''
+    img = scene.render.image_settings
+    return {
+        'format': img.file_format,
+        'color_mode': img.color_mode,
+        'color_depth': img.color_depth,
+        'quality': img.quality,
+        'compression': img.compression,
+    }
+
+
+class PixelGrabber:
+    '''Viewer node read back after each render.
+
+    With use_compositor the viewer taps whatever feeds the Composite node (the
+    rig's compositor media graph). Otherwise it is fed by its own Render Layers
+    node, which also feeds the Composite node until restore(). The user's nodes
+    are muted meanwhile, so their graph (File Output nodes included) doesn't run
+    on every render, just as with write_still on a rig that renders with
+    compositing off.
+    '''
+
+    def __init__(self, scene, use_compositor=False):
+        self.scene = scene
+        self.use_compositor = use_compositor
+        self._saved = None
+        self._nodes = []
+        self._muted = []
+        self._composite_input = None
+
+    def setup(self):
+        scene = self.scene
+        self._saved = (scene.use_nodes, scene.render.use_compositing)
+        try:
+            scene.use_nodes = True
+            scene.render.use_compositing = True
+            nt = scene.node_tree
+            comp = next((n for n in nt.nodes if n.type == 'COMPOSITE'), None)
+            if comp is None:
+                comp = nt.nodes.new('CompositorNodeComposite')
+                self._nodes.append(comp)
+            if self.use_compositor and comp.inputs[0].is_linked:
+                source = comp.inputs[0].links[0].from_socket
+            else:
+                # Only the render result reaches the outputs; the user's graph is muted and bypassed
+                for node in nt.nodes:
+                    if node != comp and node.name != VIEWER_NODE_NAME and not node.mute:
+                        node.mute = True
+                        self._muted.append(node)
+                if comp.inputs[0].is_linked:
+                    self._composite_input = comp.inputs[0].links[0].from_socket
+                layers = nt.nodes.new('CompositorNodeRLayers')
+                layers.location = (comp.location.x - 300, comp.location.y - 200)
+                self._nodes.append(layers)
+                source = layers.outputs['Image']
+                nt.links.new(source, comp.inputs[0])
+            viewer = nt.nodes.get(VIEWER_NODE_NAME)
+            if viewer is None:
+                viewer = nt.nodes.new('CompositorNodeViewer')
+                viewer.name = VIEWER_NODE_NAME
+                viewer.location = (comp.location.x, comp.location.y - 200)
+                self._nodes.append(viewer)
+            nt.links.new(source, viewer.inputs[0])
+        except Exception as e:
+            print(f"Warning: write-behind setup failed ({e}), writing frames on the main thread")
+            self.restore()
+            return False
+        return True
+
+    def grab(self):
+        '''Copy the last composited frame: float32 (height, width, 4), bottom-up rows, scene linear.'''
+        img = bpy.data.images.get('Viewer Node')
+        if img is None or not img.size[0]:
+            raise RuntimeError('no composited result in the Viewer node')
+        width, height = img.size
+        buf = np.empty(width * height * 4, dtype=np.float32)
+        img.pixels.foreach_get(buf)
+        return buf.reshape(height, width, 4)
+
+    def restore(self):
+        if self._saved is None:
+            return
+        nt = self.scene.node_tree
+        for node in reversed(self._nodes):
+            try:
+                nt.nodes.remove(node)
+            except (ReferenceError, RuntimeError):
+                pass
+        self._nodes.clear()
+        for node in self._muted:
+            try:
+                node.mute = False
+            except ReferenceError:
+                pass
+        self._muted.clear()
+        if self._composite_input is not None:
+            try:
+                comp = next((n for n in nt.nodes if n.type == 'COMPOSITE'), None)
+                if comp is not None:
+                    nt.links.new(self._composite_input, comp.inputs[0])
+            except (ReferenceError, RuntimeError):
+                pass
+            self._composite_input = None
+        self.scene.use_nodes, self.scene.render.use_compositing = self._saved
+        self._saved = None
+
+
+# Encoding ##################################################################
+
+def _to_display(pixels, settings):
+    '''Linear bottom-up float RGBA -> top-down integer array in the output color mode and depth.'''
+    rgba = pixels[::-1]
+    rgb = rgba[..., :3]
+    alpha = rgba[..., 3:4]
+    if settings['color_mode'] == 'RGBA':
+        # Render results are premultiplied; files store straight alpha
+        rgb = np.divide(rgb, alpha, out=np.zeros_like(rgb), where=alpha > 0)
+    rgb = np.clip(rgb, 0.0, 1.0)
+    # Standard view transform: sRGB transfer function
+    rgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1 / 2.4) - 0.055)
+    out = np.concatenate([rgb, np.clip(alpha, 0.0, 1.0)], axis=2) if settings['color_mode'] == 'RGBA' else rgb
+    if settings['format'] == 'PNG' and settings['color_depth'] == '16':
+        return (out * 65535.0 + 0.5).astype('>u2')
+    return (out * 255.0 + 0.5).astype(np.uint8)
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+
+def write_png(path, data, compression=15):
+    '''Write a (height, width, 3|4) uint8 or big-endian uint16 array as PNG.'''
+    height, width, channels = data.shape
+    depth = 16 if data.dtype.itemsize == 2 else 8
+    color_type = 6 if channels == 4 else 2
+    rows = np.empty((height, 1 + width * channels * data.dtype.itemsize), dtype=np.uint8)
+    rows[:, 0] = 0  # no per-row filter
+    rows[:, 1:] = data.reshape(height, -1).view(np.uint8)
+    level = min(9, max(0, round(compression * 9 / 100)))
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, depth, color_type, 0, 0, 0)))
+        f.write(_png_chunk(b'IDAT', zlib.compress(rows.tobytes(), level)))
+        f.write(_png_chunk(b'IEND', b''))
+
+
+def write_jpeg(path, data, quality=90):
+    '''Encode a (height, width, 3) uint8 array as JPEG with ffmpeg.'''
+    height, width, _ = data.shape
+    # Same quality mapping as passthrough movie decoding (Blender 0-100 -> ffmpeg -q:v 31-2)
+    q = str(round(2 + (100 - quality) * 29 / 100))
+    subprocess.run(
+        [frame_source.FFMPEG_PATH, '-v', 'error', '-y', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+         '-s', f'{width}x{height}', '-i', '-', '-frames:v', '1', '-q:v', q, path],
+        input=np.ascontiguousarray(data).tobytes(), capture_output=True, check=True,
+    )
+
+
+def encode_frame(pixels, settings, exif_bytes, tmp_path, path):
+    '''Encode pixels to tmp_path, insert EXIF if given and move the file to path.'''
+    data = _to_display(pixels, settings)
+    try:
+        if settings['format'] == 'PNG':
+            write_png(tmp_path, data, settings['compression'])
+        else:
+            write_jpeg(tmp_path, data[..., :3], settings['quality'])
+        if exif_bytes is not None:
+            exif_writer.insert_exif(exif_bytes, tmp_path, path)
+        else:
+            output_io.commit(tmp_path, path)
+    except Exception:
+        output_io.discard(tmp_path)
+        raise
+
+
+class WriteBehindPool(job_pool.JobPool):
+    '''Threads that encode and write frames, bounded by the bytes of queued pixels.
+
+    Same interface as exif_writer.ExifWriterPool: submit() blocks while the
+    queue is full and results come back as (key, error, seconds) from pop_finished().
+    '''
+
+    error_prefix = 'write failed'
+    thread_name = 'colmap_rig_write'
+
+    def __init__(self, num_workers=None, max_bytes=DEFAULT_MAX_BYTES):
+        num_workers = num_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        super().__init__(num_workers, max_bytes=max_bytes)
+
+    def run_job(self, pixels, settings, exif_bytes, tmp_path, path):
+        encode_frame(pixels, settings, exif_bytes, tmp_path, path)
+
+    def submit(self, pixels, settings, exif_bytes, tmp_path, path, key=None):
+        '''Queue a frame; waits while the queued frames would exceed max_bytes.'''
+        super().submit(pixels, settings, exif_bytes, tmp_path, path, key=key, nbytes=pixels.nbytes)